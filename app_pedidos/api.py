@@ -0,0 +1,345 @@
+# api.py
+"""
+API HTTP/JSON local para clientes, produtos e pedidos (sem a interface Tk).
+
+Uso (a partir da pasta app_pedidos):
+    python api.py [--host 127.0.0.1] [--porta 8765] [--threads 16] [--db caminho/pedidos.db]
+                  [--instrumentar-sql[=explain]]
+
+Endpoints:
+    GET  /saude
+    GET  /clientes?busca=texto&limite=50        GET  /clientes/<id>
+    POST /clientes   {"nome", "email", "telefone"}
+    GET  /produtos?busca=texto&sku=cod&limite=50 GET  /produtos/<id>
+    POST /produtos   {"nome", "preco", "estoque", "sku"}
+    GET  /pedidos/<id>
+    GET  /metricas/sql?limite=50   (estatísticas de SQL deste processo, do maior tempo total;
+                                    só com --instrumentar-sql)
+    POST /pedidos    {"referencia", "cliente_id" | "cliente_email", "data", "itens": [...]}
+                     (201 criado; 200 se a referência já foi gravada: devolve o pedido existente)
+
+As requisições são atendidas por um pool fixo de threads, cada uma com a sua
+conexão (db.GerenciadorConexoes), e todas as gravações passam por uma única
+thread escritora (utils.fila_escrita.FilaEscrita), que grava os pedidos
+simultâneos em lote.
+"""
+import argparse
+import json
+import logging
+import re
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as TempoEsgotadoError
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlsplit, parse_qs
+import db
+from utils.busca_fts import buscar_clientes, buscar_produtos
+from utils.cache_detalhes import SQL_DETALHES
+from utils.fila_escrita import FilaEscrita
+from utils.instrumentacao_sql import ativar_instrumentacao, estatisticas, instrumentacao_ativa, modo_instrumentacao
+from utils.validations import validar_cliente, validar_produto
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 500
+# Tempo máximo (s) esperando uma gravação na fila antes de responder 503
+TEMPO_LIMITE_ESCRITA = 30
+
+COLUNAS_CLIENTE = ("id", "nome", "email", "telefone")
+COLUNAS_PRODUTO = ("id", "nome", "preco", "estoque", "sku")
+
+
+class ErroAPI(Exception):
+    """Erro que vira uma resposta JSON {"erro": mensagem} com o status informado."""
+
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+
+def _limite(parametros):
+    try:
+        return max(1, min(int(parametros.get("limite", [LIMITE_PADRAO])[0]), LIMITE_MAXIMO))
+    except ValueError:
+        raise ErroAPI(400, "limite deve ser um número inteiro.")
+
+
+def _como_dict(colunas, linha):
+    return dict(zip(colunas, linha))
+
+
+# --- Leituras (rodam nas threads do pool, cada uma com a sua conexão) ---
+
+def listar_clientes(parametros):
+    termo, limite = parametros.get("busca", [""])[0].strip(), _limite(parametros)
+    if termo:
+        linhas = buscar_clientes(termo, limite)
+    else:
+        linhas = db.executar_comando("SELECT id, nome, email, telefone FROM clientes ORDER BY id LIMIT ?",
+                                     (limite,), fetchall=True)
+    return 200, [_como_dict(COLUNAS_CLIENTE, linha) for linha in linhas or []]
+
+
+def obter_cliente(cliente_id):
+    linha = db.executar_comando("SELECT id, nome, email, telefone FROM clientes WHERE id = ?", (cliente_id,),
+                                fetchone=True)
+    if linha is None:
+        raise ErroAPI(404, "Cliente não encontrado.")
+    return 200, _como_dict(COLUNAS_CLIENTE, linha)
+
+
+def listar_produtos(parametros):
+    termo, limite = parametros.get("busca", [""])[0].strip(), _limite(parametros)
+    sku = parametros.get("sku", [""])[0].strip()
+    if sku:
+        # Leitura de scanner: busca exata pelo índice único de SKU
+        linhas = db.executar_comando("SELECT id, nome, preco, estoque, sku FROM produtos WHERE sku = ?", (sku,),
+                                     fetchall=True)
+    elif termo:
+        linhas = buscar_produtos(termo, limite, colunas_sql="p.id, p.nome, p.preco, p.estoque, p.sku")
+    else:
+        linhas = db.executar_comando("SELECT id, nome, preco, estoque, sku FROM produtos ORDER BY id LIMIT ?",
+                                     (limite,), fetchall=True)
+    return 200, [_como_dict(COLUNAS_PRODUTO, linha) for linha in linhas or []]
+
+
+def obter_produto(produto_id):
+    linha = db.executar_comando("SELECT id, nome, preco, estoque, sku FROM produtos WHERE id = ?", (produto_id,),
+                                fetchone=True)
+    if linha is None:
+        raise ErroAPI(404, "Produto não encontrado.")
+    return 200, _como_dict(COLUNAS_PRODUTO, linha)
+
+
+def obter_pedido(pedido_id):
+    linhas = db.executar_comando(SQL_DETALHES, (pedido_id,), fetchall=True)
+    if not linhas:
+        raise ErroAPI(404, "Pedido não encontrado.")
+    _, cliente, data, total = linhas[0][:4]
+    itens = [{"produto": nome, "quantidade": quantidade, "preco_unit": preco_unit, "subtotal": subtotal}
+             for _, _, _, _, nome, quantidade, preco_unit, subtotal in linhas if nome is not None]
+    return 200, {"id": pedido_id, "cliente": cliente, "data": data, "total": total, "itens": itens}
+
+
+def metricas_sql(parametros):
+    if not instrumentacao_ativa():
+        raise ErroAPI(404, "Instrumentação de SQL desligada; inicie a API com --instrumentar-sql.")
+    return 200, estatisticas.resumo()[:_limite(parametros)]
+
+
+# --- Gravações (validadas no pool e executadas pela thread escritora) ---
+
+def _inserir(sql, valores):
+    with db.transacao(imediata=True) as conn:
+        return conn.execute(sql, valores).lastrowid
+
+
+def _texto(corpo, campo):
+    valor = corpo.get(campo)
+    return "" if valor is None else str(valor)
+
+
+def criar_cliente(fila, corpo):
+    ok, resultado = validar_cliente(_texto(corpo, "nome"), _texto(corpo, "email"), _texto(corpo, "telefone"))
+    if not ok:
+        raise ErroAPI(400, resultado)
+    sql = "INSERT INTO clientes (nome, email, telefone) VALUES (?, ?, ?)"
+    try:
+        cliente_id = _esperar(fila.submeter(_inserir, sql, resultado))
+    except sqlite3.IntegrityError:
+        raise ErroAPI(409, "E-mail já cadastrado para outro cliente.")
+    return 201, _como_dict(COLUNAS_CLIENTE, (cliente_id,) + resultado)
+
+
+def criar_produto(fila, corpo):
+    estoque = corpo.get("estoque", 0)
+    ok, resultado = validar_produto(_texto(corpo, "nome"), _texto(corpo, "preco"),
+                                    "" if estoque is None else str(estoque), _texto(corpo, "sku"))
+    if not ok:
+        raise ErroAPI(400, resultado)
+    sql = "INSERT INTO produtos (nome, preco, estoque, sku) VALUES (?, ?, ?, ?)"
+    try:
+        produto_id = _esperar(fila.submeter(_inserir, sql, resultado))
+    except sqlite3.IntegrityError:
+        raise ErroAPI(409, "Produto com este nome ou SKU já cadastrado.")
+    return 201, _como_dict(COLUNAS_PRODUTO, (produto_id,) + resultado)
+
+
+def _pedido_por_referencia(referencia):
+    linha = db.executar_comando("SELECT id FROM pedidos WHERE referencia = ?", (referencia,), fetchone=True)
+    return linha[0] if linha else None
+
+
+def criar_pedido(fila, corpo):
+    # A referência torna o POST idempotente: o reenvio de um pedido já gravado
+    # (ex: depois de um 503 ou de uma conexão perdida) devolve o mesmo pedido
+    referencia = str(corpo.get("referencia") or "").strip() or None
+    existente = _pedido_por_referencia(referencia) if referencia else None
+    if existente is not None:
+        return 200, {"id": existente, "referencia": referencia}
+    try:
+        pedido_id = _esperar(fila.submeter_pedido(corpo))
+    except ValueError as e:
+        # Outra requisição com a mesma referência foi gravada antes desta
+        existente = _pedido_por_referencia(referencia) if referencia else None
+        if existente is not None:
+            return 200, {"id": existente, "referencia": referencia}
+        # Dados inválidos, cliente/produto inexistente ou estoque insuficiente
+        raise ErroAPI(422, str(e))
+    return 201, {"id": pedido_id, "referencia": referencia}
+
+
+def _esperar(futuro):
+    try:
+        return futuro.result(timeout=TEMPO_LIMITE_ESCRITA)
+    except TempoEsgotadoError:
+        if futuro.cancel():
+            # Ainda na fila: cancelada, a thread escritora a descarta (nada é gravado)
+            raise ErroAPI(503, "Fila de gravação sobrecarregada; nada foi gravado, tente novamente.")
+    # A gravação já começou: responder 503 agora mentiria se ela for confirmada
+    return futuro.result()
+
+
+# (método, padrão do caminho, função). GETs recebem o ID do caminho ou os parâmetros
+# da URL; POSTs recebem a fila de escrita e o corpo JSON.
+ROTAS = [
+    ("GET", re.compile(r"^/clientes$"), listar_clientes),
+    ("GET", re.compile(r"^/clientes/(\d+)$"), obter_cliente),
+    ("GET", re.compile(r"^/produtos$"), listar_produtos),
+    ("GET", re.compile(r"^/produtos/(\d+)$"), obter_produto),
+    ("GET", re.compile(r"^/pedidos/(\d+)$"), obter_pedido),
+    ("GET", re.compile(r"^/metricas/sql$"), metricas_sql),
+    ("POST", re.compile(r"^/clientes$"), criar_cliente),
+    ("POST", re.compile(r"^/produtos$"), criar_produto),
+    ("POST", re.compile(r"^/pedidos$"), criar_pedido),
+]
+
+
+class ManipuladorAPI(BaseHTTPRequestHandler):
+    # HTTP/1.1: conexões persistentes (keep-alive) entre requisições do mesmo cliente
+    protocol_version = "HTTP/1.1"
+    # Conexão ociosa é fechada após este tempo, liberando a thread do pool
+    timeout = 5
+    # Cabeçalho e corpo saem em escritas separadas: sem TCP_NODELAY, Nagle e o
+    # ACK atrasado do cliente somariam ~40 ms a cada resposta em keep-alive
+    disable_nagle_algorithm = True
+    server_version = "PedidosAPI/1.0"
+
+    def do_GET(self):
+        self._atender("GET")
+
+    def do_POST(self):
+        self._atender("POST")
+
+    def _atender(self, metodo):
+        url = urlsplit(self.path)
+        try:
+            if metodo == "GET" and url.path == "/saude":
+                status, corpo = 200, {"status": "ok"}
+            else:
+                status, corpo = self._rotear(metodo, url)
+        except ErroAPI as e:
+            status, corpo = e.status, {"erro": str(e)}
+        except Exception as e:
+            logging.error(f"Erro em {metodo} {self.path}: {e}")
+            status, corpo = 500, {"erro": "Erro interno."}
+        self._responder(status, corpo)
+
+    def _rotear(self, metodo, url):
+        caminho_existe = False
+        for metodo_rota, padrao, funcao in ROTAS:
+            encontrado = padrao.match(url.path)
+            if not encontrado:
+                continue
+            caminho_existe = True
+            if metodo_rota != metodo:
+                continue
+            if metodo == "POST":
+                return funcao(self.server.fila_escrita, self._ler_corpo())
+            if encontrado.groups():
+                return funcao(int(encontrado.group(1)))
+            return funcao(parse_qs(url.query))
+        if caminho_existe:
+            raise ErroAPI(405, "Método não permitido.")
+        raise ErroAPI(404, "Recurso não encontrado.")
+
+    def _ler_corpo(self):
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        try:
+            corpo = json.loads(self.rfile.read(tamanho) or b"null")
+        except ValueError:
+            raise ErroAPI(400, "Corpo da requisição não é um JSON válido.")
+        if not isinstance(corpo, dict):
+            raise ErroAPI(400, "O corpo da requisição deve ser um objeto JSON.")
+        return corpo
+
+    def _responder(self, status, corpo):
+        dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def log_message(self, formato, *args):
+        # Uma linha por requisição em INFO custaria caro com centenas de requisições/s
+        logging.debug("%s - %s", self.address_string(), formato % args)
+
+
+class ServidorAPI(HTTPServer):
+    """HTTPServer que atende cada conexão em um pool fixo de threads (e, portanto, de conexões ao banco)."""
+
+    def __init__(self, endereco, threads=16, fila_escrita=None):
+        super().__init__(endereco, ManipuladorAPI)
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="api")
+        self.fila_escrita = fila_escrita or FilaEscrita()
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._processar, request, client_address)
+
+    def _processar(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API HTTP/JSON local de clientes, produtos e pedidos.")
+    parser.add_argument("--host", default="127.0.0.1", help="Endereço de escuta (padrão: só a máquina local)")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--threads", type=int, default=16, help="Threads (e conexões de leitura) do pool")
+    parser.add_argument("--db", default=None, help="Arquivo do banco (padrão: PEDIDOS_DB ou pedidos.db)")
+    parser.add_argument("--instrumentar-sql", nargs="?", const="1", default=None, metavar="explain",
+                        help="Instrumenta o SQL (GET /metricas/sql) e registra as consultas lentas")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    # Antes da primeira conexão: só as conexões abertas depois são instrumentadas
+    ativar_instrumentacao(args.instrumentar_sql or modo_instrumentacao([]))
+    if args.db:
+        db.configurar_banco(args.db)
+    db.inicializar_db()
+
+    fila = FilaEscrita()
+    fila.iniciar()
+    servidor = ServidorAPI((args.host, args.porta), threads=args.threads, fila_escrita=fila)
+    logging.info(f"API ouvindo em http://{args.host}:{servidor.server_address[1]} ({args.threads} threads)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        fila.parar()
+        db.fechar_conexoes()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
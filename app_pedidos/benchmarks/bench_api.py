@@ -0,0 +1,188 @@
+# benchmarks/bench_api.py
+"""
+Teste de carga da API HTTP local (api.py).
+
+Uso (a partir da pasta app_pedidos):
+    python benchmarks/bench_api.py --clientes 8 --segundos 10 --escrita 0.5
+
+Cria um banco temporário, sobe a API em um processo separado em uma porta
+livre de localhost e dispara requisições de 'clientes' threads, cada uma
+com a sua conexão keep-alive: leituras (produto por SKU ou por ID) e, na
+proporção --escrita, criação de pedidos de 1 a 3 itens disputando o
+estoque dos mesmos produtos. Informa requisições/s, latência p50/p99 de
+leituras e gravações, respostas por status e confere que nenhum produto foi
+vendido além do estoque. Sai com código 1 se houver erros 5xx, falhas de
+conexão ou oversell.
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import random
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+PASTA_APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PASTA_APP)
+
+import db  # noqa: E402
+
+
+def preparar_banco(caminho, n_clientes, n_produtos, estoque_inicial):
+    """Cria um banco limpo com clientes e produtos (com SKU) de mesmo estoque."""
+    for sufixo in ("", "-wal", "-shm"):
+        if os.path.exists(caminho + sufixo):
+            os.remove(caminho + sufixo)
+
+    db.configurar_banco(caminho)
+    db.inicializar_db()
+    with db.transacao() as conn:
+        conn.executemany("INSERT INTO clientes (nome, email) VALUES (?, ?)",
+                         [(f"Cliente {i}", f"cliente{i}@carga.local") for i in range(1, n_clientes + 1)])
+        conn.executemany("INSERT INTO produtos (nome, preco, estoque, sku) VALUES (?, ?, ?, ?)",
+                         [(f"Produto {i}", 1.0 + i, estoque_inicial, f"SKU{i:06d}") for i in range(1, n_produtos + 1)])
+    db.fechar_conexoes()
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def aguardar_api(porta, tempo_limite=15):
+    fim = time.time() + tempo_limite
+    while time.time() < fim:
+        try:
+            conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=1)
+            conexao.request("GET", "/saude")
+            if conexao.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("A API não respondeu a tempo.")
+
+
+def cliente_carga(porta, segundos, escrita, n_clientes, n_produtos, semente, resultados):
+    """Uma thread de carga: registra (tipo, status, latência) em 'resultados'."""
+    aleatorio = random.Random(semente)
+    conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=30)
+    registros = []
+    fim = time.perf_counter() + segundos
+    while time.perf_counter() < fim:
+        if aleatorio.random() < escrita:
+            tipo, metodo, caminho = "escrita", "POST", "/pedidos"
+            corpo = json.dumps({
+                "referencia": f"carga-{semente}-{len(registros)}",
+                "cliente_id": aleatorio.randint(1, n_clientes),
+                "itens": [{"sku": f"SKU{aleatorio.randint(1, n_produtos):06d}", "quantidade": aleatorio.randint(1, 3)}
+                          for _ in range(aleatorio.randint(1, 3))],
+            })
+        else:
+            tipo, metodo, corpo = "leitura", "GET", None
+            if aleatorio.random() < 0.5:
+                caminho = f"/produtos?sku=SKU{aleatorio.randint(1, n_produtos):06d}"
+            else:
+                caminho = f"/produtos/{aleatorio.randint(1, n_produtos)}"
+
+        inicio = time.perf_counter()
+        try:
+            conexao.request(metodo, caminho, body=corpo, headers={"Content-Type": "application/json"})
+            resposta = conexao.getresponse()
+            resposta.read()
+            status = resposta.status
+        except (OSError, http.client.HTTPException):
+            status = "falha"
+            conexao.close()
+            conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=30)
+        registros.append((tipo, status, time.perf_counter() - inicio))
+    conexao.close()
+    resultados.extend(registros)
+
+
+def verificar_oversell(caminho, estoque_inicial):
+    """Unidades vendidas além do estoque inicial (deve ser zero) e estoque negativo."""
+    conn = sqlite3.connect(caminho)
+    try:
+        vendido = dict(conn.execute("SELECT produto_id, SUM(quantidade) FROM itens_pedido GROUP BY produto_id"))
+        excesso = sum(max(0, quantidade - estoque_inicial) for quantidade in vendido.values())
+        negativos = conn.execute("SELECT COUNT(*) FROM produtos WHERE estoque < 0").fetchone()[0]
+        divergentes = conn.execute(
+            "SELECT COUNT(*) FROM produtos p WHERE p.estoque != ? - "
+            "COALESCE((SELECT SUM(quantidade) FROM itens_pedido i WHERE i.produto_id = p.id), 0)",
+            (estoque_inicial,)).fetchone()[0]
+        return excesso, negativos, divergentes
+    finally:
+        conn.close()
+
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    return statistics.quantiles(valores, n=100)[p - 1] if len(valores) > 1 else valores[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga da API HTTP local.")
+    parser.add_argument("--clientes", type=int, default=8, help="Threads de carga simultâneas")
+    parser.add_argument("--segundos", type=float, default=10, help="Duração da carga")
+    parser.add_argument("--escrita", type=float, default=0.5, help="Proporção de requisições que criam pedidos")
+    parser.add_argument("--threads-api", type=int, default=16, help="Threads do pool da API")
+    parser.add_argument("--produtos", type=int, default=200, help="Produtos disputados")
+    parser.add_argument("--estoque", type=int, default=500, help="Estoque inicial de cada produto")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    pasta = tempfile.mkdtemp(prefix="bench_api_")
+    caminho = os.path.join(pasta, "api.db")
+    preparar_banco(caminho, 100, args.produtos, args.estoque)
+
+    porta = porta_livre()
+    servidor = subprocess.Popen([sys.executable, "api.py", "--porta", str(porta), "--db", caminho,
+                                 "--threads", str(args.threads_api)], cwd=PASTA_APP,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    try:
+        aguardar_api(porta)
+        resultados = []
+        threads = [threading.Thread(target=cliente_carga,
+                                    args=(porta, args.segundos, args.escrita, 100, args.produtos, semente, resultados))
+                   for semente in range(args.clientes)]
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duracao = time.perf_counter() - inicio
+    finally:
+        servidor.terminate()
+        _, erros_servidor = servidor.communicate(timeout=30)
+
+    print(f"{len(resultados)} requisições em {duracao:.1f}s: {len(resultados) / duracao:.0f} req/s "
+          f"({args.clientes} clientes, {args.escrita:.0%} gravações)")
+    print(f"{'tipo':<9} {'qtd':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    for tipo in ("leitura", "escrita"):
+        latencias = [latencia * 1000 for t, _, latencia in resultados if t == tipo]
+        print(f"{tipo:<9} {len(latencias):>7} {_percentil(latencias, 50):>8.1f} {_percentil(latencias, 99):>8.1f}")
+
+    status = Counter(str(s) for _, s, _ in resultados)
+    print("Respostas por status: " + ", ".join(f"{codigo}={qtd}" for codigo, qtd in sorted(status.items())))
+    excesso, negativos, divergentes = verificar_oversell(caminho, args.estoque)
+    print(f"Oversell: {excesso} unidades; produtos com estoque negativo: {negativos}; "
+          f"estoque divergente das vendas: {divergentes}")
+
+    falhas = sum(qtd for codigo, qtd in status.items() if codigo.startswith("5") or codigo == "falha")
+    if falhas:
+        print(erros_servidor[-2000:], file=sys.stderr)
+    sys.exit(1 if falhas or excesso or negativos or divergentes else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# benchmarks/bench_concorrencia.py
+"""
+Benchmark de contenção: N processos ("terminais") gravando pedidos ao mesmo
+tempo no mesmo arquivo SQLite, disputando o estoque dos mesmos produtos.
+
+Uso (a partir da pasta app_pedidos):
+    python benchmarks/bench_concorrencia.py --terminais 1,2,4,8 --pedidos 200
+
+Para cada quantidade de terminais informa pedidos/s, latência p50/p99 do
+salvamento, pedidos recusados por falta de estoque, erros de banco e a
+quantidade vendida além do estoque (oversell), que deve ser sempre zero.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db  # noqa: E402
+from utils.servico_pedidos import gravar_pedido, EstoqueInsuficienteError  # noqa: E402
+
+
+def preparar_banco(caminho, n_produtos, estoque_inicial):
+    """Cria um banco limpo com um cliente e n_produtos com o mesmo estoque."""
+    for sufixo in ("", "-wal", "-shm"):
+        if os.path.exists(caminho + sufixo):
+            os.remove(caminho + sufixo)
+
+    db.configurar_banco(caminho)
+    db.inicializar_db()
+    with db.transacao() as conn:
+        conn.execute("INSERT INTO clientes (nome) VALUES ('Cliente Benchmark')")
+        conn.executemany("INSERT INTO produtos (nome, preco, estoque) VALUES (?, ?, ?)",
+                         [(f"Produto {i}", 1.0 + i, estoque_inicial) for i in range(1, n_produtos + 1)])
+    db.fechar_conexoes()
+
+
+def terminal(caminho, indice, n_pedidos, n_produtos, max_linhas, largada, resultados):
+    """Processo que simula um terminal gravando n_pedidos pedidos."""
+    logging.getLogger().setLevel(logging.ERROR)
+    db.configurar_banco(caminho)
+    aleatorio = random.Random(indice)
+
+    latencias = []
+    recusados = 0
+    erros = 0
+    largada.wait()
+    inicio = time.time()
+
+    for _ in range(n_pedidos):
+        itens = []
+        for _ in range(aleatorio.randint(1, max_linhas)):
+            produto_id = aleatorio.randint(1, n_produtos)
+            itens.append((produto_id, f"Produto {produto_id}", aleatorio.randint(1, 3), 1.0 + produto_id))
+        total = sum(qtd * preco for _, _, qtd, preco in itens)
+
+        t0 = time.perf_counter()
+        try:
+            gravar_pedido(1, "2024-01-01", total, itens)
+            latencias.append(time.perf_counter() - t0)
+        except EstoqueInsuficienteError:
+            recusados += 1
+        except sqlite3.Error:
+            erros += 1
+
+    resultados.put((inicio, time.time(), latencias, recusados, erros))
+    db.fechar_conexoes()
+
+
+def medir_oversell(caminho, estoque_inicial):
+    """Quantidade vendida além do estoque inicial (somada entre os produtos)."""
+    conn = sqlite3.connect(caminho)
+    try:
+        vendido = conn.execute("""
+            SELECT p.id, p.estoque, COALESCE(SUM(i.quantidade), 0)
+            FROM produtos p
+            LEFT JOIN itens_pedido i ON i.produto_id = p.id
+            GROUP BY p.id
+        """).fetchall()
+    finally:
+        conn.close()
+    # Estoque negativo ou vendas acima do estoque inicial contam como oversell
+    return sum(max(0, qtd - estoque_inicial) + max(0, -estoque) for _, estoque, qtd in vendido)
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p * (len(ordenados) - 1))))]
+
+
+def rodar(caminho, n_terminais, args):
+    preparar_banco(caminho, args.produtos, args.estoque)
+
+    contexto = multiprocessing.get_context("spawn")
+    largada = contexto.Event()
+    resultados = contexto.Queue()
+    processos = [contexto.Process(target=terminal,
+                                  args=(caminho, i, args.pedidos, args.produtos, args.linhas, largada, resultados))
+                 for i in range(n_terminais)]
+    for processo in processos:
+        processo.start()
+    time.sleep(0.5)  # Dá tempo para todos os processos importarem os módulos
+    largada.set()
+
+    coletados = [resultados.get() for _ in processos]
+    for processo in processos:
+        processo.join()
+
+    inicio = min(c[0] for c in coletados)
+    fim = max(c[1] for c in coletados)
+    latencias = [lat for c in coletados for lat in c[2]]
+    recusados = sum(c[3] for c in coletados)
+    erros = sum(c[4] for c in coletados)
+    duracao = max(fim - inicio, 1e-9)
+
+    return {
+        "terminais": n_terminais,
+        "gravados": len(latencias),
+        "pedidos_s": len(latencias) / duracao,
+        "p50_ms": percentil(latencias, 0.50) * 1000,
+        "p99_ms": percentil(latencias, 0.99) * 1000,
+        "recusados": recusados,
+        "erros": erros,
+        "oversell": medir_oversell(caminho, args.estoque),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de gravação concorrente de pedidos.")
+    parser.add_argument("--terminais", default="1,2,4,8", help="Lista de quantidades de terminais (ex: 1,2,4,8)")
+    parser.add_argument("--pedidos", type=int, default=200, help="Pedidos por terminal")
+    parser.add_argument("--produtos", type=int, default=20, help="Produtos compartilhados")
+    parser.add_argument("--estoque", type=int, default=500, help="Estoque inicial de cada produto")
+    parser.add_argument("--linhas", type=int, default=5, help="Máximo de linhas por pedido")
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_concorrencia.db"),
+                        help="Arquivo do banco usado no benchmark (é recriado)")
+    args = parser.parse_args()
+
+    print(f"{'terminais':>9} {'gravados':>8} {'pedidos/s':>10} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'recusados':>9} {'erros':>6} {'oversell':>8}")
+    falhou = False
+    for n_terminais in (int(n) for n in args.terminais.split(",")):
+        r = rodar(args.db, n_terminais, args)
+        print(f"{r['terminais']:>9} {r['gravados']:>8} {r['pedidos_s']:>10.1f} {r['p50_ms']:>8.2f} "
+              f"{r['p99_ms']:>8.2f} {r['recusados']:>9} {r['erros']:>6} {r['oversell']:>8}")
+        falhou = falhou or r["oversell"] != 0 or r["erros"] != 0
+
+    # Código de saída != 0 se houve oversell ou pedidos perdidos por erro de banco
+    sys.exit(1 if falhou else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# benchmarks/bench_inicializacao.py
+"""
+Benchmark de inicialização do app, com orçamento (falha se piorar).
+
+Uso (a partir da pasta app_pedidos):
+    python benchmarks/bench_inicializacao.py --repeticoes 5
+
+Mede, em processos novos e usando um banco temporário:
+- importação: tempo cumulativo de "import main" segundo python -X importtime,
+  e os módulos mais pesados;
+- primeira pintura: do início do processo até a janela ser exibida;
+- interativo: até a aba visível estar carregada.
+
+As duas últimas precisam de um display (a janela abre e fecha sozinha, via
+PEDIDOS_MEDIR_INICIO=sair) e são puladas sem ele. Sai com código 1 se a
+mediana de alguma medida passar do orçamento.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PASTA_APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Orçamentos padrão (ms), pensados para os thin clients
+ORCAMENTO_IMPORTACAO_MS = 400
+ORCAMENTO_PRIMEIRA_PINTURA_MS = 1000
+ORCAMENTO_INTERATIVO_MS = 1500
+
+
+def _ambiente(db_file, **extras):
+    ambiente = dict(os.environ, PEDIDOS_DB=db_file, **extras)
+    ambiente.pop("PYTHONPROFILEIMPORTTIME", None)
+    return ambiente
+
+
+def medir_importacao(db_file):
+    """Retorna (ms cumulativos de 'import main', [(ms cumulativos, módulo)] dos mais pesados)."""
+    processo = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=PASTA_APP,
+                              env=_ambiente(db_file), capture_output=True, text=True, check=True)
+    modulos = []
+    for linha in processo.stderr.splitlines():
+        # "import time:       self [us] |  cumulative | imported package"
+        encontrado = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)", linha)
+        if encontrado:
+            modulos.append((int(encontrado.group(2)) / 1000, len(encontrado.group(3)), encontrado.group(4)))
+    total = next(ms for ms, _, nome in modulos if nome == "main")
+    # Imports feitos diretamente por main.py (um nível abaixo dele na árvore)
+    diretos = sorted(((ms, nome) for ms, nivel, nome in modulos if nivel == 3), reverse=True)
+    return total, diretos
+
+
+def medir_janela(db_file, tempo_limite):
+    """Abre o app e retorna {marco: ms} (primeira_pintura, interativo), medidos desde o início do processo."""
+    inicio = time.time()
+    processo = subprocess.run([sys.executable, "main.py"], cwd=PASTA_APP,
+                              env=_ambiente(db_file, PEDIDOS_MEDIR_INICIO="sair"),
+                              capture_output=True, text=True, timeout=tempo_limite)
+    for linha in processo.stdout.splitlines():
+        if linha.startswith("INICIO "):
+            marcos = dict(item.split("=") for item in linha.split()[1:])
+            return {nome.removesuffix("_ms"): float(valor) for nome, valor in marcos.items()}
+    raise RuntimeError(f"O app não informou os marcos de inicialização ({time.time() - inicio:.1f}s):\n"
+                       f"{processo.stderr[-2000:]}")
+
+
+def tem_display():
+    return os.name == "nt" or sys.platform == "darwin" or bool(os.environ.get("DISPLAY"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização do app, com orçamento.")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Execuções de cada medida (usa a mediana)")
+    parser.add_argument("--orcamento-importacao-ms", type=float, default=ORCAMENTO_IMPORTACAO_MS)
+    parser.add_argument("--orcamento-pintura-ms", type=float, default=ORCAMENTO_PRIMEIRA_PINTURA_MS)
+    parser.add_argument("--orcamento-interativo-ms", type=float, default=ORCAMENTO_INTERATIVO_MS)
+    parser.add_argument("--tempo-limite", type=float, default=60, help="Tempo máximo (s) de cada abertura do app")
+    args = parser.parse_args()
+
+    db_file = os.path.join(tempfile.mkdtemp(prefix="bench_inicializacao_"), "pedidos.db")
+    resultados = {}
+
+    importacoes = [medir_importacao(db_file) for _ in range(args.repeticoes)]
+    resultados["importacao"] = (statistics.median(total for total, _ in importacoes), args.orcamento_importacao_ms)
+    print("Imports mais pesados de main.py (ms cumulativos, última execução):")
+    for ms, nome in importacoes[-1][1][:8]:
+        print(f"  {ms:>8.1f}  {nome}")
+
+    if tem_display():
+        # A primeira abertura cria o banco (migrações): é medida à parte como "primeira execução"
+        primeira = medir_janela(db_file, args.tempo_limite)
+        print(f"Primeira execução (cria o banco): interativo em {primeira['interativo']:.1f} ms")
+        janelas = [medir_janela(db_file, args.tempo_limite) for _ in range(args.repeticoes)]
+        resultados["primeira_pintura"] = (statistics.median(j["primeira_pintura"] for j in janelas),
+                                          args.orcamento_pintura_ms)
+        resultados["interativo"] = (statistics.median(j["interativo"] for j in janelas), args.orcamento_interativo_ms)
+    else:
+        print("Sem display: primeira pintura e tempo até interativo não medidos.")
+
+    print(f"\n{'medida':<18} {'mediana ms':>11} {'orçamento ms':>13}  situação")
+    estourou = False
+    for medida, (valor, orcamento) in resultados.items():
+        ok = valor <= orcamento
+        estourou = estourou or not ok
+        print(f"{medida:<18} {valor:>11.1f} {orcamento:>13.1f}  {'ok' if ok else 'ACIMA DO ORÇAMENTO'}")
+
+    sys.exit(1 if estourou else 0)
+
+
+if __name__ == "__main__":
+    main()
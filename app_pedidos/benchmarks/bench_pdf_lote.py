@@ -0,0 +1,83 @@
+# benchmarks/bench_pdf_lote.py
+"""
+Benchmark de geração de PDFs em lote: páginas por segundo e por núcleo.
+
+Uso (a partir da pasta app_pedidos):
+    python benchmarks/bench_pdf_lote.py --processos 1,2,4 --pedidos 2000
+
+Cria um banco temporário com pedidos de tamanhos variados (alguns ocupam
+várias páginas) e gera um PDF por pedido (ou um relatório único, com
+--relatorio) para cada quantidade de processos. Requer reportlab.
+"""
+import argparse
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db  # noqa: E402
+from utils.pdf_lote import gerar_pdfs_pedidos, gerar_relatorio_pdf  # noqa: E402
+
+
+def preparar_banco(caminho, n_pedidos, max_itens):
+    """Cria um banco limpo com n_pedidos de 1 a max_itens itens cada."""
+    for sufixo in ("", "-wal", "-shm"):
+        if os.path.exists(caminho + sufixo):
+            os.remove(caminho + sufixo)
+
+    db.configurar_banco(caminho)
+    db.inicializar_db()
+    aleatorio = random.Random(42)
+    with db.transacao() as conn:
+        conn.execute("INSERT INTO clientes (nome) VALUES ('Cliente Benchmark')")
+        for _ in range(n_pedidos):
+            itens = [(f"Produto {aleatorio.randint(1, 500)}", aleatorio.randint(1, 5), 1.0 + aleatorio.random() * 99)
+                     for _ in range(aleatorio.randint(1, max_itens))]
+            total = sum(qtd * preco for _, qtd, preco in itens)
+            pedido_id = conn.execute("INSERT INTO pedidos (cliente_id, data, total) VALUES (1, '2024-01-01', ?)",
+                                     (total,)).lastrowid
+            conn.executemany("INSERT INTO itens_pedido (pedido_id, produto_nome, quantidade, preco_unit) "
+                             "VALUES (?, ?, ?, ?)", [(pedido_id,) + item for item in itens])
+    ids = [linha[0] for linha in db.executar_comando("SELECT id FROM pedidos ORDER BY id", fetchall=True)]
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de geração de PDFs de pedidos em lote.")
+    parser.add_argument("--processos", default="1,2,4", help="Lista de quantidades de processos (ex: 1,2,4)")
+    parser.add_argument("--pedidos", type=int, default=1000, help="Pedidos gerados")
+    parser.add_argument("--itens", type=int, default=80, help="Máximo de itens por pedido (40+ ocupa 2 páginas)")
+    parser.add_argument("--relatorio", action="store_true", help="Gera um relatório único em vez de um PDF por pedido")
+    parser.add_argument("--pasta", default=os.path.join(tempfile.gettempdir(), "bench_pdf_lote"),
+                        help="Pasta de trabalho (é recriada)")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    shutil.rmtree(args.pasta, ignore_errors=True)
+    os.makedirs(args.pasta)
+    ids = preparar_banco(os.path.join(args.pasta, "bench.db"), args.pedidos, args.itens)
+
+    print(f"{'processos':>9} {'pedidos':>8} {'páginas':>8} {'segundos':>9} {'páginas/s':>10} {'pág/s/núcleo':>13}")
+    for processos in (int(n) for n in args.processos.split(",")):
+        destino = os.path.join(args.pasta, f"saida_{processos}")
+        os.makedirs(destino)
+        inicio = time.perf_counter()
+        if args.relatorio:
+            pedidos, paginas = gerar_relatorio_pdf(ids, os.path.join(destino, "relatorio.pdf"), processos=processos)
+        else:
+            pedidos, paginas = gerar_pdfs_pedidos(ids, destino, processos=processos)
+        duracao = time.perf_counter() - inicio
+        nucleos = min(processos, os.cpu_count() or 1)
+        print(f"{processos:>9} {pedidos:>8} {paginas:>8} {duracao:>9.2f} {paginas / duracao:>10.1f} "
+              f"{paginas / duracao / nucleos:>13.1f}")
+
+    db.fechar_conexoes()
+
+
+if __name__ == "__main__":
+    main()
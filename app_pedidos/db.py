@@ -2,20 +2,100 @@
 import sqlite3
 from sqlite3 import Error
 import logging
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from utils.instrumentacao_sql import fabrica_conexao
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-DATABASE_NAME = "pedidos.db"
+# Vários processos (terminais, a API) podem usar o mesmo arquivo, desde que
+# todos rodem no MESMO computador: o modo WAL depende de memória compartilhada
+# e não funciona em pasta de rede. Para vários computadores, use a API HTTP
+# (api.py) em um deles e aponte os demais para ela.
+DATABASE_NAME = os.environ.get("PEDIDOS_DB", "pedidos.db")
 
+# PRAGMAs aplicados uma única vez por conexão (não a cada comando)
+PRAGMAS_CONEXAO = (
+    "PRAGMA foreign_keys = ON;",
+    "PRAGMA cache_size = -16000;",  # ~16 MB de cache de páginas
+    "PRAGMA mmap_size = 268435456;",  # 256 MB mapeados em memória
+    "PRAGMA busy_timeout = 5000;",  # Espera até 5s por um lock antes de falhar
+)
+
+# Modo de journal por local do arquivo (ver modo_journal())
+PRAGMAS_JOURNAL = {
+    # Leitores não bloqueiam o escritor; synchronous NORMAL é seguro em WAL e bem mais rápido que FULL
+    "WAL": ("PRAGMA journal_mode = WAL;", "PRAGMA synchronous = NORMAL;"),
+    # Journal de rollback clássico: em rede o SQLite só conta com os locks de arquivo
+    "DELETE": ("PRAGMA journal_mode = DELETE;", "PRAGMA synchronous = FULL;"),
+}
+
+# Sistemas de arquivos de rede (tipo em /proc/mounts) onde WAL não é seguro
+SISTEMAS_ARQUIVOS_REDE = {"nfs", "nfs4", "cifs", "smb3", "smbfs", "9p", "afs", "ceph", "glusterfs",
+                          "fuse.sshfs", "fuse.glusterfs"}
+
+# Tamanho do cache de prepared statements do módulo sqlite3
+CACHE_STATEMENTS = 256
+
+
+def em_pasta_de_rede(db_file):
+    """Indica se o arquivo está em um compartilhamento de rede (UNC/unidade mapeada no Windows, NFS/SMB no Linux)."""
+    caminho = os.path.realpath(db_file)
+    if sys.platform == "win32":
+        if caminho.startswith("\\\\"):
+            return True
+        import ctypes
+        DRIVE_REMOTE = 4
+        return ctypes.windll.kernel32.GetDriveTypeW(os.path.splitdrive(caminho)[0] + "\\") == DRIVE_REMOTE
+    try:
+        with open("/proc/mounts", encoding="utf-8") as f:
+            montagens = [linha.split()[1:3] for linha in f if len(linha.split()) >= 3]
+    except OSError:
+        return False  # Sem /proc (ex: macOS): não há como saber
+    # O ponto de montagem mais longo que contém o arquivo define o sistema de arquivos
+    tipo = None
+    comprimento = -1
+    for ponto, sistema in montagens:
+        ponto = ponto.replace("\\040", " ")
+        if (caminho == ponto or caminho.startswith(ponto.rstrip("/") + "/")) and len(ponto) > comprimento:
+            tipo, comprimento = sistema, len(ponto)
+    return tipo in SISTEMAS_ARQUIVOS_REDE
+
+
+@lru_cache(maxsize=None)
+def modo_journal(db_file):
+    """
+    WAL no disco local; DELETE em pasta de rede, onde WAL corromperia o banco
+    (o índice do WAL fica em memória compartilhada, visível só para os
+    processos do mesmo computador). PEDIDOS_JOURNAL=WAL|DELETE força o modo.
+    """
+    forcado = os.environ.get("PEDIDOS_JOURNAL", "").upper()
+    if forcado in PRAGMAS_JOURNAL:
+        return forcado
+    if db_file != ":memory:" and em_pasta_de_rede(db_file):
+        logging.warning(f"Banco em pasta de rede ({db_file}): usando journal_mode=DELETE em vez de WAL. "
+                        "Para vários computadores, use a API HTTP (api.py) em vez de compartilhar o arquivo.")
+        return "DELETE"
+    return "WAL"
+
+
+def _configurar_conexao(conn, db_file):
+    """Aplica os PRAGMAs de desempenho/integridade a uma conexão recém-aberta."""
+    for pragma in PRAGMAS_CONEXAO + PRAGMAS_JOURNAL[modo_journal(db_file)]:
+        conn.execute(pragma)
 
-# ... (criar_conexao permanece o mesmo)
 
 def criar_conexao(db_file=DATABASE_NAME):
-    """Cria uma conexão com o banco de dados SQLite especificado."""
+    """Cria uma conexão avulsa (não compartilhada) com o banco de dados SQLite especificado."""
     conn = None
     try:
-        conn = sqlite3.connect(db_file)
-        conn.execute("PRAGMA foreign_keys = ON;")
+        conn = sqlite3.connect(db_file, cached_statements=CACHE_STATEMENTS, factory=fabrica_conexao())
+        _configurar_conexao(conn, db_file)
         return conn
     except Error as e:
         logging.error(f"Erro ao conectar ao banco de dados: {e}")
@@ -24,86 +104,543 @@ def criar_conexao(db_file=DATABASE_NAME):
         return None
 
 
+class GerenciadorConexoes:
+    """
+    Mantém uma conexão "quente" por thread para o mesmo arquivo de banco.
+
+    Cada thread recebe sempre a mesma conexão, então o cache de páginas e o
+    cache de prepared statements são reaproveitados entre chamadas.
+    """
+
+    def __init__(self, db_file=DATABASE_NAME):
+        self.db_file = db_file
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._conexoes = []
+
+    def obter_conexao(self):
+        """Retorna a conexão da thread atual, abrindo-a e configurando-a na primeira vez."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        try:
+            # check_same_thread=False apenas para permitir o fechamento centralizado;
+            # cada conexão continua sendo usada somente pela thread que a abriu.
+            conn = sqlite3.connect(self.db_file, cached_statements=CACHE_STATEMENTS, check_same_thread=False,
+                                   factory=fabrica_conexao())
+            _configurar_conexao(conn, self.db_file)
+        except Error as e:
+            logging.error(f"Erro ao conectar ao banco de dados: {e}")
+            return None
+
+        self._local.conn = conn
+        with self._lock:
+            self._conexoes.append(conn)
+        return conn
+
+    @contextmanager
+    def transacao(self, imediata=False):
+        """
+        Abre uma transação na conexão da thread atual.
+
+        Faz commit ao sair normalmente e rollback se ocorrer exceção. Com
+        imediata=True usa BEGIN IMMEDIATE (reserva o lock de escrita já no início).
+        Transações aninhadas participam da transação externa.
+        """
+        conn = self.obter_conexao()
+        if conn is None:
+            raise Error("Não foi possível estabelecer a conexão com o banco de dados.")
+
+        if conn.in_transaction:
+            yield conn
+            return
+
+        conn.execute("BEGIN IMMEDIATE" if imediata else "BEGIN")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+
+    def fechar_conexao_da_thread(self):
+        """
+        Fecha a conexão da thread atual, se houver. Threads de vida curta (ex:
+        importação e exportação) devem chamá-la ao terminar; senão a conexão,
+        com seu cache de páginas e mmap, só é fechada ao encerrar o app.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            if conn in self._conexoes:
+                self._conexoes.remove(conn)
+        try:
+            conn.close()
+        except Error as e:
+            logging.warning(f"Erro ao fechar conexão: {e}")
+
+    def fechar_todas(self):
+        """Fecha todas as conexões abertas pelo gerenciador (ex: ao encerrar o app)."""
+        with self._lock:
+            conexoes, self._conexoes = self._conexoes, []
+        for conn in conexoes:
+            try:
+                conn.close()
+            except Error as e:
+                logging.warning(f"Erro ao fechar conexão: {e}")
+        self._local = threading.local()
+
+
+gerenciador = GerenciadorConexoes()
+
+
+def obter_conexao():
+    """Atalho para a conexão compartilhada da thread atual."""
+    return gerenciador.obter_conexao()
+
+
+def transacao(imediata=False):
+    """Atalho para gerenciador.transacao()."""
+    return gerenciador.transacao(imediata=imediata)
+
+
+def banco_ocupado(erro):
+    """Indica se o erro é SQLITE_BUSY/SQLITE_LOCKED (vale a pena tentar de novo)."""
+    mensagem = str(erro).lower()
+    return isinstance(erro, sqlite3.OperationalError) and ("locked" in mensagem or "busy" in mensagem)
+
+
+def repetir_se_ocupado(funcao, *args, tentativas=5, espera_inicial=0.05, **kwargs):
+    """
+    Executa funcao(*args, **kwargs) repetindo-a se o banco estiver ocupado.
+
+    A espera entre tentativas cresce exponencialmente, com um fator aleatório
+    (jitter) para que vários terminais não tentem de novo ao mesmo tempo.
+    A função deve ser uma transação completa (seguro repetir do início).
+    """
+    for tentativa in range(1, tentativas + 1):
+        try:
+            return funcao(*args, **kwargs)
+        except sqlite3.OperationalError as e:
+            if not banco_ocupado(e) or tentativa == tentativas:
+                raise
+            espera = espera_inicial * (2 ** (tentativa - 1)) * random.uniform(0.5, 1.5)
+            logging.warning(f"Banco ocupado ({e}); tentativa {tentativa}/{tentativas}, nova tentativa em {espera:.3f}s.")
+            time.sleep(espera)
+
+
+def fechar_conexoes():
+    """Atalho para gerenciador.fechar_todas()."""
+    gerenciador.fechar_todas()
+
+
+def fechar_conexao_da_thread():
+    """Atalho para gerenciador.fechar_conexao_da_thread()."""
+    gerenciador.fechar_conexao_da_thread()
+
+
+def configurar_banco(db_file):
+    """Aponta as conexões compartilhadas para outro arquivo (fecha as abertas)."""
+    gerenciador.fechar_todas()
+    gerenciador.db_file = db_file
+
+
+# --- Resumos de Vendas ---
+# Recalculam do zero as tabelas de resumo (mantidas incrementalmente pelos
+# triggers da migração 6). Usados na própria migração e em reconstruir_resumos().
+SQL_RECONSTRUIR_RESUMOS = [
+    "DELETE FROM resumo_vendas_dia;",
+    "DELETE FROM resumo_vendas_produto;",
+    "DELETE FROM resumo_vendas_cliente;",
+    """
+    INSERT INTO resumo_vendas_dia (data, pedidos, faturamento)
+    SELECT data, COUNT(*), SUM(total) FROM pedidos GROUP BY data;
+    """,
+    """
+    INSERT INTO resumo_vendas_produto (produto_nome, quantidade, faturamento)
+    SELECT produto_nome, SUM(quantidade), SUM(quantidade * preco_unit) FROM itens_pedido GROUP BY produto_nome;
+    """,
+    """
+    INSERT INTO resumo_vendas_cliente (cliente_id, pedidos, faturamento)
+    SELECT cliente_id, COUNT(*), SUM(total) FROM pedidos GROUP BY cliente_id;
+    """,
+]
+
+# --- Migrações de Esquema ---
+# Cada migração é (versão, descrição, [comandos SQL]). A versão aplicada fica
+# gravada em PRAGMA user_version, então migrações já aplicadas não rodam de novo.
+# Novas migrações devem ser sempre adicionadas ao FINAL da lista.
+MIGRACOES = [
+    (1, "Esquema base (clientes, produtos, pedidos, itens_pedido)", [
+        """
+        CREATE TABLE IF NOT EXISTS clientes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            email TEXT UNIQUE,
+            telefone TEXT
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS produtos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT UNIQUE NOT NULL,
+            preco REAL NOT NULL,
+            estoque INTEGER NOT NULL DEFAULT 0
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS pedidos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cliente_id INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            total REAL NOT NULL,
+            FOREIGN KEY (cliente_id) REFERENCES clientes (id) ON DELETE CASCADE
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS itens_pedido (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pedido_id INTEGER NOT NULL,
+            produto_id INTEGER,
+            produto_nome TEXT NOT NULL,
+            quantidade INTEGER NOT NULL,
+            preco_unit REAL NOT NULL,
+            FOREIGN KEY (pedido_id) REFERENCES pedidos (id) ON DELETE CASCADE,
+            FOREIGN KEY (produto_id) REFERENCES produtos (id) ON DELETE SET NULL
+        );
+        """,
+    ]),
+    (2, "Índices dos caminhos quentes (listagem, detalhes e cascatas)", [
+        # Listagem de pedidos: ORDER BY p.data DESC, p.id DESC
+        "CREATE INDEX IF NOT EXISTS idx_pedidos_data_id ON pedidos (data, id);",
+        # ON DELETE CASCADE a partir de clientes
+        "CREATE INDEX IF NOT EXISTS idx_pedidos_cliente_id ON pedidos (cliente_id);",
+        # DetalhesPedidoForm (WHERE pedido_id = ?) e cascata a partir de pedidos
+        "CREATE INDEX IF NOT EXISTS idx_itens_pedido_pedido_id ON itens_pedido (pedido_id);",
+        # ON DELETE SET NULL a partir de produtos
+        "CREATE INDEX IF NOT EXISTS idx_itens_pedido_produto_id ON itens_pedido (produto_id);",
+    ]),
+    (3, "Índices de texto completo (FTS5) para busca de clientes e produtos", [
+        # Tabelas de conteúdo externo: o texto fica só em clientes/produtos.
+        # remove_diacritics=2 torna a busca insensível a acentos; prefix acelera buscas "abc*".
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS clientes_fts USING fts5(
+            nome, email,
+            content='clientes', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        );
+        """,
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS produtos_fts USING fts5(
+            nome,
+            content='produtos', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        );
+        """,
+        # Triggers mantêm os índices sincronizados com as tabelas de origem
+        """
+        CREATE TRIGGER IF NOT EXISTS clientes_fts_ai AFTER INSERT ON clientes BEGIN
+            INSERT INTO clientes_fts (rowid, nome, email) VALUES (new.id, new.nome, new.email);
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS clientes_fts_ad AFTER DELETE ON clientes BEGIN
+            INSERT INTO clientes_fts (clientes_fts, rowid, nome, email) VALUES ('delete', old.id, old.nome, old.email);
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS clientes_fts_au AFTER UPDATE OF nome, email ON clientes BEGIN
+            INSERT INTO clientes_fts (clientes_fts, rowid, nome, email) VALUES ('delete', old.id, old.nome, old.email);
+            INSERT INTO clientes_fts (rowid, nome, email) VALUES (new.id, new.nome, new.email);
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS produtos_fts_ai AFTER INSERT ON produtos BEGIN
+            INSERT INTO produtos_fts (rowid, nome) VALUES (new.id, new.nome);
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS produtos_fts_ad AFTER DELETE ON produtos BEGIN
+            INSERT INTO produtos_fts (produtos_fts, rowid, nome) VALUES ('delete', old.id, old.nome);
+        END;
+        """,
+        # Só o nome é indexado: baixas de estoque não tocam no índice de texto
+        """
+        CREATE TRIGGER IF NOT EXISTS produtos_fts_au AFTER UPDATE OF nome ON produtos BEGIN
+            INSERT INTO produtos_fts (produtos_fts, rowid, nome) VALUES ('delete', old.id, old.nome);
+            INSERT INTO produtos_fts (rowid, nome) VALUES (new.id, new.nome);
+        END;
+        """,
+        # Indexa os registros já existentes
+        "INSERT INTO clientes_fts (clientes_fts) VALUES ('rebuild');",
+        "INSERT INTO produtos_fts (produtos_fts) VALUES ('rebuild');",
+    ]),
+    (4, "Contadores de alteração por tabela (recarga das abas só quando necessário)", [
+        """
+        CREATE TABLE IF NOT EXISTS contadores_alteracao (
+            tabela TEXT PRIMARY KEY,
+            versao INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID;
+        """,
+        "INSERT OR IGNORE INTO contadores_alteracao (tabela) VALUES ('clientes'), ('produtos'), ('pedidos');",
+        """
+        CREATE TRIGGER IF NOT EXISTS clientes_contador_ai AFTER INSERT ON clientes BEGIN
+            UPDATE contadores_alteracao SET versao = versao + 1 WHERE tabela = 'clientes';
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS clientes_contador_au AFTER UPDATE ON clientes BEGIN
+            UPDATE contadores_alteracao SET versao = versao + 1 WHERE tabela = 'clientes';
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS clientes_contador_ad AFTER DELETE ON clientes BEGIN
+            UPDATE contadores_alteracao SET versao = versao + 1 WHERE tabela = 'clientes';
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS produtos_contador_ai AFTER INSERT ON produtos BEGIN
+            UPDATE contadores_alteracao SET versao = versao + 1 WHERE tabela = 'produtos';
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS produtos_contador_au AFTER UPDATE ON produtos BEGIN
+            UPDATE contadores_alteracao SET versao = versao + 1 WHERE tabela = 'produtos';
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS produtos_contador_ad AFTER DELETE ON produtos BEGIN
+            UPDATE contadores_alteracao SET versao = versao + 1 WHERE tabela = 'produtos';
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS pedidos_contador_ai AFTER INSERT ON pedidos BEGIN
+            UPDATE contadores_alteracao SET versao = versao + 1 WHERE tabela = 'pedidos';
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS pedidos_contador_au AFTER UPDATE ON pedidos BEGIN
+            UPDATE contadores_alteracao SET versao = versao + 1 WHERE tabela = 'pedidos';
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS pedidos_contador_ad AFTER DELETE ON pedidos BEGIN
+            UPDATE contadores_alteracao SET versao = versao + 1 WHERE tabela = 'pedidos';
+        END;
+        """,
+    ]),
+    (5, "Código SKU/código de barras dos produtos (leitura por scanner no pedido)", [
+        "ALTER TABLE produtos ADD COLUMN sku TEXT;",
+        # UNIQUE permite vários NULL: produtos sem código continuam válidos
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_produtos_sku ON produtos (sku);",
+    ]),
+    (6, "Tabelas de resumo de vendas (aba Relatórios), mantidas por triggers", [
+        """
+        CREATE TABLE IF NOT EXISTS resumo_vendas_dia (
+            data TEXT PRIMARY KEY,
+            pedidos INTEGER NOT NULL DEFAULT 0,
+            faturamento REAL NOT NULL DEFAULT 0
+        ) WITHOUT ROWID;
+        """,
+        # Por nome gravado no item: inclui itens customizados e produtos já excluídos
+        """
+        CREATE TABLE IF NOT EXISTS resumo_vendas_produto (
+            produto_nome TEXT PRIMARY KEY,
+            quantidade INTEGER NOT NULL DEFAULT 0,
+            faturamento REAL NOT NULL DEFAULT 0
+        ) WITHOUT ROWID;
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS resumo_vendas_cliente (
+            cliente_id INTEGER PRIMARY KEY,
+            pedidos INTEGER NOT NULL DEFAULT 0,
+            faturamento REAL NOT NULL DEFAULT 0
+        );
+        """,
+        # Rankings (ORDER BY faturamento DESC LIMIT n) lidos direto do índice
+        "CREATE INDEX IF NOT EXISTS idx_resumo_vendas_produto_faturamento ON resumo_vendas_produto (faturamento);",
+        "CREATE INDEX IF NOT EXISTS idx_resumo_vendas_cliente_faturamento ON resumo_vendas_cliente (faturamento);",
+        # Pedidos: faturamento por dia e por cliente
+        """
+        CREATE TRIGGER IF NOT EXISTS pedidos_resumo_ai AFTER INSERT ON pedidos BEGIN
+            INSERT INTO resumo_vendas_dia (data, pedidos, faturamento) VALUES (new.data, 1, new.total)
+                ON CONFLICT (data) DO UPDATE SET pedidos = pedidos + 1, faturamento = faturamento + new.total;
+            INSERT INTO resumo_vendas_cliente (cliente_id, pedidos, faturamento) VALUES (new.cliente_id, 1, new.total)
+                ON CONFLICT (cliente_id) DO UPDATE SET pedidos = pedidos + 1, faturamento = faturamento + new.total;
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS pedidos_resumo_ad AFTER DELETE ON pedidos BEGIN
+            UPDATE resumo_vendas_dia SET pedidos = pedidos - 1, faturamento = faturamento - old.total
+                WHERE data = old.data;
+            DELETE FROM resumo_vendas_dia WHERE data = old.data AND pedidos <= 0;
+            UPDATE resumo_vendas_cliente SET pedidos = pedidos - 1, faturamento = faturamento - old.total
+                WHERE cliente_id = old.cliente_id;
+            DELETE FROM resumo_vendas_cliente WHERE cliente_id = old.cliente_id AND pedidos <= 0;
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS pedidos_resumo_au AFTER UPDATE OF data, total, cliente_id ON pedidos BEGIN
+            UPDATE resumo_vendas_dia SET pedidos = pedidos - 1, faturamento = faturamento - old.total
+                WHERE data = old.data;
+            DELETE FROM resumo_vendas_dia WHERE data = old.data AND pedidos <= 0;
+            INSERT INTO resumo_vendas_dia (data, pedidos, faturamento) VALUES (new.data, 1, new.total)
+                ON CONFLICT (data) DO UPDATE SET pedidos = pedidos + 1, faturamento = faturamento + new.total;
+            UPDATE resumo_vendas_cliente SET pedidos = pedidos - 1, faturamento = faturamento - old.total
+                WHERE cliente_id = old.cliente_id;
+            DELETE FROM resumo_vendas_cliente WHERE cliente_id = old.cliente_id AND pedidos <= 0;
+            INSERT INTO resumo_vendas_cliente (cliente_id, pedidos, faturamento) VALUES (new.cliente_id, 1, new.total)
+                ON CONFLICT (cliente_id) DO UPDATE SET pedidos = pedidos + 1, faturamento = faturamento + new.total;
+        END;
+        """,
+        # Itens: quantidade e faturamento por produto
+        """
+        CREATE TRIGGER IF NOT EXISTS itens_pedido_resumo_ai AFTER INSERT ON itens_pedido BEGIN
+            INSERT INTO resumo_vendas_produto (produto_nome, quantidade, faturamento)
+                VALUES (new.produto_nome, new.quantidade, new.quantidade * new.preco_unit)
+                ON CONFLICT (produto_nome) DO UPDATE SET quantidade = quantidade + new.quantidade,
+                    faturamento = faturamento + new.quantidade * new.preco_unit;
+        END;
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS itens_pedido_resumo_ad AFTER DELETE ON itens_pedido BEGIN
+            UPDATE resumo_vendas_produto SET quantidade = quantidade - old.quantidade,
+                faturamento = faturamento - old.quantidade * old.preco_unit
+                WHERE produto_nome = old.produto_nome;
+        END;
+        """,
+        # ON DELETE SET NULL (exclusão do produto) só muda produto_id e não dispara este trigger
+        """
+        CREATE TRIGGER IF NOT EXISTS itens_pedido_resumo_au
+        AFTER UPDATE OF produto_nome, quantidade, preco_unit ON itens_pedido BEGIN
+            UPDATE resumo_vendas_produto SET quantidade = quantidade - old.quantidade,
+                faturamento = faturamento - old.quantidade * old.preco_unit
+                WHERE produto_nome = old.produto_nome;
+            INSERT INTO resumo_vendas_produto (produto_nome, quantidade, faturamento)
+                VALUES (new.produto_nome, new.quantidade, new.quantidade * new.preco_unit)
+                ON CONFLICT (produto_nome) DO UPDATE SET quantidade = quantidade + new.quantidade,
+                    faturamento = faturamento + new.quantidade * new.preco_unit;
+        END;
+        """,
+        # Preenche os resumos com o histórico já existente
+        *SQL_RECONSTRUIR_RESUMOS,
+    ]),
+    (7, "Referência externa dos pedidos (ingestão e API não gravam o mesmo pedido duas vezes)", [
+        "ALTER TABLE pedidos ADD COLUMN referencia TEXT;",
+        # UNIQUE permite vários NULL: pedidos feitos na janela não têm referência
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_pedidos_referencia ON pedidos (referencia);",
+    ]),
+]
+
+VERSAO_ESQUEMA = MIGRACOES[-1][0]
+
+
+def versao_esquema(conn):
+    """Retorna a versão de esquema gravada no arquivo (PRAGMA user_version)."""
+    return conn.execute("PRAGMA user_version;").fetchone()[0]
+
+
+def aplicar_migracoes(conn):
+    """
+    Aplica, em ordem, as migrações ainda pendentes. Cada migração roda em sua
+    própria transação junto com a atualização de user_version.
+
+    Outro terminal pode estar migrando o mesmo arquivo ao mesmo tempo: a
+    versão é relida depois do BEGIN IMMEDIATE (que espera a escrita do outro
+    terminal terminar) e as migrações que ele já aplicou são puladas.
+
+    Retorna a quantidade de migrações aplicadas (0 se o esquema já está atual).
+    """
+    versao_atual = versao_esquema(conn)
+    pendentes = [m for m in MIGRACOES if m[0] > versao_atual]
+    if not pendentes:
+        return 0
+
+    aplicadas = 0
+    for versao, descricao, comandos in pendentes:
+        conn.execute("BEGIN IMMEDIATE")
+        if versao_esquema(conn) >= versao:
+            conn.rollback()
+            continue
+        try:
+            for comando in comandos:
+                conn.execute(comando)
+            # PRAGMA não aceita parâmetros; versao é sempre um int da lista MIGRACOES
+            conn.execute(f"PRAGMA user_version = {int(versao)};")
+        except Error:
+            conn.rollback()
+            raise
+        conn.commit()
+        aplicadas += 1
+        logging.info(f"Migração {versao} aplicada: {descricao}")
+
+    if aplicadas:
+        # Atualiza as estatísticas do planejador para os novos índices
+        conn.execute("ANALYZE;")
+        conn.commit()
+    return aplicadas
+
+
+def reconstruir_resumos():
+    """
+    Recalcula do zero as tabelas de resumo de vendas (ex: após importação
+    direta no arquivo ou para eliminar resíduos de ponto flutuante).
+    """
+    with transacao(imediata=True) as conn:
+        for comando in SQL_RECONSTRUIR_RESUMOS:
+            conn.execute(comando)
+    logging.info("Resumos de vendas reconstruídos.")
+
+
+def ler_contadores_alteracao():
+    """Retorna {tabela: versao}; a versão muda a cada INSERT/UPDATE/DELETE na tabela."""
+    linhas = executar_comando("SELECT tabela, versao FROM contadores_alteracao", fetchall=True)
+    return dict(linhas) if linhas else {}
+
+
 def inicializar_db():
-    """Cria as tabelas do esquema, incluindo a nova tabela 'produtos'."""
-    conn = criar_conexao()
+    """Cria/atualiza o esquema do banco aplicando apenas as migrações pendentes."""
+    conn = obter_conexao()
     if conn is not None:
         try:
-            cursor = conn.cursor()
-
-            # Garante que chaves estrangeiras estão ligadas
-            cursor.execute("PRAGMA foreign_keys = ON;")
-
-            # Tabela CLIENTES
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS clientes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome TEXT NOT NULL,
-                    email TEXT UNIQUE,
-                    telefone TEXT
-                );
-            """)
-
-            # Tabela PRODUTOS
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS produtos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome TEXT UNIQUE NOT NULL,
-                    preco REAL NOT NULL,
-                    estoque INTEGER NOT NULL DEFAULT 0
-                );
-            """)
-
-            # Tabela PEDIDOS
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS pedidos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    cliente_id INTEGER NOT NULL,
-                    data TEXT NOT NULL,
-                    total REAL NOT NULL,
-                    FOREIGN KEY (cliente_id) REFERENCES clientes (id) ON DELETE CASCADE
-                );
-            """)
-
-            # Tabela ITENS_PEDIDO
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS itens_pedido (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    pedido_id INTEGER NOT NULL,
-                    produto_id INTEGER,
-                    produto_nome TEXT NOT NULL,
-                    quantidade INTEGER NOT NULL,
-                    preco_unit REAL NOT NULL,
-                    FOREIGN KEY (pedido_id) REFERENCES pedidos (id) ON DELETE CASCADE,
-                    FOREIGN KEY (produto_id) REFERENCES produtos (id) ON DELETE SET NULL
-                );
-            """)
-            conn.commit()
-            logging.info("Banco de dados inicializado com sucesso.")
+            if versao_esquema(conn) >= VERSAO_ESQUEMA:
+                logging.info("Banco de dados já está na versão atual do esquema.")
+                return
+            aplicadas = aplicar_migracoes(conn)
+            logging.info(f"Banco de dados inicializado com sucesso ({aplicadas} migração(ões) aplicada(s)).")
         except Error as e:
-            logging.error(f"Erro ao criar tabelas: {e}")
+            logging.error(f"Erro ao migrar o esquema: {e}")
             # Adicione esta linha para ver o erro no console
             print(f"ERRO CRÍTICO NA CRIAÇÃO DE TABELAS: {e}")
-        finally:
-            conn.close()
     else:
         logging.error("Não foi possível estabelecer a conexão para inicialização do DB.")
 
 
-# ... (executar_comando permanece o mesmo)
-
 def executar_comando(sql, parametros=(), fetchone=False, fetchall=False, commit=True):
     """
     Executa comandos SQL (SELECT, INSERT, UPDATE, DELETE) parametrizados.
 
+    Usa a conexão compartilhada da thread atual (ver GerenciadorConexoes).
+    Se chamado dentro de transacao(), participa dela sem fazer commit/rollback.
+    Com a instrumentação ativa (--instrumentar-sql), tempo e contagem de cada
+    comando entram em utils.instrumentacao_sql (junto com o log de consultas lentas).
+
     Retorna o resultado da consulta (se fetchone/fetchall for True),
     ou o ID da última linha inserida (se for INSERT), ou None.
     """
-    conn = criar_conexao()
+    conn = obter_conexao()
     resultado = None
     if conn is None:
         return None
 
+    # Dentro de uma transação externa o controle de commit/rollback é dela
+    transacao_externa = conn.in_transaction
+    gerencia_transacao = commit and not transacao_externa
+
     try:
         cursor = conn.cursor()
         cursor.execute(sql, parametros)
@@ -113,7 +650,8 @@ def executar_comando(sql, parametros=(), fetchone=False, fetchall=False, commit=
         elif fetchall:
             resultado = cursor.fetchall()
         elif commit:
-            conn.commit()
+            if gerencia_transacao:
+                conn.commit()
             if sql.strip().upper().startswith("INSERT"):
                 resultado = cursor.lastrowid
 
@@ -121,11 +659,13 @@ def executar_comando(sql, parametros=(), fetchone=False, fetchall=False, commit=
         # Tratamento específico para erros de integridade (ex: UNIQUE)
         logging.warning(f"Erro de Integridade no DB: {e}. SQL: {sql}")
         resultado = "IntegrityError"
-        if commit: conn.rollback()
+        if gerencia_transacao: conn.rollback()
     except Error as e:
         logging.error(f"Erro ao executar comando SQL: {e}. SQL: {sql} - Params: {parametros}")
-        if commit: conn.rollback()
+        if gerencia_transacao: conn.rollback()
     finally:
-        if conn:
-            conn.close()
+        # A conexão é reaproveitada: não pode ficar com transação pendente
+        # (antes o close() descartava escritas sem commit).
+        if not transacao_externa and conn.in_transaction:
+            conn.rollback()
     return resultado
\ No newline at end of file
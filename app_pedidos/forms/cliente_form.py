@@ -2,6 +2,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from db import executar_comando
+from utils.cache_referencia import cache_referencia
 from utils.validations import validar_nome, validar_email, validar_telefone
 
 
@@ -140,8 +141,14 @@ class ClienteForm(tk.Toplevel):
                     messagebox.showinfo("Sucesso", "Cliente atualizado!")
 
             self.dados_salvos = True
+            cache_referencia.invalidar()
             if self.recarregar_callback:
-                self.recarregar_callback()
+                # Envia a linha salva para a lista atualizar só este registro
+                cliente_id = self.cliente_id if self.cliente_id is not None else resultado
+                if cliente_id is not None:
+                    self.recarregar_callback((cliente_id, nome, email or None, telefone or None))
+                else:
+                    self.recarregar_callback()
             self.destroy()
 
         except Exception as e:
@@ -1,7 +1,7 @@
 # forms/detalhes_pedido_form.py
 import tkinter as tk
 from tkinter import ttk, messagebox
-from db import executar_comando
+from utils.cache_detalhes import cache_detalhes
 import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -17,26 +17,21 @@ class DetalhesPedidoForm(tk.Toplevel):
         self.title(f"Detalhes do Pedido #{pedido_id}")
         self.geometry("600x450")
 
-        # Dados do pedido principal (para título)
-        self.dados_pedido = self._carregar_dados_principais()
+        # Cabeçalho e itens em uma única consulta (ou direto do cache, se já aberto/pré-carregado)
+        try:
+            detalhes = cache_detalhes.obter(pedido_id)
+        except Exception as e:
+            logging.error(f"Erro ao carregar pedido {pedido_id}: {e}")
+            detalhes = None
 
-        if not self.dados_pedido:
+        if not detalhes:
             messagebox.showerror("Erro", "Pedido não encontrado.")
             self.destroy()
             return
 
+        self.dados_pedido, self.itens = detalhes
         self.setup_ui()
-        self._carregar_itens_pedido()
-
-    def _carregar_dados_principais(self):
-        """Busca ID, Cliente e Total para exibir no cabeçalho."""
-        sql = """
-            SELECT p.id, c.nome, p.data, p.total
-            FROM pedidos p
-            INNER JOIN clientes c ON p.cliente_id = c.id
-            WHERE p.id = ?
-        """
-        return executar_comando(sql, (self.pedido_id,), fetchone=True)
+        self._exibir_itens_pedido()
 
     def setup_ui(self):
         frame = ttk.Frame(self, padding="15")
@@ -77,28 +72,10 @@ class DetalhesPedidoForm(tk.Toplevel):
 
         ttk.Button(frame, text="Fechar", command=self.destroy).pack(pady=10)
 
-    def _carregar_itens_pedido(self):
-        """Busca e exibe os itens associados ao ID do pedido."""
-        sql = """
-            SELECT 
-                produto_nome, 
-                quantidade, 
-                preco_unit 
-            FROM itens_pedido 
-            WHERE pedido_id = ?
-        """
-
-        try:
-            itens = executar_comando(sql, (self.pedido_id,), fetchall=True)
-            if itens:
-                for nome, qtd, preco_unit in itens:
-                    subtotal = qtd * preco_unit
-
-                    self.tree_itens.insert("", "end",
-                                           values=(nome, qtd, f"{preco_unit:.2f}", f"{subtotal:.2f}"))
-            else:
-                self.tree_itens.insert("", "end", values=("Nenhum item encontrado", "", "", ""), tags=('empty',))
-
-        except Exception as e:
-            logging.error(f"Erro ao carregar itens do pedido {self.pedido_id}: {e}")
-            messagebox.showerror("Erro de DB", f"Falha ao carregar itens: {e}")
\ No newline at end of file
+    def _exibir_itens_pedido(self):
+        """Exibe os itens do pedido (valores já formatados pelo cache)."""
+        if self.itens:
+            for valores in self.itens:
+                self.tree_itens.insert("", "end", values=valores)
+        else:
+            self.tree_itens.insert("", "end", values=("Nenhum item encontrado", "", "", ""), tags=('empty',))
\ No newline at end of file
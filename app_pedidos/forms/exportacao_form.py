@@ -0,0 +1,179 @@
+# forms/exportacao_form.py
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from datetime import date
+import logging
+import threading
+from db import fechar_conexao_da_thread
+from utils.data_export import exportar_pedidos, listar_pedidos, ExportacaoCancelada, FORMATOS_EXPORTACAO
+
+
+class ExportacaoForm(tk.Toplevel):
+    """Exporta os pedidos de um período (e, opcionalmente, de alguns clientes) em segundo plano."""
+
+    INTERVALO_PROGRESSO_MS = 100
+    # PDFs são gerados em paralelo por utils.pdf_lote (importado só quando usados)
+    PDF_POR_PEDIDO = "pdf (um por pedido)"
+    PDF_RELATORIO = "pdf (relatório único)"
+    FORMATOS = FORMATOS_EXPORTACAO + (PDF_POR_PEDIDO, PDF_RELATORIO)
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.transient(parent)
+        self.parent = parent
+        self.title("Exportar Pedidos")
+        self.protocol("WM_DELETE_WINDOW", self._on_fechar)
+
+        self._thread = None
+        self._cancelado = threading.Event()
+        self._progresso = (0, 0)  # (pedidos exportados, total), escrito pela thread da exportação
+        self._resultado = None
+
+        self.setup_ui()
+
+    def setup_ui(self):
+        frame = ttk.Frame(self, padding="15")
+        frame.pack(fill="both", expand=True)
+
+        hoje = date.today()
+        self.var_data_inicio = tk.StringVar(value=hoje.replace(day=1).strftime("%Y-%m-%d"))
+        self.var_data_fim = tk.StringVar(value=hoje.strftime("%Y-%m-%d"))
+        self.var_clientes = tk.StringVar()
+        self.var_formato = tk.StringVar(value=FORMATOS_EXPORTACAO[0])
+
+        ttk.Label(frame, text="Data inicial:").grid(row=0, column=0, sticky="w", pady=5, padx=5)
+        ttk.Entry(frame, textvariable=self.var_data_inicio, width=15).grid(row=0, column=1, sticky="w", pady=5, padx=5)
+
+        ttk.Label(frame, text="Data final:").grid(row=1, column=0, sticky="w", pady=5, padx=5)
+        ttk.Entry(frame, textvariable=self.var_data_fim, width=15).grid(row=1, column=1, sticky="w", pady=5, padx=5)
+
+        ttk.Label(frame, text="IDs de clientes (opcional):").grid(row=2, column=0, sticky="w", pady=5, padx=5)
+        ttk.Entry(frame, textvariable=self.var_clientes, width=30).grid(row=2, column=1, sticky="we", pady=5, padx=5)
+
+        ttk.Label(frame, text="Formato:").grid(row=3, column=0, sticky="w", pady=5, padx=5)
+        ttk.Combobox(frame, textvariable=self.var_formato, values=self.FORMATOS, state="readonly",
+                     width=20).grid(row=3, column=1, sticky="w", pady=5, padx=5)
+
+        self.progresso = ttk.Progressbar(frame, mode="determinate", length=300)
+        self.progresso.grid(row=4, column=0, columnspan=2, sticky="we", pady=(15, 5), padx=5)
+        self.var_status = tk.StringVar(value="")
+        ttk.Label(frame, textvariable=self.var_status).grid(row=5, column=0, columnspan=2, sticky="w", padx=5)
+
+        button_frame = ttk.Frame(frame)
+        button_frame.grid(row=6, column=0, columnspan=2, pady=15)
+        self.btn_exportar = ttk.Button(button_frame, text="Exportar", command=self._exportar, style='Accent.TButton')
+        self.btn_exportar.pack(side="left", padx=10)
+        self.btn_cancelar = ttk.Button(button_frame, text="Fechar", command=self._on_fechar)
+        self.btn_cancelar.pack(side="left", padx=10)
+
+    def _validar(self):
+        """Retorna (data_inicio, data_fim, cliente_ids) ou None se algo for inválido."""
+        data_inicio, data_fim = self.var_data_inicio.get().strip(), self.var_data_fim.get().strip()
+        try:
+            for data in (data_inicio, data_fim):
+                if data:
+                    date.fromisoformat(data)
+        except ValueError:
+            messagebox.showwarning("Validação", "As datas devem estar no formato AAAA-MM-DD.", parent=self)
+            return None
+
+        try:
+            cliente_ids = [int(parte) for parte in self.var_clientes.get().replace(";", ",").split(",")
+                           if parte.strip()]
+        except ValueError:
+            messagebox.showwarning("Validação", "Informe os IDs de clientes separados por vírgula.", parent=self)
+            return None
+
+        return data_inicio or None, data_fim or None, cliente_ids
+
+    def _exportar(self):
+        filtros = self._validar()
+        if filtros is None:
+            return
+
+        formato = self.var_formato.get()
+        if formato == self.PDF_POR_PEDIDO:
+            caminho = filedialog.askdirectory(parent=self, title="Pasta para os PDFs dos pedidos")
+        else:
+            extensao = "pdf" if formato == self.PDF_RELATORIO else formato
+            caminho = filedialog.asksaveasfilename(
+                parent=self,
+                defaultextension=f".{extensao}",
+                filetypes=[(f"{extensao.upper()} files", f"*.{extensao}")],
+                initialfile=f"pedidos_{filtros[0] or 'inicio'}_{filtros[1] or 'fim'}.{extensao}"
+            )
+        if not caminho:
+            return
+
+        self._cancelado.clear()
+        self._progresso = (0, 0)
+        self._resultado = None
+        self.btn_exportar.state(["disabled"])
+        self.btn_cancelar.config(text="Cancelar")
+        self.var_status.set("Exportando...")
+
+        # Thread própria (não o ExecutorDB): a exportação pode levar minutos e não deve
+        # ocupar as threads usadas pelas listas e buscas
+        self._thread = threading.Thread(target=self._executar, args=(caminho, formato) + filtros, daemon=True,
+                                        name="exportacao-pedidos")
+        self._thread.start()
+        self.after(self.INTERVALO_PROGRESSO_MS, self._acompanhar)
+
+    def _executar(self, caminho, formato, data_inicio, data_fim, cliente_ids):
+        """Roda fora da thread do Tk: só escreve em _progresso/_resultado."""
+        def ao_progresso(pedidos, total):
+            self._progresso = (pedidos, total)
+
+        try:
+            if formato in (self.PDF_POR_PEDIDO, self.PDF_RELATORIO):
+                from utils.pdf_lote import gerar_pdfs_pedidos, gerar_relatorio_pdf
+                gerar = gerar_pdfs_pedidos if formato == self.PDF_POR_PEDIDO else gerar_relatorio_pdf
+                pedidos, paginas = gerar(listar_pedidos(data_inicio, data_fim, cliente_ids), caminho,
+                                         ao_progresso=ao_progresso, cancelado=self._cancelado)
+                resultado = (pedidos, f"{paginas} páginas")
+            else:
+                pedidos, linhas = exportar_pedidos(caminho, formato, data_inicio, data_fim, cliente_ids,
+                                                   ao_progresso=ao_progresso, cancelado=self._cancelado)
+                resultado = (pedidos, f"{linhas} linhas")
+            self._resultado = ("ok", resultado, caminho)
+        except ExportacaoCancelada:
+            self._resultado = ("cancelado",)
+        except Exception as e:
+            logging.error(f"Erro ao exportar pedidos: {e}")
+            self._resultado = ("erro", e)
+        finally:
+            # A thread termina aqui: não deixa a conexão dela aberta até o fim do app
+            fechar_conexao_da_thread()
+
+    def _acompanhar(self):
+        """Atualiza a barra de progresso (thread do Tk) até a exportação terminar."""
+        if not self.winfo_exists():
+            return
+
+        pedidos, total = self._progresso
+        self.progresso.config(maximum=max(total, 1), value=pedidos)
+        if self._resultado is None:
+            self.var_status.set(f"Exportando... {pedidos} de {total} pedidos")
+            self.after(self.INTERVALO_PROGRESSO_MS, self._acompanhar)
+            return
+
+        self._thread = None
+        self.btn_exportar.state(["!disabled"])
+        self.btn_cancelar.config(text="Fechar")
+        if self._resultado[0] == "ok":
+            (pedidos, volume), caminho = self._resultado[1], self._resultado[2]
+            self.var_status.set(f"Concluído: {pedidos} pedidos, {volume}.")
+            messagebox.showinfo("Sucesso", f"Pedidos exportados em:\n{caminho}", parent=self)
+        elif self._resultado[0] == "cancelado":
+            self.var_status.set("Exportação cancelada.")
+        else:
+            self.var_status.set("Falha na exportação.")
+            messagebox.showerror("Erro", f"Falha ao exportar pedidos: {self._resultado[1]}", parent=self)
+
+    def _on_fechar(self):
+        """Com exportação em andamento, o botão cancela; senão, fecha a janela."""
+        if self._thread is not None:
+            self._cancelado.set()
+            self.var_status.set("Cancelando...")
+            return
+        self.destroy()
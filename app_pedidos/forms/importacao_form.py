@@ -0,0 +1,144 @@
+# forms/importacao_form.py
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+import logging
+import os
+import threading
+from db import fechar_conexao_da_thread
+from utils.cache_referencia import cache_referencia
+from utils.data_import import importar_csv, ImportacaoCancelada, COLUNAS_IMPORTACAO, COLUNAS_OBRIGATORIAS
+
+
+class ImportacaoForm(tk.Toplevel):
+    """Importa clientes ou produtos de um CSV em segundo plano (insere ou atualiza)."""
+
+    INTERVALO_PROGRESSO_MS = 100
+
+    def __init__(self, parent, tabela, recarregar_callback=None):
+        super().__init__(parent)
+        self.transient(parent)
+        self.parent = parent
+        self.tabela = tabela
+        self.recarregar_callback = recarregar_callback
+        self.title(f"Importar {tabela.capitalize()}")
+        self.protocol("WM_DELETE_WINDOW", self._on_fechar)
+
+        self._thread = None
+        self._cancelado = threading.Event()
+        self._progresso = (0, 0)  # (bytes lidos, tamanho do arquivo), escrito pela thread da importação
+        self._resultado = None
+
+        self.setup_ui()
+
+    def setup_ui(self):
+        frame = ttk.Frame(self, padding="15")
+        frame.pack(fill="both", expand=True)
+
+        colunas = ", ".join(coluna + ("*" if coluna in COLUNAS_OBRIGATORIAS[self.tabela] else "")
+                            for coluna in COLUNAS_IMPORTACAO[self.tabela])
+        ttk.Label(frame, text=f"Colunas do cabeçalho: {colunas}\n"
+                              "Registros já existentes são atualizados.").grid(row=0, column=0, columnspan=3,
+                                                                               sticky="w", pady=5, padx=5)
+
+        self.var_arquivo = tk.StringVar()
+        ttk.Label(frame, text="Arquivo CSV:").grid(row=1, column=0, sticky="w", pady=5, padx=5)
+        ttk.Entry(frame, textvariable=self.var_arquivo, width=40).grid(row=1, column=1, sticky="we", pady=5, padx=5)
+        ttk.Button(frame, text="Procurar...", command=self._escolher_arquivo).grid(row=1, column=2, pady=5, padx=5)
+
+        self.progresso = ttk.Progressbar(frame, mode="determinate", length=300)
+        self.progresso.grid(row=2, column=0, columnspan=3, sticky="we", pady=(15, 5), padx=5)
+        self.var_status = tk.StringVar(value="")
+        ttk.Label(frame, textvariable=self.var_status).grid(row=3, column=0, columnspan=3, sticky="w", padx=5)
+
+        button_frame = ttk.Frame(frame)
+        button_frame.grid(row=4, column=0, columnspan=3, pady=15)
+        self.btn_importar = ttk.Button(button_frame, text="Importar", command=self._importar, style='Accent.TButton')
+        self.btn_importar.pack(side="left", padx=10)
+        self.btn_cancelar = ttk.Button(button_frame, text="Fechar", command=self._on_fechar)
+        self.btn_cancelar.pack(side="left", padx=10)
+
+    def _escolher_arquivo(self):
+        caminho = filedialog.askopenfilename(parent=self, title=f"CSV de {self.tabela}",
+                                             filetypes=[("CSV files", "*.csv"), ("Todos os arquivos", "*.*")])
+        if caminho:
+            self.var_arquivo.set(caminho)
+
+    def _importar(self):
+        caminho = self.var_arquivo.get().strip()
+        if not os.path.isfile(caminho):
+            messagebox.showwarning("Validação", "Escolha um arquivo CSV existente.", parent=self)
+            return
+
+        self._cancelado.clear()
+        self._progresso = (0, 0)
+        self._resultado = None
+        self.btn_importar.state(["disabled"])
+        self.btn_cancelar.config(text="Cancelar")
+        self.var_status.set("Importando...")
+
+        # Thread própria (não o ExecutorDB), como na exportação: não ocupa as threads das listas e buscas
+        self._thread = threading.Thread(target=self._executar, args=(caminho,), daemon=True,
+                                        name="importacao-csv")
+        self._thread.start()
+        self.after(self.INTERVALO_PROGRESSO_MS, self._acompanhar)
+
+    def _executar(self, caminho):
+        """Roda fora da thread do Tk: só escreve em _progresso/_resultado."""
+        def ao_progresso(lidos, total):
+            self._progresso = (lidos, total)
+
+        try:
+            resultado = importar_csv(self.tabela, caminho, ao_progresso=ao_progresso, cancelado=self._cancelado)
+            self._resultado = ("ok", resultado)
+        except ImportacaoCancelada:
+            self._resultado = ("cancelado",)
+        except Exception as e:
+            logging.error(f"Erro ao importar {self.tabela}: {e}")
+            self._resultado = ("erro", e)
+        finally:
+            # A thread termina aqui: não deixa a conexão dela aberta até o fim do app
+            fechar_conexao_da_thread()
+
+    def _acompanhar(self):
+        """Atualiza a barra de progresso (thread do Tk) até a importação terminar."""
+        if not self.winfo_exists():
+            return
+
+        lidos, total = self._progresso
+        self.progresso.config(maximum=max(total, 1), value=lidos)
+        if self._resultado is None:
+            self.var_status.set(f"Importando... {lidos * 100 // max(total, 1)}% do arquivo")
+            self.after(self.INTERVALO_PROGRESSO_MS, self._acompanhar)
+            return
+
+        self._thread = None
+        self.btn_importar.state(["!disabled"])
+        self.btn_cancelar.config(text="Fechar")
+        if self._resultado[0] != "erro":
+            # Mesmo cancelada, os lotes já gravados ficam no banco
+            cache_referencia.invalidar()
+            if self.recarregar_callback:
+                self.recarregar_callback()
+
+        if self._resultado[0] == "ok":
+            gravadas, rejeitadas, caminho_erros = self._resultado[1]
+            self.var_status.set(f"Concluído: {gravadas} gravados, {rejeitadas} rejeitados.")
+            if caminho_erros:
+                messagebox.showwarning("Importação concluída",
+                                       f"{gravadas} registros gravados.\n{rejeitadas} linhas rejeitadas, "
+                                       f"com o motivo, em:\n{caminho_erros}", parent=self)
+            else:
+                messagebox.showinfo("Sucesso", f"{gravadas} registros importados.", parent=self)
+        elif self._resultado[0] == "cancelado":
+            self.var_status.set("Importação cancelada (os lotes já gravados foram mantidos).")
+        else:
+            self.var_status.set("Falha na importação.")
+            messagebox.showerror("Erro", f"Falha ao importar {self.tabela}: {self._resultado[1]}", parent=self)
+
+    def _on_fechar(self):
+        """Com importação em andamento, o botão cancela; senão, fecha a janela."""
+        if self._thread is not None:
+            self._cancelado.set()
+            self.var_status.set("Cancelando...")
+            return
+        self.destroy()
@@ -1,14 +1,76 @@
 # forms/pedido_form.py (COMPLETO E CORRIGIDO)
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, simpledialog
 from datetime import datetime
 import logging
-from db import criar_conexao, Error, executar_comando  # Importação de Error para tratamento de exceções
+from utils.busca_fts import buscar_clientes, buscar_produtos
+from utils.autocompletar import SeletorAutocompletar
+from utils.tabela_treeview import TabelaTreeview
+from utils.cache_referencia import cache_referencia
+# A gravação não depende do Tk (também é usada pela ingestão de pedidos em lote)
+from utils.servico_pedidos import gravar_pedido
+from utils.validations import validar_data
 
 # Configuração de logging, se não for centralizada no db.py
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
+class LinhasPedido:
+    """
+    Linhas do pedido em edição, com IDs estáveis e total corrente.
+
+    Adicionar, remover e alterar uma linha custa O(1) e devolve apenas a linha
+    afetada, para que a Treeview atualize uma única linha. O mesmo produto
+    (com o mesmo preço) adicionado de novo soma na linha existente.
+    """
+
+    def __init__(self):
+        self._linhas = {}  # {linha_id: [produto_id, produto_nome, qtd, preco_unit]} (ordem de inserção)
+        self._por_chave = {}  # {(produto_id, produto_nome, preco_unit): linha_id}
+        self._proximo_id = 1
+        self.total = 0.0
+
+    def __len__(self):
+        return len(self._linhas)
+
+    @staticmethod
+    def _chave(produto_id, produto_nome, preco_unit):
+        return produto_id, produto_nome, preco_unit
+
+    def linha(self, linha_id):
+        """Retorna (produto_id, produto_nome, qtd, preco_unit) da linha."""
+        return tuple(self._linhas[linha_id])
+
+    def adicionar(self, produto_id, produto_nome, quantidade, preco_unit):
+        """Adiciona (ou soma a uma linha igual) e retorna o ID da linha afetada."""
+        chave = self._chave(produto_id, produto_nome, preco_unit)
+        linha_id = self._por_chave.get(chave)
+        if linha_id is not None:
+            self._linhas[linha_id][2] += quantidade
+        else:
+            linha_id = self._proximo_id
+            self._proximo_id += 1
+            self._linhas[linha_id] = [produto_id, produto_nome, quantidade, preco_unit]
+            self._por_chave[chave] = linha_id
+        self.total += quantidade * preco_unit
+        return linha_id
+
+    def alterar_quantidade(self, linha_id, quantidade):
+        linha = self._linhas[linha_id]
+        self.total += (quantidade - linha[2]) * linha[3]
+        linha[2] = quantidade
+
+    def remover(self, linha_id):
+        produto_id, produto_nome, quantidade, preco_unit = self._linhas.pop(linha_id)
+        del self._por_chave[self._chave(produto_id, produto_nome, preco_unit)]
+        # Sem linhas o total volta a zero exato (evita resíduo de ponto flutuante)
+        self.total = self.total - quantidade * preco_unit if self._linhas else 0.0
+
+    def itens(self):
+        """Lista [(produto_id, produto_nome, qtd, preco_unit)] para gravação."""
+        return [tuple(linha) for linha in self._linhas.values()]
+
+
 class PedidoForm(tk.Toplevel):
     def __init__(self, parent, recarregar_callback=None):
         super().__init__(parent)
@@ -19,18 +81,41 @@ class PedidoForm(tk.Toplevel):
         self.title("Novo Pedido")
         self.protocol("WM_DELETE_WINDOW", self._on_fechar)
 
-        # Dados: (produto_id, produto_nome, qtd, preco_unit)
-        self.itens_pedido = []
-        self.clientes_map = {}  # {nome: id}
-        self.produtos_map = {}  # {nome: (id, preco)}
+        # Linhas: (produto_id, produto_nome, qtd, preco_unit) com IDs estáveis
+        self.linhas = LinhasPedido()
+        self.clientes_map = {}  # {nome: id} (compartilhado com o cache_referencia)
+        self.produtos_map = {}  # {nome: (id, preco)} (compartilhado com o cache_referencia)
+        # Catálogo grande demais para a memória: só os nomes sugeridos pelo FTS são conhecidos
+        self._clientes_resolvidos = {}  # {nome: id}
+        self._produtos_resolvidos = {}  # {nome: (id, preco)}
+        self.dados_referencia = None
         self.dados_salvos = True
 
         self.setup_ui()
         self._carregar_dados_iniciais()
+        self.entry_codigo.focus_set()
 
     def _carregar_dados_iniciais(self):
-        self._carregar_clientes_combobox()
+        # Cache compartilhado: abre com o que já está carregado (sem ir ao DB)
+        # e pede uma recarga em segundo plano, que só lê o banco se clientes
+        # ou produtos mudaram desde a última janela
+        dados = cache_referencia.atual()
+        if dados is not None:
+            self._aplicar_dados_referencia(dados)
+        else:
+            self.var_status_leitura.set("Carregando clientes e produtos...")
+        cache_referencia.atualizar(self.parent.executor_db, ao_concluir=self._aplicar_dados_referencia, widget=self)
+
+    def _aplicar_dados_referencia(self, dados):
+        """Passa a usar os dados do cache (na abertura e após cada recarga)."""
+        if dados is self.dados_referencia:
+            return
+        primeira_carga = self.dados_referencia is None
+        self.dados_referencia = dados
+        self._carregar_clientes_combobox(primeira_carga)
         self._carregar_produtos_combobox()
+        if primeira_carga:
+            self.var_status_leitura.set("")
 
     def setup_ui(self):
         frame = ttk.Frame(self, padding="15")
@@ -42,7 +127,9 @@ class PedidoForm(tk.Toplevel):
 
         ttk.Label(header_frame, text="Cliente:").grid(row=0, column=0, sticky="w", padx=5, pady=5)
         self.var_cliente = tk.StringVar()
-        self.cb_cliente = ttk.Combobox(header_frame, textvariable=self.var_cliente, state="readonly", width=35)
+        # Seletores com sugestões enquanto digita (não listam o catálogo inteiro)
+        self.cb_cliente = SeletorAutocompletar(header_frame, self._sugerir_clientes, textvariable=self.var_cliente,
+                                               width=35)
         self.cb_cliente.grid(row=0, column=1, sticky="we", padx=5, pady=5)
 
         ttk.Label(header_frame, text="Data:").grid(row=0, column=2, sticky="w", padx=15, pady=5)
@@ -55,8 +142,9 @@ class PedidoForm(tk.Toplevel):
 
         ttk.Label(item_input_frame, text="Produto:").grid(row=0, column=0, padx=5)
         self.var_produto_selecionado = tk.StringVar()
-        self.cb_produto = ttk.Combobox(item_input_frame, textvariable=self.var_produto_selecionado, state="readonly",
-                                       width=30)
+        self.cb_produto = SeletorAutocompletar(item_input_frame, self._sugerir_produtos,
+                                               ao_selecionar=lambda nome: self._selecionar_produto(),
+                                               textvariable=self.var_produto_selecionado, width=30)
         self.cb_produto.grid(row=0, column=1, padx=5)
 
         ttk.Label(item_input_frame, text="Qtd:").grid(row=0, column=2, padx=5)
@@ -70,6 +158,17 @@ class PedidoForm(tk.Toplevel):
         ttk.Button(item_input_frame, text="Adicionar Item", command=self._adicionar_item, style='Accent.TButton').grid(
             row=0, column=6, padx=10)
 
+        # Leitura por scanner (teclado): cada código + Enter soma 1 unidade, sem diálogos
+        ttk.Label(item_input_frame, text="Código:").grid(row=1, column=0, padx=5, pady=(8, 0))
+        self.var_codigo = tk.StringVar()
+        self.entry_codigo = ttk.Entry(item_input_frame, textvariable=self.var_codigo, width=30)
+        self.entry_codigo.grid(row=1, column=1, padx=5, pady=(8, 0))
+        self.entry_codigo.bind("<Return>", self._ler_codigo)
+        self.entry_codigo.bind("<KP_Enter>", self._ler_codigo)
+        self.var_status_leitura = tk.StringVar(value="")
+        ttk.Label(item_input_frame, textvariable=self.var_status_leitura).grid(row=1, column=2, columnspan=5,
+                                                                              sticky="w", padx=5, pady=(8, 0))
+
         # Seção de Lista de Itens
         list_frame = ttk.Frame(frame, padding="5")
         list_frame.pack(fill="both", expand=True)
@@ -89,6 +188,7 @@ class PedidoForm(tk.Toplevel):
         self.tree_itens.column("Preço Unit.", width=100, anchor="e")
         self.tree_itens.column("Subtotal", width=120, anchor="e")
         self.tree_itens.pack(side="left", fill="both", expand=True)
+        self.tabela_itens = TabelaTreeview(self.tree_itens)
 
         # Scrollbar
         scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.tree_itens.yview)
@@ -99,6 +199,8 @@ class PedidoForm(tk.Toplevel):
         item_buttons_frame = ttk.Frame(list_frame)
         item_buttons_frame.pack(side="right", fill="y", padx=5)
         ttk.Button(item_buttons_frame, text="Remover Item", command=self._remover_item).pack(fill="x", pady=5)
+        ttk.Button(item_buttons_frame, text="Alterar Qtd", command=self._alterar_quantidade).pack(fill="x", pady=5)
+        self.tree_itens.bind('<Double-1>', lambda e: self._alterar_quantidade())
 
         # Seção de Total
         total_frame = ttk.Frame(frame, padding="10")
@@ -113,40 +215,69 @@ class PedidoForm(tk.Toplevel):
         button_frame = ttk.Frame(frame, padding="10")
         button_frame.pack(fill="x")
 
-        ttk.Button(button_frame, text="Salvar Pedido", command=self._salvar_pedido, style='Accent.TButton').pack(
-            side="left", padx=10)
+        self.btn_salvar = ttk.Button(button_frame, text="Salvar Pedido", command=self._salvar_pedido,
+                                     style='Accent.TButton')
+        self.btn_salvar.pack(side="left", padx=10)
         ttk.Button(button_frame, text="Cancelar", command=self._on_fechar).pack(side="left", padx=10)
+        self.var_status_salvar = tk.StringVar(value="")
+        ttk.Label(button_frame, textvariable=self.var_status_salvar).pack(side="left", padx=10)
+
+    def _carregar_clientes_combobox(self, primeira_carga=True):
+        """Prepara o seletor de clientes."""
+        # Mapas compartilhados com o cache: somente leitura
+        dados = self.dados_referencia
+        self.clientes_map = dados.clientes_por_nome if dados.clientes_completos else self._clientes_resolvidos
+        if not primeira_carga or not dados.clientes_completos:
+            return
+        nomes_clientes = dados.nomes_clientes
 
-    def _carregar_clientes_combobox(self):
-        """Carrega clientes no Combobox."""
-        sql = "SELECT id, nome FROM clientes ORDER BY nome"
-        clientes = executar_comando(sql, fetchall=True)
-        nomes_clientes = []
-        if clientes:
-            for id_c, nome in clientes:
-                self.clientes_map[nome] = id_c
-                nomes_clientes.append(nome)
-
-        self.cb_cliente['values'] = nomes_clientes
         if nomes_clientes:
-            self.cb_cliente.set(nomes_clientes[0])
+            if not self.var_cliente.get():
+                self.cb_cliente.set(nomes_clientes[0])
         else:
             # Não fecha, mas impede a criação do pedido se não houver cliente
             messagebox.showwarning("Aviso", "Nenhum cliente cadastrado. Cadastre um cliente primeiro.")
 
     def _carregar_produtos_combobox(self):
-        """Carrega produtos no Combobox e mapeia ID/Preço."""
-        sql = "SELECT id, nome, preco FROM produtos ORDER BY nome"
-        produtos = executar_comando(sql, fetchall=True)
-        nomes_produtos = []
-        self.produtos_map = {}
-        if produtos:
-            for id_p, nome, preco in produtos:
-                self.produtos_map[nome] = (id_p, preco)
-                nomes_produtos.append(nome)
-
-        self.cb_produto['values'] = nomes_produtos
-        self.cb_produto.bind("<<ComboboxSelected>>", self._selecionar_produto)
+        """Prepara o seletor de produtos e mapeia ID/Preço."""
+        dados = self.dados_referencia
+        self.produtos_map = dados.produtos_por_nome if dados.produtos_completos else self._produtos_resolvidos
+
+    def _sugerir_clientes(self, termo, limite, entregar):
+        dados = self.dados_referencia
+        indice = dados.indice_clientes if dados is not None else None
+        self._sugerir(indice, buscar_clientes, "clientes", termo, limite, entregar,
+                      self._clientes_resolvidos, lambda linha: linha[0])
+
+    def _sugerir_produtos(self, termo, limite, entregar):
+        dados = self.dados_referencia
+        indice = dados.indice_produtos if dados is not None else None
+        self._sugerir(indice, buscar_produtos, "produtos", termo, limite, entregar,
+                      self._produtos_resolvidos, lambda linha: (linha[0], linha[2]))
+
+    def _sugerir(self, indice, buscar_fts, tabela, termo, limite, entregar, resolvidos, valor):
+        """
+        Sugestões para os seletores: índice de prefixos em memória (busca
+        binária, sem ir ao DB) ou, enquanto ele não fica pronto e para
+        catálogos grandes demais, o índice FTS do banco consultado em segundo
+        plano.
+        """
+        if indice is not None:
+            entregar(indice.buscar(termo, limite))
+            return
+
+        def consultar():
+            return buscar_fts(termo, limite) or []
+
+        def receber(linhas):
+            # Guarda o id (e o preço) dos nomes sugeridos para o item/pedido
+            # poder ser resolvido sem o catálogo inteiro em memória
+            for linha in linhas:
+                resolvidos.setdefault(linha[1], valor(linha))
+            entregar([linha[1] for linha in linhas])
+
+        self.parent.executor_db.submeter(consultar, chave=f"pedido_form_{tabela}", widget=self,
+                                         ao_concluir=receber)
 
     def _selecionar_produto(self, event=None):
         """Preenche o campo de preço ao selecionar um produto."""
@@ -186,7 +317,7 @@ class PedidoForm(tk.Toplevel):
         return True, (produto_id, produto_nome.strip(), quantidade, preco_unit)
 
     def _adicionar_item(self):
-        """Adiciona um item à lista e atualiza a Treeview."""
+        """Adiciona um item à lista e atualiza só a linha afetada na Treeview."""
         produto_nome = self.var_produto_selecionado.get()
         quantidade_str = self.var_quantidade.get()
         preco_str = self.var_preco_unit.get()
@@ -199,8 +330,8 @@ class PedidoForm(tk.Toplevel):
 
         produto_id, produto_nome_final, quantidade, preco_unit = resultado
 
-        self.itens_pedido.append((produto_id, produto_nome_final, quantidade, preco_unit))
-        self._atualizar_lista_e_total()
+        linha_id = self.linhas.adicionar(produto_id, produto_nome_final, quantidade, preco_unit)
+        self._exibir_linha(linha_id)
         self.dados_salvos = False
 
         # Limpar campos de adição
@@ -208,128 +339,143 @@ class PedidoForm(tk.Toplevel):
         self.var_quantidade.set("")
         self.var_preco_unit.set("0.00")
 
-    def _remover_item(self):
-        """Remove o item selecionado da lista e Treeview."""
+    def _ler_codigo(self, event=None):
+        """Adiciona (ou incrementa) o produto do código lido: um acesso ao dict, sem ir ao DB."""
+        codigo = self.var_codigo.get().strip()
+        self.var_codigo.set("")
+        if not codigo:
+            return "break"
+
+        dados = self.dados_referencia
+        produto = dados.produtos_por_sku.get(codigo) if dados is not None else None
+        if produto is None:
+            # Pode ter sido cadastrado depois que a janela abriu (ou o catálogo
+            # não cabe na memória): procura em segundo plano, recarregando o
+            # cache só se os produtos mudaram
+            self.var_status_leitura.set(f"Procurando código {codigo}...")
+            self.parent.executor_db.submeter(cache_referencia.buscar_sku, codigo, widget=self,
+                                             ao_concluir=lambda resultado: self._codigo_buscado(codigo, *resultado))
+            return "break"
+
+        self._adicionar_produto_lido(produto)
+        return "break"
+
+    def _codigo_buscado(self, codigo, dados, produto):
+        self._aplicar_dados_referencia(dados)
+        if produto is None:
+            self.bell()
+            self.var_status_leitura.set(f"Código não encontrado: {codigo}")
+            return
+        self._adicionar_produto_lido(produto)
+
+    def _adicionar_produto_lido(self, produto):
+        produto_id, produto_nome, preco_unit = produto
+        linha_id = self.linhas.adicionar(produto_id, produto_nome, 1, preco_unit)
+        self._exibir_linha(linha_id)
+        self.tree_itens.see(linha_id)
+        self.dados_salvos = False
+        self.var_status_leitura.set(f"{produto_nome}: {self.linhas.linha(linha_id)[2]} un.")
+
+    def _linha_selecionada(self, acao):
         selecionado = self.tree_itens.selection()
         if not selecionado:
-            messagebox.showwarning("Seleção", "Selecione um item para remover.")
+            messagebox.showwarning("Seleção", f"Selecione um item para {acao}.")
+            return None
+        # O iid é o ID estável da linha (não muda quando outras linhas são removidas)
+        return int(selecionado[0])
+
+    def _remover_item(self):
+        """Remove o item selecionado da lista e Treeview."""
+        linha_id = self._linha_selecionada("remover")
+        if linha_id is None:
             return
 
         try:
-            # O iid é o índice na lista itens_pedido
-            item_index = int(selecionado[0])
-            self.itens_pedido.pop(item_index)
-            self._atualizar_lista_e_total()
+            self.linhas.remover(linha_id)
+            self.tabela_itens.remover_linha(linha_id)
+            self._atualizar_total()
             self.dados_salvos = False
-        except (IndexError, ValueError) as e:
+        except KeyError as e:
             logging.error(f"Erro ao remover item: {e}")
             messagebox.showerror("Erro", "Falha ao remover item.")
 
+    def _alterar_quantidade(self):
+        """Altera a quantidade da linha selecionada."""
+        linha_id = self._linha_selecionada("alterar")
+        if linha_id is None:
+            return
+
+        _, produto_nome, quantidade_atual, _ = self.linhas.linha(linha_id)
+        quantidade = simpledialog.askinteger("Alterar Quantidade", f"Quantidade de {produto_nome}:",
+                                             initialvalue=quantidade_atual, minvalue=1, parent=self)
+        if quantidade is None or quantidade == quantidade_atual:
+            return
+
+        self.linhas.alterar_quantidade(linha_id, quantidade)
+        self._exibir_linha(linha_id)
+        self.dados_salvos = False
+
     def _calcular_total(self):
-        """Calcula o total do pedido."""
-        # item: (produto_id, produto_nome, qtd, preco_unit)
-        total = sum(qtd * preco for _, _, qtd, preco in self.itens_pedido)
-        return total
-
-    def _atualizar_lista_e_total(self):
-        """Recarrega a Treeview de itens e atualiza o total."""
-        for item in self.tree_itens.get_children():
-            self.tree_itens.delete(item)
-
-        total = 0.0
-        # item: (produto_id, produto_nome, qtd, preco_unit)
-        for i, (p_id, p_nome, quantidade, preco_unit) in enumerate(self.itens_pedido):
-            subtotal = quantidade * preco_unit
-            total += subtotal
-
-            # Use o índice 'i' como iid para facilitar a remoção
-            self.tree_itens.insert("", "end", iid=i,
-                                   values=(
-                                   p_id if p_id is not None else "CUST", p_nome, quantidade, f"{preco_unit:.2f}",
-                                   f"{subtotal:.2f}"),
-                                   tags=('data',))
-
-        self.var_total.set(f"{total:.2f}")
+        """Total do pedido (mantido incrementalmente por LinhasPedido)."""
+        return self.linhas.total
+
+    def _atualizar_total(self):
+        self.var_total.set(f"{self.linhas.total:.2f}")
+
+    def _exibir_linha(self, linha_id):
+        """Insere/atualiza uma única linha na Treeview e atualiza o total."""
+        p_id, p_nome, quantidade, preco_unit = self.linhas.linha(linha_id)
+        subtotal = quantidade * preco_unit
+        self.tabela_itens.atualizar_linha(linha_id, (p_id if p_id is not None else "CUST", p_nome, quantidade,
+                                                     f"{preco_unit:.2f}", f"{subtotal:.2f}"))
+        self._atualizar_total()
 
     def _salvar_pedido(self):
-        """Salva o Pedido e seus Itens de forma transacional (Lógica Corrigida)."""
+        """Valida o pedido e o grava em segundo plano (a janela continua respondendo)."""
         nome_cliente = self.var_cliente.get()
         cliente_id = self.clientes_map.get(nome_cliente)
-        data = self.var_data.get()
+        data = self.var_data.get().strip()
         total = self._calcular_total()
 
-        if not cliente_id or not self.itens_pedido or not total > 0:
+        if not cliente_id or not len(self.linhas) or not total > 0:
             messagebox.showwarning("Erro", "Cliente, itens e total do pedido são obrigatórios.")
             return
-
-        conn = criar_conexao()
-        if conn is None:
-            messagebox.showerror("Erro de DB", "Não foi possível conectar ao banco de dados.")
+        if not validar_data(data):
+            messagebox.showwarning("Erro", "Data inválida. Use o formato AAAA-MM-DD (ex: 2025-01-31).")
             return
 
-        try:
-            # Inicia a Transação
-            cursor = conn.cursor()
-
-            # 1. Salvar na tabela PEDIDOS (e capturar o ID)
-            sql_pedido = "INSERT INTO pedidos (cliente_id, data, total) VALUES (?, ?, ?)"
-            cursor.execute(sql_pedido, (cliente_id, data, total))
-            pedido_id = cursor.lastrowid  # CRÍTICO: Capturar o ID
-
-            # 2. Salvar na tabela ITENS_PEDIDO e preparar atualização de estoque
-            sql_item = "INSERT INTO itens_pedido (pedido_id, produto_id, produto_nome, quantidade, preco_unit) VALUES (?, ?, ?, ?, ?)"
-            sql_estoque = "UPDATE produtos SET estoque = estoque - ? WHERE id = ?"
-
-            updates_estoque = []
-            itens_dados_para_db = []
-
-            # item: (produto_id, produto_nome, qtd, preco_unit)
-            for item in self.itens_pedido:
-                produto_id, produto_nome, quantidade, preco_unit = item
-
-                # Dados para inserção na tabela itens_pedido
-                itens_dados_para_db.append((pedido_id, produto_id, produto_nome, quantidade, preco_unit))
-
-                # Dados para atualização de estoque (apenas se houver ID de produto)
-                if produto_id is not None:
-                    # Verifica se o estoque não ficará negativo (UX/Validação)
-                    produto_atual = executar_comando("SELECT estoque FROM produtos WHERE id = ?", (produto_id,),
-                                                     fetchone=True)
-                    if produto_atual and produto_atual[0] < quantidade:
-                        raise ValueError(f"Estoque insuficiente para {produto_nome}. Disponível: {produto_atual[0]}.")
-
-                    updates_estoque.append((quantidade, produto_id))
-
-            # Executa inserção de todos os itens
-            cursor.executemany(sql_item, itens_dados_para_db)
-
-            # Executa atualização de estoque
-            if updates_estoque:
-                cursor.executemany(sql_estoque, updates_estoque)
-
-            # 3. Finaliza a Transação
-            conn.commit()
-            self.dados_salvos = True
-            messagebox.showinfo("Sucesso", f"Pedido #{pedido_id} salvo com sucesso! Estoque atualizado.")
-            if self.recarregar_callback:
-                self.recarregar_callback()
-            self.destroy()
-
-        except ValueError as ve:
-            # Erro de validação de estoque, usa o rollback implícito no finally/except
-            conn.rollback()
-            logging.warning(f"Erro de Validação (Estoque): {ve}")
-            messagebox.showwarning("Aviso de Estoque", str(ve))
-
-        except Error as e:
-            # Outros erros de DB, garante rollback
-            conn.rollback()
-            logging.error(f"Erro transacional ao salvar pedido: {e}")
-            messagebox.showerror("Erro de Transação", f"Falha ao salvar o pedido: {e}")
-
-        finally:
-            if conn:
-                conn.close()
+        # Estado de carregamento: impede salvar duas vezes enquanto grava
+        self.btn_salvar.state(["disabled"])
+        self.var_status_salvar.set("Salvando...")
+        self.config(cursor="watch")
+
+        self.parent.executor_db.submeter(gravar_pedido, cliente_id, data, total, self.linhas.itens(),
+                                         widget=self, ao_concluir=self._pedido_salvo,
+                                         ao_falhar=self._falha_salvar_pedido)
+
+    def _finalizar_salvamento(self):
+        self.btn_salvar.state(["!disabled"])
+        self.var_status_salvar.set("")
+        self.config(cursor="")
+
+    def _pedido_salvo(self, pedido_id):
+        self._finalizar_salvamento()
+        self.dados_salvos = True
+        cache_referencia.invalidar()  # Estoques mudaram
+        messagebox.showinfo("Sucesso", f"Pedido #{pedido_id} salvo com sucesso! Estoque atualizado.")
+        if self.recarregar_callback:
+            self.recarregar_callback()
+        self.destroy()
+
+    def _falha_salvar_pedido(self, erro):
+        self._finalizar_salvamento()
+        if isinstance(erro, ValueError):
+            # Erro de validação de estoque (a transação já sofreu rollback)
+            logging.warning(f"Erro de Validação (Estoque): {erro}")
+            messagebox.showwarning("Aviso de Estoque", str(erro))
+        else:
+            logging.error(f"Erro transacional ao salvar pedido: {erro}")
+            messagebox.showerror("Erro de Transação", f"Falha ao salvar o pedido: {erro}")
 
     def _on_fechar(self):
         """Prevenção de fechar janela com dados não salvos."""
@@ -3,6 +3,8 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import logging
 from db import executar_comando
+from utils.cache_referencia import cache_referencia
+from utils.validations import validar_produto
 
 
 class ProdutoForm(tk.Toplevel):
@@ -32,15 +34,18 @@ class ProdutoForm(tk.Toplevel):
         self.var_nome = tk.StringVar()
         self.var_preco = tk.StringVar()
         self.var_estoque = tk.StringVar(value="0")
+        self.var_sku = tk.StringVar()
 
         # Monitora alterações
         self.var_nome.trace_add("write", lambda *args: self._marcar_alteracao())
         self.var_preco.trace_add("write", lambda *args: self._marcar_alteracao())
         self.var_estoque.trace_add("write", lambda *args: self._marcar_alteracao())
+        self.var_sku.trace_add("write", lambda *args: self._marcar_alteracao())
 
         # Campos
         ttk.Label(frame, text="Nome*:").grid(row=0, column=0, sticky="w", pady=5, padx=5)
-        ttk.Entry(frame, textvariable=self.var_nome, width=40).grid(row=0, column=1, sticky="we", pady=5, padx=5)
+        self.entry_nome = ttk.Entry(frame, textvariable=self.var_nome, width=40)
+        self.entry_nome.grid(row=0, column=1, sticky="we", pady=5, padx=5)
 
         ttk.Label(frame, text="Preço Unit.* (R$):").grid(row=1, column=0, sticky="w", pady=5, padx=5)
         ttk.Entry(frame, textvariable=self.var_preco, width=40).grid(row=1, column=1, sticky="we", pady=5, padx=5)
@@ -48,9 +53,13 @@ class ProdutoForm(tk.Toplevel):
         ttk.Label(frame, text="Estoque Inicial/Atual*:").grid(row=2, column=0, sticky="w", pady=5, padx=5)
         ttk.Entry(frame, textvariable=self.var_estoque, width=40).grid(row=2, column=1, sticky="we", pady=5, padx=5)
 
+        # Opcional: código lido pelo scanner no PedidoForm
+        ttk.Label(frame, text="SKU / Cód. Barras:").grid(row=3, column=0, sticky="w", pady=5, padx=5)
+        ttk.Entry(frame, textvariable=self.var_sku, width=40).grid(row=3, column=1, sticky="we", pady=5, padx=5)
+
         # Botões
         button_frame = ttk.Frame(frame)
-        button_frame.grid(row=3, column=0, columnspan=2, pady=15)
+        button_frame.grid(row=4, column=0, columnspan=2, pady=15)
 
         # Usando style='Accent.TButton' para dar destaque ao botão Salvar (UX)
         ttk.Button(button_frame, text="Salvar", command=self._salvar_produto, style='Accent.TButton').pack(side="left",
@@ -65,75 +74,66 @@ class ProdutoForm(tk.Toplevel):
 
     def _carregar_dados_produto(self):
         """Carrega os dados do produto para edição."""
-        sql = "SELECT nome, preco, estoque FROM produtos WHERE id = ?"
+        sql = "SELECT nome, preco, estoque, sku FROM produtos WHERE id = ?"
         produto = executar_comando(sql, (self.produto_id,), fetchone=True)
         if produto:
             self.var_nome.set(produto[0])
             self.var_preco.set(f"{produto[1]:.2f}")
             self.var_estoque.set(produto[2])
+            self.var_sku.set(produto[3] or "")
             self.dados_salvos = True
         else:
             messagebox.showerror("Erro", "Produto não encontrado.")
             self.destroy()
 
-    def _validar_campos(self, nome, preco_str, estoque_str):
-        """Realiza validações do produto."""
-        if not nome.strip():
-            return False, "O Nome do produto é obrigatório."
-
-        try:
-            preco = float(preco_str.replace(',', '.'))
-            if preco <= 0:
-                return False, "O Preço deve ser um valor positivo."
-        except ValueError:
-            return False, "O Preço deve ser um número decimal válido."
-
-        try:
-            estoque = int(estoque_str)
-            if estoque < 0:
-                return False, "O Estoque não pode ser negativo."
-        except ValueError:
-            return False, "O Estoque deve ser um número inteiro válido."
-
-        return True, (nome.strip(), preco, estoque)
+    def _validar_campos(self, nome, preco_str, estoque_str, sku_str):
+        """Realiza validações do produto (mesmas regras da importação em lote)."""
+        return validar_produto(nome, preco_str, estoque_str, sku_str)
 
     def _salvar_produto(self):
         """Salva o produto no DB."""
         nome = self.var_nome.get()
         preco_str = self.var_preco.get()
         estoque_str = self.var_estoque.get()
+        sku_str = self.var_sku.get()
 
-        valido, resultado = self._validar_campos(nome, preco_str, estoque_str)
+        valido, resultado = self._validar_campos(nome, preco_str, estoque_str, sku_str)
 
         if not valido:
             messagebox.showwarning("Validação", resultado)
             return
 
-        nome, preco, estoque = resultado
+        nome, preco, estoque, sku = resultado
 
         try:
             if self.produto_id is None:
                 # INSERT
-                sql = "INSERT INTO produtos (nome, preco, estoque) VALUES (?, ?, ?)"
-                resultado_db = executar_comando(sql, (nome, preco, estoque))
+                sql = "INSERT INTO produtos (nome, preco, estoque, sku) VALUES (?, ?, ?, ?)"
+                resultado_db = executar_comando(sql, (nome, preco, estoque, sku))
                 if resultado_db == "IntegrityError":
-                    messagebox.showerror("Erro de Salvar", "Produto com este nome já cadastrado.")
+                    messagebox.showerror("Erro de Salvar", "Produto com este nome ou SKU já cadastrado.")
                     return
                 elif resultado_db is not None:
                     messagebox.showinfo("Sucesso", "Produto cadastrado!")
             else:
                 # UPDATE
-                sql = "UPDATE produtos SET nome = ?, preco = ?, estoque = ? WHERE id = ?"
-                resultado_db = executar_comando(sql, (nome, preco, estoque, self.produto_id))
+                sql = "UPDATE produtos SET nome = ?, preco = ?, estoque = ?, sku = ? WHERE id = ?"
+                resultado_db = executar_comando(sql, (nome, preco, estoque, sku, self.produto_id))
                 if resultado_db == "IntegrityError":
-                    messagebox.showerror("Erro de Salvar", "Produto com este nome já cadastrado para outro ID.")
+                    messagebox.showerror("Erro de Salvar", "Produto com este nome ou SKU já cadastrado para outro ID.")
                     return
                 elif resultado_db is not None:
                     messagebox.showinfo("Sucesso", "Produto atualizado!")
 
             self.dados_salvos = True
+            cache_referencia.invalidar()
             if self.recarregar_callback:
-                self.recarregar_callback()
+                # Envia a linha salva para a lista atualizar só este registro
+                produto_id = self.produto_id if self.produto_id is not None else resultado_db
+                if produto_id is not None:
+                    self.recarregar_callback((produto_id, nome, preco, estoque, sku or ""))
+                else:
+                    self.recarregar_callback()
             self.destroy()
 
         except Exception as e:
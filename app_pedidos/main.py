@@ -1,25 +1,62 @@
 # main.py (VERSÃO FINAL CONSOLIDADA com Detalhes do Pedido)
+import time
+
+INICIO_PROCESSO = time.time()  # Referência para a medição de inicialização (PEDIDOS_MEDIR_INICIO)
+
+import os
+import sys
 import tkinter as tk
 from tkinter import ttk, messagebox
 import logging
 from ttkthemes import ThemedTk
-from db import inicializar_db, executar_comando
-from forms.cliente_form import ClienteForm
-from forms.produto_form import ProdutoForm
-from forms.pedido_form import PedidoForm
-# NOVO: Importa a classe para mostrar os detalhes
-from forms.detalhes_pedido_form import DetalhesPedidoForm
+from db import (inicializar_db, executar_comando, fechar_conexoes, ler_contadores_alteracao, reconstruir_resumos,
+                transacao)
+# Os formulários (e o que eles importam, como a exportação) são importados só no
+# primeiro uso, dentro dos métodos que os abrem: a janela principal aparece antes
+from utils.executor_db import ExecutorDB
+from utils.lista_virtual import ListaVirtual, ABAIXO
+from utils.busca_incremental import BuscaIncremental
+from utils.busca_fts import buscar_clientes, buscar_produtos, corresponde
+from utils.tabela_treeview import TabelaTreeview
+from utils.cache_referencia import cache_referencia
+from utils.cache_detalhes import cache_detalhes
+from utils.relatorios import carregar_painel
+from utils.analises import calcular_analises, numpy_disponivel
+from utils.instrumentacao_sql import (ativar_instrumentacao, exportar_estatisticas, instrumentacao_ativa,
+                                      modo_instrumentacao)
+from utils.perfil_ui import ativar_perfil_ui, modo_perfil_ui
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
 class App(ThemedTk):
+    # Tabelas cujas alterações exigem recarregar cada aba
+    DEPENDENCIAS_ABAS = {
+        "Clientes": ("clientes",),
+        "Produtos": ("produtos",),
+        "Pedidos": ("pedidos", "clientes"),
+        "Relatórios": ("pedidos", "clientes"),
+    }
+    # Tabelas cujas alterações exigem recalcular as colunas de análise (ABC, estoque, RFM)
+    DEPENDENCIAS_ANALISES = ("pedidos", "produtos", "clientes")
+    COLUNAS_ANALISE = {
+        "clientes": ("RFM", "Segmento"),
+        "produtos": ("ABC", "Dias Estoque", "Repor"),
+    }
+
     def __init__(self):
         super().__init__(theme="arc")
         self.title("Sistema de Gestão de Clientes e Pedidos (Arc Theme)")
         self.geometry("900x650")
 
-        inicializar_db()
+        # Executor de consultas em segundo plano (o mainloop nunca espera pelo SQL)
+        self.executor_db = ExecutorDB(self)
+        self._carregamentos = {}  # {chave: texto exibido na barra de status}
+        # Colunas de análise (opcionais, exigem NumPy): {"produtos": {id: ...}, "clientes": {id: ...}}
+        self.var_analises = tk.BooleanVar(value=False)
+        self._analises = {"produtos": {}, "clientes": {}}
+        self._versoes_analises = None
+        self.protocol("WM_DELETE_WINDOW", self._on_fechar)
 
         # Configuração da UI principal usando Notebook (Abas)
         self.notebook = ttk.Notebook(self)
@@ -28,20 +65,114 @@ class App(ThemedTk):
         self.setup_cliente_tab()
         self.setup_produto_tab()
         self.setup_pedido_tab()
+        self.setup_relatorios_tab()
+        self.setup_status_bar()
 
-        self.recarregar_clientes()
-        self.recarregar_produtos()
-        self.recarregar_pedidos()  # Inicializa a lista de pedidos
+        # {aba: versões (contadores_alteracao) das tabelas quando a aba foi carregada}
+        self._versoes_abas = {}
 
-        # Adiciona evento para recarregar pedidos ao mudar para a aba de Pedidos
+        # Ao mudar de aba, recarrega apenas se as tabelas da aba mudaram
         self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_change)
 
+        # Inicialização rápida: o banco só é preparado (e a aba visível carregada)
+        # depois que a janela é exibida pela primeira vez
+        self._banco_pronto = False
+        self._medir_inicio = os.environ.get("PEDIDOS_MEDIR_INICIO")
+        self._marcos_inicio = {}
+        self.bind("<Map>", self._on_primeiro_map, add="+")
+
+        # F9: exporta as estatísticas de SQL da sessão (tempo por comando, histogramas)
+        self.bind("<F9>", self._exportar_estatisticas_sql)
+
+    def _on_primeiro_map(self, event):
+        if event.widget is not self or self._marcos_inicio:
+            return
+        self._marcos_inicio["primeira_pintura"] = None
+        # after_idle: roda depois dos redesenhos pendentes, ou seja, após o primeiro frame
+        self.after_idle(self._iniciar_dados)
+
+    def _iniciar_dados(self):
+        self._marcar_inicio("primeira_pintura")
+        self._iniciar_carregamento("banco", "Preparando banco de dados...")
+        self.executor_db.submeter(inicializar_db, widget=self, ao_concluir=lambda _: self._banco_inicializado(),
+                                  ao_falhar=self._falha_inicializar_banco)
+
+    def _banco_inicializado(self):
+        self._finalizar_carregamento("banco")
+        self._banco_pronto = True
+        # Carga preguiçosa: só a aba visível é carregada
+        self._atualizar_aba_atual()
+        # Aquece o cache de clientes/produtos para o primeiro PedidoForm abrir sem esperar
+        cache_referencia.atualizar(self.executor_db)
+
+    def _falha_inicializar_banco(self, erro):
+        self._finalizar_carregamento("banco")
+        logging.error(f"Erro ao inicializar o banco de dados: {erro}")
+        messagebox.showerror("Erro de DB", f"Não foi possível preparar o banco de dados: {erro}")
+
+    def _marcar_inicio(self, marco):
+        """Registra o instante (ms desde o início do processo) de um marco da inicialização."""
+        if not self._medir_inicio or self._marcos_inicio.get(marco) is not None:
+            return
+        self._marcos_inicio[marco] = (time.time() - INICIO_PROCESSO) * 1000
+        if marco == "interativo":
+            # Lido por benchmarks/bench_inicializacao.py
+            print("INICIO " + " ".join(f"{nome}_ms={valor:.1f}" for nome, valor in self._marcos_inicio.items()),
+                  flush=True)
+            if self._medir_inicio == "sair":
+                self.after_idle(self._on_fechar)
+
     def _on_tab_change(self, event):
-        """Recarrega dados se a aba de Pedidos for selecionada."""
+        """Carrega a aba na primeira exibição ou se os seus dados mudaram."""
+        self._atualizar_aba_atual()
+
+    def _aba_atual(self):
         tab_index = self.notebook.index("current")
-        tab_name = self.notebook.tab(tab_index, "text")
-        if tab_name == "Pedidos":
-            self.recarregar_pedidos()
+        return self.notebook.tab(tab_index, "text")
+
+    def _versoes_da_aba(self, aba, contadores=None):
+        if contadores is None:
+            contadores = ler_contadores_alteracao()
+        return tuple(contadores.get(tabela) for tabela in self.DEPENDENCIAS_ABAS[aba])
+
+    def _registrar_carga(self, aba):
+        """Guarda as versões das tabelas da aba no momento em que ela é (re)carregada."""
+        self._versoes_abas[aba] = self._versoes_da_aba(aba)
+
+    def _atualizar_aba_atual(self):
+        if not self._banco_pronto:
+            return  # _banco_inicializado() carrega a aba assim que o banco estiver pronto
+        aba = self._aba_atual()
+        if aba not in self.DEPENDENCIAS_ABAS:
+            return
+        if aba in ("Clientes", "Produtos") and self.var_analises.get():
+            self._atualizar_analises()
+        if self._versoes_abas.get(aba) == self._versoes_da_aba(aba):
+            return  # Nada mudou desde a última carga: troca de aba sem custo
+
+        recarregar = {
+            "Clientes": self.recarregar_clientes,
+            "Produtos": self.recarregar_produtos,
+            "Pedidos": self.recarregar_pedidos,
+            "Relatórios": self.recarregar_relatorios,
+        }[aba]
+        recarregar()
+
+    def _exportar_estatisticas_sql(self, event=None):
+        if not instrumentacao_ativa():
+            self.var_status.set("Instrumentação de SQL desligada: inicie com --instrumentar-sql.")
+            return
+        try:
+            caminho = exportar_estatisticas()
+        except OSError as e:
+            messagebox.showerror("Estatísticas de SQL", f"Não foi possível exportar as estatísticas: {e}")
+            return
+        self.var_status.set(f"Estatísticas de SQL exportadas para {os.path.abspath(caminho)}")
+
+    def _on_fechar(self):
+        """Encerra o executor de consultas (esperando as tarefas em andamento) antes de destruir a janela."""
+        self.executor_db.desligar()
+        self.destroy()
 
     # --- Métodos de Setup de Abas ---
 
@@ -55,11 +186,11 @@ class App(ThemedTk):
         self.var_busca_cliente = tk.StringVar()
         self.entry_busca_cliente = ttk.Entry(frame_busca, textvariable=self.var_busca_cliente, width=50)
         self.entry_busca_cliente.pack(side="left", fill="x", expand=True, padx=5)
-        self.entry_busca_cliente.bind('<KeyRelease>', lambda e: self.recarregar_clientes())
 
         list_frame = ttk.Frame(frame)
         list_frame.pack(fill="both", expand=True, pady=5)
-        self.tree_clientes = self._criar_treeview(list_frame, ("ID", "Nome", "Email", "Telefone"))
+        self.tree_clientes = self._criar_treeview(list_frame, ("ID", "Nome", "Email", "Telefone")
+                                                  + self.COLUNAS_ANALISE["clientes"])
         self.tree_clientes.column("ID", width=50, anchor="center");
         self.tree_clientes.heading("ID", text="ID")
         self.tree_clientes.column("Nome", width=250);
@@ -68,6 +199,10 @@ class App(ThemedTk):
         self.tree_clientes.heading("Email", text="Email")
         self.tree_clientes.column("Telefone", width=150);
         self.tree_clientes.heading("Telefone", text="Telefone")
+        self.tree_clientes.column("RFM", width=60, anchor="center");
+        self.tree_clientes.heading("RFM", text="RFM")
+        self.tree_clientes.column("Segmento", width=110);
+        self.tree_clientes.heading("Segmento", text="Segmento")
 
         frame_botoes = ttk.Frame(frame, padding="5")
         frame_botoes.pack(fill="x")
@@ -76,8 +211,20 @@ class App(ThemedTk):
         ttk.Button(frame_botoes, text="Editar Cliente", command=self.abrir_editar_cliente).pack(side="left", padx=5)
         ttk.Button(frame_botoes, text="Excluir Cliente", command=self.excluir_cliente, style='TButton').pack(
             side="left", padx=5)
+        ttk.Button(frame_botoes, text="Importar CSV", command=lambda: self.abrir_importacao("clientes")).pack(
+            side="left", padx=5)
+        self.btn_mais_clientes = ttk.Button(frame_botoes, text="Mostrar mais",
+                                            command=lambda: self.busca_clientes.mostrar_mais())
+        self.btn_mais_clientes.pack(side="right", padx=5)
+        self.btn_mais_clientes.state(["disabled"])
+        self._criar_opcao_analises(frame_botoes)
         self.tree_clientes.bind('<Double-1>', lambda e: self.abrir_editar_cliente())
 
+        # Busca com debounce: consulta o DB só quando o usuário para de digitar
+        self.busca_clientes = self._criar_busca(self.tree_clientes, "clientes", self.var_busca_cliente,
+                                                buscar_clientes, "id, nome, email, telefone",
+                                                self.btn_mais_clientes)
+
     def setup_produto_tab(self):
         frame = ttk.Frame(self.notebook, padding="10")
         self.notebook.add(frame, text="Produtos")
@@ -88,11 +235,11 @@ class App(ThemedTk):
         self.var_busca_produto = tk.StringVar()
         self.entry_busca_produto = ttk.Entry(frame_busca, textvariable=self.var_busca_produto, width=50)
         self.entry_busca_produto.pack(side="left", fill="x", expand=True, padx=5)
-        self.entry_busca_produto.bind('<KeyRelease>', lambda e: self.recarregar_produtos())
 
         list_frame = ttk.Frame(frame)
         list_frame.pack(fill="both", expand=True, pady=5)
-        self.tree_produtos = self._criar_treeview(list_frame, ("ID", "Nome", "Preço", "Estoque"))
+        self.tree_produtos = self._criar_treeview(list_frame, ("ID", "Nome", "Preço", "Estoque", "SKU")
+                                                  + self.COLUNAS_ANALISE["produtos"])
         self.tree_produtos.column("ID", width=50, anchor="center");
         self.tree_produtos.heading("ID", text="ID")
         self.tree_produtos.column("Nome", width=300);
@@ -101,6 +248,14 @@ class App(ThemedTk):
         self.tree_produtos.heading("Preço", text="Preço Unit. R$")
         self.tree_produtos.column("Estoque", width=100, anchor="center");
         self.tree_produtos.heading("Estoque", text="Estoque")
+        self.tree_produtos.column("SKU", width=150, anchor="w");
+        self.tree_produtos.heading("SKU", text="SKU / Cód. Barras")
+        self.tree_produtos.column("ABC", width=50, anchor="center");
+        self.tree_produtos.heading("ABC", text="Curva ABC")
+        self.tree_produtos.column("Dias Estoque", width=90, anchor="center");
+        self.tree_produtos.heading("Dias Estoque", text="Dias Estoque")
+        self.tree_produtos.column("Repor", width=70, anchor="center");
+        self.tree_produtos.heading("Repor", text="Repor")
 
         frame_botoes = ttk.Frame(frame, padding="5")
         frame_botoes.pack(fill="x")
@@ -109,8 +264,19 @@ class App(ThemedTk):
         ttk.Button(frame_botoes, text="Editar Produto", command=self.abrir_editar_produto).pack(side="left", padx=5)
         ttk.Button(frame_botoes, text="Excluir Produto", command=self.excluir_produto, style='TButton').pack(
             side="left", padx=5)
+        ttk.Button(frame_botoes, text="Importar CSV", command=lambda: self.abrir_importacao("produtos")).pack(
+            side="left", padx=5)
+        self.btn_mais_produtos = ttk.Button(frame_botoes, text="Mostrar mais",
+                                            command=lambda: self.busca_produtos.mostrar_mais())
+        self.btn_mais_produtos.pack(side="right", padx=5)
+        self.btn_mais_produtos.state(["disabled"])
+        self._criar_opcao_analises(frame_botoes)
         self.tree_produtos.bind('<Double-1>', lambda e: self.abrir_editar_produto())
 
+        self.busca_produtos = self._criar_busca(self.tree_produtos, "produtos", self.var_busca_produto,
+                                                buscar_produtos, "id, nome, preco, estoque, COALESCE(sku, '')",
+                                                self.btn_mais_produtos)
+
     # Setup da Aba de Pedidos (AGORA COM LISTAGEM E BINDING)
     def setup_pedido_tab(self):
         frame = ttk.Frame(self.notebook, padding="10")
@@ -120,11 +286,25 @@ class App(ThemedTk):
         frame_busca.pack(fill="x")
         ttk.Label(frame_busca, text="Lista de Pedidos (mais recentes primeiro)").pack(side="left", padx=5, pady=5)
         ttk.Button(frame_busca, text="Atualizar Lista", command=self.recarregar_pedidos).pack(side="right", padx=5)
+        self.var_total_pedidos = tk.StringVar(value="")
+        ttk.Label(frame_busca, textvariable=self.var_total_pedidos).pack(side="right", padx=10)
 
         list_frame = ttk.Frame(frame)
         list_frame.pack(fill="both", expand=True, pady=5)
 
-        self.tree_pedidos = self._criar_treeview(list_frame, ("ID", "Cliente", "Data", "Total"))
+        # A lista é paginada por (data, id): só uma janela limitada de linhas fica na Treeview
+        self.tree_pedidos = self._criar_treeview(list_frame, ("ID", "Cliente", "Data", "Total"),
+                                                 ao_rolar=lambda primeiro, ultimo: self.lista_pedidos.ao_rolar(
+                                                     primeiro, ultimo))
+        self.lista_pedidos = ListaVirtual(
+            self.tree_pedidos, self.executor_db, "pedidos",
+            buscar_pagina=self._buscar_pagina_pedidos,
+            chave_da_linha=lambda pedido: (pedido[2], pedido[0]),
+            formatar_linha=lambda pedido: (pedido[0], (pedido[0], pedido[1], pedido[2], f"{pedido[3]:.2f}")),
+            ao_vazio=lambda: self.tree_pedidos.insert("", "end", values=("", "Nenhum pedido encontrado.", "", ""),
+                                                      tags=('empty',)),
+            ao_carregar=lambda ativo: self._iniciar_carregamento("pedidos", "Carregando pedidos...") if ativo
+            else self._finalizar_carregamento("pedidos"))
         self.tree_pedidos.column("ID", width=70, anchor="center");
         self.tree_pedidos.heading("ID", text="ID")
         self.tree_pedidos.column("Cliente", width=300);
@@ -136,6 +316,8 @@ class App(ThemedTk):
 
         # NOVO BINDING: Duplo clique abre os detalhes
         self.tree_pedidos.bind('<Double-1>', lambda e: self.abrir_detalhes_pedido())
+        # Ao selecionar, pré-carrega os detalhes do pedido e dos vizinhos em segundo plano
+        self.tree_pedidos.bind('<<TreeviewSelect>>', lambda e: self._pre_carregar_detalhes())
 
         frame_botoes = ttk.Frame(frame, padding="5")
         frame_botoes.pack(fill="x")
@@ -144,11 +326,112 @@ class App(ThemedTk):
             side="left", padx=5)
         # NOVO BOTÃO: Adicionado o botão "Ver Detalhes"
         ttk.Button(frame_botoes, text="Ver Detalhes", command=self.abrir_detalhes_pedido).pack(side="left", padx=5)
+        ttk.Button(frame_botoes, text="Exportar Período", command=self.abrir_exportacao).pack(side="left", padx=5)
 
-    def _criar_treeview(self, parent_frame, colunas):
+    # Setup da Aba de Relatórios (lida só das tabelas de resumo)
+    def setup_relatorios_tab(self):
+        frame = ttk.Frame(self.notebook, padding="10")
+        self.notebook.add(frame, text="Relatórios")
+
+        frame_topo = ttk.Frame(frame)
+        frame_topo.pack(fill="x")
+        ttk.Label(frame_topo, text="Resumo de Vendas").pack(side="left", padx=5, pady=5)
+        self.var_resumo_periodo = tk.StringVar(value="")
+        ttk.Label(frame_topo, textvariable=self.var_resumo_periodo).pack(side="left", padx=10)
+        ttk.Button(frame_topo, text="Reconstruir Resumos", command=self.reconstruir_relatorios).pack(side="right",
+                                                                                                    padx=5)
+        ttk.Button(frame_topo, text="Atualizar", command=self.recarregar_relatorios).pack(side="right", padx=5)
+
+        corpo = ttk.Frame(frame)
+        corpo.pack(fill="both", expand=True, pady=5)
+
+        frame_dias = ttk.LabelFrame(corpo, text="Faturamento por dia (últimos 30 dias com vendas)", padding="5")
+        frame_dias.pack(side="left", fill="both", expand=True, padx=(0, 5))
+        self.tree_rel_dias = self._criar_treeview(frame_dias, ("Data", "Pedidos", "Faturamento"))
+        self.tree_rel_dias.column("Data", width=100, anchor="center");
+        self.tree_rel_dias.heading("Data", text="Data")
+        self.tree_rel_dias.column("Pedidos", width=70, anchor="center");
+        self.tree_rel_dias.heading("Pedidos", text="Pedidos")
+        self.tree_rel_dias.column("Faturamento", width=120, anchor="e");
+        self.tree_rel_dias.heading("Faturamento", text="Faturamento R$")
+
+        frame_rankings = ttk.Frame(corpo)
+        frame_rankings.pack(side="left", fill="both", expand=True)
+
+        frame_produtos = ttk.LabelFrame(frame_rankings, text="Top 10 produtos", padding="5")
+        frame_produtos.pack(fill="both", expand=True)
+        self.tree_rel_produtos = self._criar_treeview(frame_produtos, ("Produto", "Qtd", "Faturamento"))
+        self.tree_rel_produtos.column("Produto", width=200);
+        self.tree_rel_produtos.heading("Produto", text="Produto")
+        self.tree_rel_produtos.column("Qtd", width=70, anchor="center");
+        self.tree_rel_produtos.heading("Qtd", text="Qtd")
+        self.tree_rel_produtos.column("Faturamento", width=120, anchor="e");
+        self.tree_rel_produtos.heading("Faturamento", text="Faturamento R$")
+
+        frame_clientes = ttk.LabelFrame(frame_rankings, text="Top 10 clientes", padding="5")
+        frame_clientes.pack(fill="both", expand=True, pady=(5, 0))
+        self.tree_rel_clientes = self._criar_treeview(frame_clientes, ("Cliente", "Pedidos", "Faturamento"))
+        self.tree_rel_clientes.column("Cliente", width=200);
+        self.tree_rel_clientes.heading("Cliente", text="Cliente")
+        self.tree_rel_clientes.column("Pedidos", width=70, anchor="center");
+        self.tree_rel_clientes.heading("Pedidos", text="Pedidos")
+        self.tree_rel_clientes.column("Faturamento", width=120, anchor="e");
+        self.tree_rel_clientes.heading("Faturamento", text="Faturamento R$")
+
+        self.tabelas_relatorios = {
+            "dias": TabelaTreeview(self.tree_rel_dias),
+            "produtos": TabelaTreeview(self.tree_rel_produtos),
+            "clientes": TabelaTreeview(self.tree_rel_clientes),
+        }
+
+    def _criar_opcao_analises(self, parent_frame):
+        """Caixa "Mostrar análises" (a mesma opção nas abas Clientes e Produtos)."""
+        opcao = ttk.Checkbutton(parent_frame, text="Mostrar análises", variable=self.var_analises,
+                                command=self._alternar_analises)
+        opcao.pack(side="right", padx=5)
+        if not numpy_disponivel():
+            opcao.state(["disabled"])
+            opcao.config(text="Mostrar análises (requer numpy)")
+        self._mostrar_colunas_analise(False)
+
+    def _mostrar_colunas_analise(self, mostrar):
+        for tree, tabela in ((getattr(self, "tree_clientes", None), "clientes"),
+                             (getattr(self, "tree_produtos", None), "produtos")):
+            if tree is not None:
+                colunas = tree["columns"]
+                ocultas = () if mostrar else self.COLUNAS_ANALISE[tabela]
+                tree.configure(displaycolumns=[coluna for coluna in colunas if coluna not in ocultas])
+
+    def setup_status_bar(self):
+        """Barra inferior que indica carregamentos em andamento."""
+        self.var_status = tk.StringVar(value="")
+        ttk.Label(self, textvariable=self.var_status, anchor="w", padding=(10, 0, 10, 5)).pack(fill="x", side="bottom")
+
+    def _iniciar_carregamento(self, chave, texto):
+        self._carregamentos[chave] = texto
+        self.var_status.set(" | ".join(self._carregamentos.values()))
+        self.config(cursor="watch")
+
+    def _finalizar_carregamento(self, chave):
+        self._carregamentos.pop(chave, None)
+        self.var_status.set(" | ".join(self._carregamentos.values()))
+        if not self._carregamentos:
+            self.config(cursor="")
+            if self._banco_pronto:
+                # Primeira vez que nada está carregando com o banco pronto: aba visível preenchida
+                self._marcar_inicio("interativo")
+
+    def _criar_treeview(self, parent_frame, colunas, ao_rolar=None):
         tree = ttk.Treeview(parent_frame, columns=colunas, show="headings")
         scrollbar = ttk.Scrollbar(parent_frame, orient="vertical", command=tree.yview)
-        tree.configure(yscrollcommand=scrollbar.set)
+        if ao_rolar is None:
+            tree.configure(yscrollcommand=scrollbar.set)
+        else:
+            def _yscroll(primeiro, ultimo):
+                scrollbar.set(primeiro, ultimo)
+                ao_rolar(primeiro, ultimo)
+
+            tree.configure(yscrollcommand=_yscroll)
 
         tree.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
@@ -156,21 +439,98 @@ class App(ThemedTk):
 
     # --- Métodos de Recarregamento de Dados ---
 
-    def recarregar_clientes(self):
-        self._recarregar_dados(self.tree_clientes, "clientes", self.var_busca_cliente.get().strip(),
-                               "nome LIKE ? OR email LIKE ?",
-                               "id, nome, email, telefone")
-
-    def recarregar_produtos(self):
-        self._recarregar_dados(self.tree_produtos, "produtos", self.var_busca_produto.get().strip(),
-                               "nome LIKE ?",
-                               "id, nome, preco, estoque")
+    def recarregar_clientes(self, linha_alterada=None):
+        """
+        Recarrega a lista de clientes. Se o formulário informar a linha salva
+        (id, nome, email, telefone), só ela é aplicada, sem consultar o DB.
+        """
+        if linha_alterada is not None:
+            self.busca_clientes.aplicar_linha(linha_alterada)
+        else:
+            self._registrar_carga("Clientes")
+            self.busca_clientes.executar(forcar=True)
+
+    def recarregar_produtos(self, linha_alterada=None):
+        """Como recarregar_clientes, com a linha (id, nome, preco, estoque)."""
+        if linha_alterada is not None:
+            self.busca_produtos.aplicar_linha(linha_alterada)
+        else:
+            self._registrar_carga("Produtos")
+            self.busca_produtos.executar(forcar=True)
 
     def recarregar_pedidos(self):
-        """Busca pedidos no DB e recarrega a Treeview de pedidos (Lógica de Inserção Corrigida)."""
-        for item in self.tree_pedidos.get_children():
-            self.tree_pedidos.delete(item)
-
+        """Reinicia a lista paginada de pedidos e atualiza a contagem aproximada."""
+        self._registrar_carga("Pedidos")
+        self.lista_pedidos.recarregar()
+        self.executor_db.submeter(self._contar_pedidos_aprox, chave="pedidos_total", widget=self.tree_pedidos,
+                                  ao_concluir=lambda total: self.var_total_pedidos.set(f"≈ {total} pedidos"))
+
+    def recarregar_relatorios(self):
+        """Recarrega a aba Relatórios (consultas só às tabelas de resumo, em segundo plano)."""
+        self._registrar_carga("Relatórios")
+        self._iniciar_carregamento("relatorios", "Carregando relatórios...")
+        self.executor_db.submeter(carregar_painel, chave="relatorios", widget=self.tree_rel_dias,
+                                  ao_concluir=self._exibir_relatorios,
+                                  ao_falhar=lambda e: self._falha_carregamento("relatorios", e))
+
+    def _exibir_relatorios(self, painel):
+        self._finalizar_carregamento("relatorios")
+        self.tabelas_relatorios["dias"].sincronizar(
+            [(data, (data, pedidos, f"{faturamento:.2f}")) for data, pedidos, faturamento in painel["dias"]])
+        self.tabelas_relatorios["produtos"].sincronizar(
+            [(nome, (nome, qtd, f"{faturamento:.2f}")) for nome, qtd, faturamento in painel["produtos"]])
+        self.tabelas_relatorios["clientes"].sincronizar(
+            [(cliente_id, (nome, pedidos, f"{faturamento:.2f}"))
+             for cliente_id, nome, pedidos, faturamento in painel["clientes"]])
+
+        pedidos = sum(linha[1] for linha in painel["dias"])
+        faturamento = sum(linha[2] for linha in painel["dias"])
+        self.var_resumo_periodo.set(f"{pedidos} pedidos, R$ {faturamento:.2f} nos dias exibidos")
+
+    def reconstruir_relatorios(self):
+        """Recalcula as tabelas de resumo a partir de pedidos/itens (varre todo o histórico)."""
+        if not messagebox.askyesno("Reconstruir Resumos",
+                                   "Recalcular os resumos de vendas a partir de todos os pedidos? "
+                                   "Em bancos grandes isso pode levar algum tempo."):
+            return
+        self._iniciar_carregamento("relatorios", "Reconstruindo resumos...")
+        self.executor_db.submeter(reconstruir_resumos, chave="relatorios", widget=self.tree_rel_dias,
+                                  ao_concluir=lambda _: self.recarregar_relatorios(),
+                                  ao_falhar=lambda e: self._falha_carregamento("relatorios", e))
+
+    def _alternar_analises(self):
+        mostrar = self.var_analises.get()
+        self._mostrar_colunas_analise(mostrar)
+        if mostrar and self._banco_pronto:
+            self._atualizar_analises()
+
+    def _atualizar_analises(self):
+        """Recalcula as análises em segundo plano, só se pedidos/produtos/clientes mudaram."""
+        contadores = ler_contadores_alteracao()
+        versoes = tuple(contadores.get(tabela) for tabela in self.DEPENDENCIAS_ANALISES)
+        if versoes == self._versoes_analises:
+            return
+        self._versoes_analises = versoes
+        self._iniciar_carregamento("analises", "Calculando análises...")
+        self.executor_db.submeter(calcular_analises, chave="analises", widget=self.tree_produtos,
+                                  ao_concluir=self._exibir_analises, ao_falhar=self._falha_analises)
+
+    def _exibir_analises(self, analises):
+        self._finalizar_carregamento("analises")
+        self._analises = analises
+        if analises["pedidos_ignorados"]:
+            self.var_status.set(f"Análises: {analises['pedidos_ignorados']} pedido(s) com data inválida "
+                                "ignorado(s) (use AAAA-MM-DD).")
+        self.busca_clientes.reexibir()
+        self.busca_produtos.reexibir()
+
+    def _falha_analises(self, erro):
+        self._versoes_analises = None  # Tenta de novo na próxima troca de aba
+        self._falha_carregamento("analises", erro)
+
+    @staticmethod
+    def _buscar_pagina_pedidos(chave_ref, sentido, limite):
+        """Busca uma página de pedidos a partir da chave (data, id). Roda fora da thread do Tk."""
         sql = """
             SELECT 
                 p.id, 
@@ -179,61 +539,81 @@ class App(ThemedTk):
                 p.total 
             FROM pedidos p
             INNER JOIN clientes c ON p.cliente_id = c.id
-            ORDER BY p.data DESC, p.id DESC
         """
-        try:
-            pedidos = executar_comando(sql, fetchall=True)
-            if pedidos:
-                for pedido in pedidos:
-                    # pedido é: (id, nome_cliente, data, total)
-                    pedido_id = pedido[0]
-                    nome_cliente = pedido[1]
-                    data = pedido[2]
-                    total_formatado = f"{pedido[3]:.2f}"
-
-                    # INSERÇÃO CORRETA: Garante a ordem dos dados na Treeview
-                    self.tree_pedidos.insert(
-                        "",
-                        "end",
-                        iid=pedido_id,
-                        values=(pedido_id, nome_cliente, data, total_formatado)
-                    )
-            else:
-                self.tree_pedidos.insert("", "end", values=("", "Nenhum pedido encontrado.", "", ""), tags=('empty',))
-        except Exception as e:
-            logging.error(f"Erro ao carregar pedidos: {e}")
-            messagebox.showerror("Erro de DB", f"Não foi possível carregar a lista de pedidos: {e}")
-
-    def _recarregar_dados(self, treeview, tabela, termo, where_clause, colunas_sql):
-        # Limpa o Treeview
-        for item in treeview.get_children():
-            treeview.delete(item)
-
-        sql = f"SELECT {colunas_sql} FROM {tabela}"
-        parametros = ()
-
+        if chave_ref is None:
+            sql += " ORDER BY p.data DESC, p.id DESC LIMIT ?"
+            return executar_comando(sql, (limite,), fetchall=True)
+
+        data_ref, id_ref = chave_ref
+        if sentido == ABAIXO:
+            sql += " WHERE (p.data, p.id) < (?, ?) ORDER BY p.data DESC, p.id DESC LIMIT ?"
+        else:
+            # Página anterior: lida em ordem crescente a partir do topo atual
+            sql += " WHERE (p.data, p.id) > (?, ?) ORDER BY p.data ASC, p.id ASC LIMIT ?"
+        return executar_comando(sql, (data_ref, id_ref, limite), fetchall=True)
+
+    @staticmethod
+    def _contar_pedidos_aprox():
+        """Contagem aproximada de pedidos pelo intervalo de IDs (busca só nas pontas do índice)."""
+        resultado = executar_comando("SELECT COALESCE(MAX(id) - MIN(id) + 1, 0) FROM pedidos", fetchone=True)
+        return resultado[0] if resultado else 0
+
+    # Colunas (posição na linha do SELECT) usadas pelo filtro em memória de cada tabela
+    COLUNAS_BUSCA = {"clientes": (1, 2), "produtos": (1,)}
+
+    def _criar_busca(self, treeview, tabela, var_termo, buscar_fts, colunas_sql, btn_mais):
+        colunas_busca = self.COLUNAS_BUSCA[tabela]
+        tabela_treeview = TabelaTreeview(treeview)
+
+        def consultar(termo, limite):
+            return self._consultar_dados(tabela, termo, buscar_fts, colunas_sql, limite)
+
+        def filtrar(linha, termo_lower):
+            # Mesmo critério da busca FTS (prefixo de palavra, sem acentos)
+            return corresponde([linha[i] for i in colunas_busca], termo_lower)
+
+        def exibir(linhas, ha_mais):
+            tabela_treeview.sincronizar([self._formatar_linha(tabela, linha) for linha in linhas])
+            btn_mais.state(["!disabled"] if ha_mais else ["disabled"])
+
+        return BuscaIncremental(self, self.executor_db, tabela, var_termo, consultar, filtrar, exibir,
+                                ao_carregar=lambda ativo: self._iniciar_carregamento(tabela, f"Carregando {tabela}...")
+                                if ativo else self._finalizar_carregamento(tabela),
+                                ao_falhar=lambda e: self._falha_carregamento(tabela, e))
+
+    @staticmethod
+    def _consultar_dados(tabela, termo, buscar_fts, colunas_sql, limite):
+        """Consulta clientes/produtos (no máximo limite + 1 linhas). Roda fora da thread do Tk."""
         if termo:
-            sql += f" WHERE {where_clause}"
-            if tabela == "clientes":
-                parametros = (f'%{termo}%', f'%{termo}%')
-            elif tabela == "produtos":
-                parametros = (f'%{termo}%',)  # Apenas busca por nome
-
-        try:
-            dados = executar_comando(sql, parametros, fetchall=True)
-            if dados:
-                for dado in dados:
-                    # Formata o preço para exibição no Treeview de Produtos
-                    if tabela == "produtos":
-                        dado_list = list(dado)
-                        dado_list[2] = f"{dado_list[2]:.2f}"
-                        treeview.insert("", "end", iid=dado_list[0], values=dado_list)
-                    else:
-                        treeview.insert("", "end", iid=dado[0], values=dado)
-
-        except Exception as e:
-            logging.error(f"Erro ao carregar dados de {tabela}: {e}")
-            messagebox.showerror("Erro de DB", f"Não foi possível carregar a lista de {tabela}: {e}")
+            # Busca pelo índice FTS5, ordenada por relevância
+            return buscar_fts(termo, limite + 1)
+
+        sql = f"SELECT {colunas_sql} FROM {tabela} LIMIT ?"
+        return executar_comando(sql, (limite + 1,), fetchall=True)
+
+    def _formatar_linha(self, tabela, dado):
+        """Converte uma linha do DB em (iid, values) para a Treeview, com as colunas de análise."""
+        dado_list = list(dado)
+        analise = self._analises[tabela].get(dado_list[0])
+        if tabela == "produtos":
+            # Formata o preço para exibição no Treeview de Produtos
+            dado_list[2] = f"{dado_list[2]:.2f}"
+            if analise is None:
+                dado_list += ["", "", ""]
+            else:
+                classe, dias_estoque, repor = analise
+                dado_list += [classe, "—" if dias_estoque is None else dias_estoque, repor or ""]
+        elif analise is None:
+            dado_list += ["", "Sem pedidos" if self._analises["clientes"] else ""]
+        else:
+            r, f, m, segmento = analise
+            dado_list += [f"{r}{f}{m}", segmento]
+        return dado_list[0], dado_list
+
+    def _falha_carregamento(self, tabela, erro):
+        self._finalizar_carregamento(tabela)
+        logging.error(f"Erro ao carregar dados de {tabela}: {erro}")
+        messagebox.showerror("Erro de DB", f"Não foi possível carregar a lista de {tabela}: {erro}")
 
     # --- Métodos CRUD de Clientes e Produtos (permanecem os mesmos) ---
 
@@ -245,11 +625,13 @@ class App(ThemedTk):
         return selecionado[0]
 
     def abrir_novo_cliente(self):
+        from forms.cliente_form import ClienteForm
         ClienteForm(self, recarregar_callback=self.recarregar_clientes)
 
     def abrir_editar_cliente(self):
         cliente_id = self._get_selected_id(self.tree_clientes)
         if cliente_id:
+            from forms.cliente_form import ClienteForm
             ClienteForm(self, cliente_id=int(cliente_id), recarregar_callback=self.recarregar_clientes)
 
     def excluir_cliente(self):
@@ -259,19 +641,30 @@ class App(ThemedTk):
                                    "Tem certeza que deseja excluir o cliente selecionado? "
                                    "Todos os pedidos associados serão EXCLUÍDOS (CASCADE)."):
                 try:
-                    executar_comando("DELETE FROM clientes WHERE id = ?", (cliente_id,))
-                    messagebox.showinfo("Sucesso", "Cliente excluído!")
-                    self.recarregar_clientes()
+                    # transacao() levanta o erro (executar_comando só o registraria e retornaria None)
+                    with transacao() as conn:
+                        excluidos = conn.execute("DELETE FROM clientes WHERE id = ?", (cliente_id,)).rowcount
                 except Exception as e:
                     logging.error(f"Erro ao excluir cliente: {e}")
                     messagebox.showerror("Erro de DB", f"Não foi possível excluir o cliente: {e}")
+                    # A linha continua no banco: a lista volta a mostrar o que está gravado
+                    self.recarregar_clientes()
+                    return
+                cache_referencia.invalidar()
+                if excluidos:
+                    messagebox.showinfo("Sucesso", "Cliente excluído!")
+                else:
+                    messagebox.showwarning("Aviso", "Cliente já havia sido excluído (em outro terminal?).")
+                self.busca_clientes.remover_linha(int(cliente_id))
 
     def abrir_novo_produto(self):
+        from forms.produto_form import ProdutoForm
         ProdutoForm(self, recarregar_callback=self.recarregar_produtos)
 
     def abrir_editar_produto(self):
         produto_id = self._get_selected_id(self.tree_produtos)
         if produto_id:
+            from forms.produto_form import ProdutoForm
             ProdutoForm(self, produto_id=int(produto_id), recarregar_callback=self.recarregar_produtos)
 
     def excluir_produto(self):
@@ -281,12 +674,26 @@ class App(ThemedTk):
                                    "Tem certeza que deseja excluir o produto selecionado? "
                                    "Pedidos que o contêm serão afetados (o item permanecerá com o nome, mas sem link)."):
                 try:
-                    executar_comando("DELETE FROM produtos WHERE id = ?", (produto_id,))
-                    messagebox.showinfo("Sucesso", "Produto excluído!")
-                    self.recarregar_produtos()
+                    # transacao() levanta o erro (executar_comando só o registraria e retornaria None)
+                    with transacao() as conn:
+                        excluidos = conn.execute("DELETE FROM produtos WHERE id = ?", (produto_id,)).rowcount
                 except Exception as e:
                     logging.error(f"Erro ao excluir produto: {e}")
                     messagebox.showerror("Erro de DB", f"Não foi possível excluir o produto: {e}")
+                    # A linha continua no banco: a lista volta a mostrar o que está gravado
+                    self.recarregar_produtos()
+                    return
+                cache_referencia.invalidar()
+                if excluidos:
+                    messagebox.showinfo("Sucesso", "Produto excluído!")
+                else:
+                    messagebox.showwarning("Aviso", "Produto já havia sido excluído (em outro terminal?).")
+                self.busca_produtos.remover_linha(int(produto_id))
+
+    def abrir_importacao(self, tabela):
+        from forms.importacao_form import ImportacaoForm
+        recarregar = self.recarregar_clientes if tabela == "clientes" else self.recarregar_produtos
+        ImportacaoForm(self, tabela, recarregar_callback=recarregar)
 
     # --- Métodos de Pedidos ---
     def abrir_novo_pedido(self):
@@ -294,13 +701,32 @@ class App(ThemedTk):
             self.recarregar_pedidos()
             self.recarregar_produtos()
 
+        from forms.pedido_form import PedidoForm
         PedidoForm(self, recarregar_callback=callback_completo)
 
+    def abrir_exportacao(self):
+        from forms.exportacao_form import ExportacaoForm
+        ExportacaoForm(self)
+
+    def _pre_carregar_detalhes(self):
+        selecionado = self.tree_pedidos.selection()
+        if not selecionado:
+            return
+        iid = selecionado[0]
+        ids = [int(i) for i in (iid, self.tree_pedidos.next(iid), self.tree_pedidos.prev(iid))
+               if i and i in self.lista_pedidos.tabela]
+        pendentes = [pedido_id for pedido_id in ids if pedido_id not in cache_detalhes]
+        if pendentes:
+            # Setas em sequência: só a seleção mais recente importa
+            self.executor_db.submeter(cache_detalhes.pre_carregar, pendentes, chave="detalhes_pedidos",
+                                      widget=self.tree_pedidos)
+
     def abrir_detalhes_pedido(self):
         """Abre a janela de detalhes para o pedido selecionado."""
         pedido_id = self._get_selected_id(self.tree_pedidos)
         if pedido_id:
             try:
+                from forms.detalhes_pedido_form import DetalhesPedidoForm
                 # Converte o ID para int
                 DetalhesPedidoForm(self, pedido_id=int(pedido_id))
             except ValueError:
@@ -308,5 +734,18 @@ class App(ThemedTk):
 
 
 if __name__ == "__main__":
+    # Perfil de responsividade (PEDIDOS_PERFIL_UI ou --perfil-ui[=cprofile|tracemalloc]):
+    # precisa ser ativado antes de criar a janela para envolver todos os callbacks
+    perfil_ui = ativar_perfil_ui(modo_perfil_ui(sys.argv[1:]))
+    # Instrumentação de SQL (PEDIDOS_SQL_INSTRUMENTAR ou --instrumentar-sql[=explain]): antes da 1ª conexão
+    ativar_instrumentacao(modo_instrumentacao(sys.argv[1:]))
     app = App()
-    app.mainloop()
\ No newline at end of file
+    if perfil_ui:
+        perfil_ui.instalar(app)
+    try:
+        app.mainloop()
+    finally:
+        # _on_fechar já esperou as tarefas em andamento; se alguma ainda roda, fechar a
+        # conexão dela a interromperia no meio, então as conexões ficam para o fim do processo
+        if app.executor_db.desligar(tempo_maximo=0):
+            fechar_conexoes()
\ No newline at end of file
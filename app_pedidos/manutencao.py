@@ -0,0 +1,115 @@
+# manutencao.py
+"""
+Comandos de manutenção do banco, sem abrir a interface.
+
+Uso (a partir da pasta app_pedidos):
+    python manutencao.py reconstruir-resumos [--db caminho/pedidos.db]
+    python manutencao.py importar-clientes clientes.csv [--erros rejeitados.csv]
+    python manutencao.py importar-produtos catalogo.csv [--lote 5000]
+    python manutencao.py importar-pedidos feed.jsonl [--formato csv] [--lote 1000]
+    python manutencao.py --estatisticas-sql sql.json importar-produtos catalogo.csv
+    python manutencao.py --instrumentar-sql importar-pedidos feed.jsonl
+"""
+import argparse
+import logging
+import sys
+import time
+import db
+from utils.data_import import importar_csv, TAMANHO_LOTE_IMPORTACAO
+from utils.ingestao_pedidos import ingerir_arquivo, FORMATOS_INGESTAO
+from utils.instrumentacao_sql import ativar_instrumentacao, exportar_estatisticas, modo_instrumentacao
+from utils.servico_pedidos import TAMANHO_LOTE_PEDIDOS
+
+
+def comando_reconstruir_resumos(args):
+    """Recalcula do zero as tabelas de resumo de vendas (aba Relatórios)."""
+    db.reconstruir_resumos()
+    dias, produtos, clientes = (db.executar_comando(f"SELECT COUNT(*) FROM {tabela}", fetchone=True)[0]
+                                for tabela in ("resumo_vendas_dia", "resumo_vendas_produto", "resumo_vendas_cliente"))
+    print(f"Resumos reconstruídos: {dias} dias, {produtos} produtos, {clientes} clientes.")
+    return 0
+
+
+def _mostrar_progresso(lidos, total):
+    print(f"\r{lidos * 100 // max(total, 1):3d}% do arquivo", end="", file=sys.stderr, flush=True)
+
+
+def comando_importar(args):
+    """Importa (insere ou atualiza) clientes ou produtos de um CSV."""
+    inicio = time.perf_counter()
+    gravadas, rejeitadas, caminho_erros = importar_csv(args.tabela, args.arquivo, args.erros,
+                                                       ao_progresso=_mostrar_progresso, tamanho_lote=args.lote)
+    print(file=sys.stderr)
+    print(f"{gravadas} {args.tabela} importados em {time.perf_counter() - inicio:.1f}s; {rejeitadas} linhas rejeitadas.")
+    if caminho_erros:
+        print(f"Linhas rejeitadas (com o motivo) em: {caminho_erros}")
+    # Código 2: importação concluída, mas com rejeições (útil em scripts)
+    return 2 if rejeitadas else 0
+
+
+def comando_importar_pedidos(args):
+    """Ingere um arquivo de pedidos (JSON Lines ou CSV) em lotes, com baixa de estoque."""
+    inicio = time.perf_counter()
+    gravados, rejeitados, caminho_rejeitados = ingerir_arquivo(args.arquivo, args.formato, args.rejeitados,
+                                                               ao_progresso=_mostrar_progresso,
+                                                               tamanho_lote=args.lote)
+    duracao = time.perf_counter() - inicio
+    print(file=sys.stderr)
+    print(f"{gravados} pedidos gravados em {duracao:.1f}s ({gravados / max(duracao, 1e-9):.0f} pedidos/s); "
+          f"{rejeitados} rejeitados.")
+    if caminho_rejeitados:
+        print(f"Pedidos rejeitados (com o motivo) em: {caminho_rejeitados}")
+    return 2 if rejeitados else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Comandos de manutenção do banco de pedidos.")
+    parser.add_argument("--db", default=None, help="Arquivo do banco (padrão: PEDIDOS_DB ou pedidos.db)")
+    parser.add_argument("--estatisticas-sql", default=None, metavar="ARQUIVO",
+                        help="Exporta ao final as estatísticas de SQL do comando (JSON); liga a instrumentação")
+    # Sem valor opcional (=explain): ele engoliria o nome do comando que vem em seguida
+    parser.add_argument("--instrumentar-sql", action="store_const", const="1", default=None,
+                        help="Instrumenta o SQL e registra as consultas lentas "
+                             "(com PEDIDOS_SQL_INSTRUMENTAR=explain, também o plano)")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    comando = comandos.add_parser("reconstruir-resumos", help="Recalcula as tabelas de resumo de vendas")
+    comando.set_defaults(executar=comando_reconstruir_resumos)
+
+    for tabela in ("clientes", "produtos"):
+        comando = comandos.add_parser(f"importar-{tabela}", help=f"Importa {tabela} de um arquivo CSV")
+        comando.add_argument("arquivo", help="Arquivo CSV com cabeçalho")
+        comando.add_argument("--erros", default=None,
+                             help="Arquivo das linhas rejeitadas (padrão: <arquivo>.erros.csv)")
+        comando.add_argument("--lote", type=int, default=TAMANHO_LOTE_IMPORTACAO, help="Linhas por transação")
+        comando.set_defaults(executar=comando_importar, tabela=tabela)
+
+    comando = comandos.add_parser("importar-pedidos", help="Ingere pedidos de um arquivo JSON Lines ou CSV")
+    comando.add_argument("arquivo", help="Arquivo de pedidos")
+    comando.add_argument("--formato", choices=FORMATOS_INGESTAO, default=None,
+                         help="Formato do arquivo (padrão: pela extensão)")
+    comando.add_argument("--rejeitados", default=None,
+                         help="Arquivo dos pedidos rejeitados (padrão: <arquivo>.rejeitados.jsonl)")
+    comando.add_argument("--lote", type=int, default=TAMANHO_LOTE_PEDIDOS, help="Pedidos por transação")
+    comando.set_defaults(executar=comando_importar_pedidos)
+
+    args = parser.parse_args(argv)
+
+    # Antes da primeira conexão: só as conexões abertas depois são instrumentadas
+    ativar_instrumentacao(modo_instrumentacao([]) or args.instrumentar_sql or ("1" if args.estatisticas_sql else None))
+    if args.db:
+        db.configurar_banco(args.db)
+    db.inicializar_db()
+    try:
+        return args.executar(args)
+    except Exception as e:
+        logging.error(f"Falha ao executar '{args.comando}': {e}")
+        return 1
+    finally:
+        db.fechar_conexoes()
+        if args.estatisticas_sql:
+            exportar_estatisticas(args.estatisticas_sql)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+# Os módulos do app importam uns aos outros a partir de app_pedidos/ (ex: "from db import ...")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db  # noqa: E402
+
+
+@pytest.fixture
+def banco(tmp_path):
+    """Banco temporário com o esquema atual; as conexões voltam ao arquivo padrão ao final."""
+    original = db.gerenciador.db_file
+    db.configurar_banco(str(tmp_path / "pedidos.db"))
+    db.inicializar_db()
+    yield db
+    db.configurar_banco(original)
+
+
+@pytest.fixture
+def catalogo(banco):
+    """Um cliente e dois produtos (com SKU), para os testes de pedidos."""
+    cliente_id = banco.executar_comando("INSERT INTO clientes (nome, email) VALUES ('Ana', 'ana@x.com')")
+    caneta = banco.executar_comando("INSERT INTO produtos (nome, preco, estoque, sku) VALUES ('Caneta', 2.5, 10, '789')")
+    lapis = banco.executar_comando("INSERT INTO produtos (nome, preco, estoque, sku) VALUES ('Lápis', 1.0, 5, '790')")
+    return {"cliente": cliente_id, "caneta": caneta, "lapis": lapis}
@@ -0,0 +1,38 @@
+# tests/test_analises.py
+from datetime import date
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from utils.analises import calcular_analises, carregar_dados  # noqa: E402
+
+
+def _pedido(banco, catalogo, data, quantidade):
+    pedido_id = banco.executar_comando("INSERT INTO pedidos (cliente_id, data, total) VALUES (?, ?, ?)",
+                                       (catalogo["cliente"], data, quantidade * 2.5))
+    banco.executar_comando("INSERT INTO itens_pedido (pedido_id, produto_id, produto_nome, quantidade, preco_unit) "
+                           "VALUES (?, ?, 'Caneta', ?, 2.5)", (pedido_id, catalogo["caneta"], quantidade))
+    return pedido_id
+
+
+def test_pedidos_com_data_invalida_sao_ignorados(banco, catalogo):
+    # Gravados por fora das validações (ex: versões antigas do app): julianday() devolve NULL
+    _pedido(banco, catalogo, "2026-10-01", 3)
+    _pedido(banco, catalogo, "01/10/2026", 4)
+    _pedido(banco, catalogo, "", 5)
+
+    pedidos, _, _, ignorados = carregar_dados(hoje=date(2026, 10, 18))
+    assert ignorados == 2
+    assert len(pedidos["id"]) == 1
+
+    resultado = calcular_analises(hoje=date(2026, 10, 18))
+    assert resultado["pedidos_ignorados"] == 2
+    assert catalogo["cliente"] in resultado["clientes"]
+    # Só as 3 unidades do pedido válido contam: 0,1 un./dia na janela de 30 dias, 10 em estoque
+    assert resultado["produtos"][catalogo["caneta"]] == ("A", 100, 0)
+
+
+def test_sem_pedidos_invalidos(banco, catalogo):
+    _pedido(banco, catalogo, "2026-10-01", 1)
+    assert calcular_analises(hoje=date(2026, 10, 18))["pedidos_ignorados"] == 0
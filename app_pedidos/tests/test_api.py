@@ -0,0 +1,107 @@
+# tests/test_api.py
+import json
+import threading
+import time
+from http.client import HTTPConnection
+
+import pytest
+
+import api
+from utils.fila_escrita import FilaEscrita
+
+
+@pytest.fixture
+def fila(banco):
+    fila = FilaEscrita()
+    fila.iniciar()
+    yield fila
+    fila.parar()
+
+
+def _pedido(referencia="R1", quantidade=1):
+    return {"referencia": referencia, "cliente_email": "ana@x.com", "itens": [{"sku": "789", "quantidade": quantidade}]}
+
+
+def _total_pedidos(banco):
+    return banco.executar_comando("SELECT COUNT(*) FROM pedidos", fetchone=True)[0]
+
+
+def test_fila_descarta_pedido_cancelado(banco, catalogo, fila):
+    liberar = threading.Event()
+    fila.submeter(liberar.wait)  # Ocupa a thread escritora
+    futuro = fila.submeter_pedido(_pedido())
+    assert futuro.cancel()
+    liberar.set()
+    fila.parar()
+    assert _total_pedidos(banco) == 0
+
+
+def test_tempo_esgotado_cancela_a_gravacao(banco, catalogo, fila, monkeypatch):
+    monkeypatch.setattr(api, "TEMPO_LIMITE_ESCRITA", 0.05)
+    liberar = threading.Event()
+    fila.submeter(liberar.wait)
+    with pytest.raises(api.ErroAPI) as erro:
+        api.criar_pedido(fila, _pedido())
+    assert erro.value.status == 503
+    liberar.set()
+    fila.parar()
+    # O cliente recebeu 503: o pedido não pode aparecer gravado depois
+    assert _total_pedidos(banco) == 0
+
+
+def test_tempo_esgotado_com_gravacao_em_andamento_espera_o_resultado(banco, catalogo, fila, monkeypatch):
+    monkeypatch.setattr(api, "TEMPO_LIMITE_ESCRITA", 0.05)
+
+    def gravacao_lenta():
+        time.sleep(0.2)
+        return 42
+
+    assert api._esperar(fila.submeter(gravacao_lenta)) == 42
+
+
+def test_criar_pedido_e_idempotente_pela_referencia(banco, catalogo, fila):
+    status, corpo = api.criar_pedido(fila, _pedido(" R1 "))
+    assert (status, corpo["referencia"]) == (201, "R1")
+    assert api.criar_pedido(fila, _pedido("R1")) == (200, {"id": corpo["id"], "referencia": "R1"})
+    assert _total_pedidos(banco) == 1
+
+
+def test_criar_pedido_concorrente_com_a_mesma_referencia(banco, catalogo, fila):
+    liberar = threading.Event()
+    fila.submeter(liberar.wait)  # Os dois pedidos caem no mesmo lote
+    primeiro = fila.submeter_pedido(_pedido("R2"))
+    resposta = []
+    segundo = threading.Thread(target=lambda: resposta.append(api.criar_pedido(fila, _pedido("R2"))))
+    segundo.start()
+    time.sleep(0.05)
+    liberar.set()
+    segundo.join()
+    assert resposta == [(200, {"id": primeiro.result(), "referencia": "R2"})]
+    assert _total_pedidos(banco) == 1
+
+
+def test_criar_pedido_rejeitado(banco, catalogo, fila):
+    with pytest.raises(api.ErroAPI) as erro:
+        api.criar_pedido(fila, _pedido("R3", quantidade=99))
+    assert erro.value.status == 422
+    assert "Estoque insuficiente" in str(erro.value)
+
+
+def test_post_pedidos_por_http(banco, catalogo, fila):
+    servidor = api.ServidorAPI(("127.0.0.1", 0), threads=2, fila_escrita=fila)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    try:
+        respostas = []
+        for _ in range(2):
+            conexao = HTTPConnection("127.0.0.1", servidor.server_address[1], timeout=5)
+            conexao.request("POST", "/pedidos", body=json.dumps(_pedido("R4")),
+                            headers={"Content-Type": "application/json"})
+            resposta = conexao.getresponse()
+            respostas.append((resposta.status, json.loads(resposta.read())))
+            conexao.close()
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+    assert [status for status, _ in respostas] == [201, 200]
+    assert respostas[0][1]["id"] == respostas[1][1]["id"]
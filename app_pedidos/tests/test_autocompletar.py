@@ -0,0 +1,29 @@
+# tests/test_autocompletar.py
+from utils.autocompletar import IndicePrefixo
+
+NOMES = ["Ana Souza", "Anabela Lima", "João Ana", "José Antunes", "Maria"]
+
+
+def test_buscar_por_prefixo_de_qualquer_palavra():
+    indice = IndicePrefixo(NOMES)
+    assert set(indice.buscar("an")) == {"Ana Souza", "Anabela Lima", "João Ana", "José Antunes"}
+    assert indice.buscar("mar") == ["Maria"]
+
+
+def test_buscar_exige_todas_as_palavras():
+    indice = IndicePrefixo(NOMES)
+    assert indice.buscar("an so") == ["Ana Souza"]
+    assert set(indice.buscar("jo an")) == {"João Ana", "José Antunes"}
+
+
+def test_buscar_ignora_acentos_e_caixa():
+    indice = IndicePrefixo(NOMES)
+    assert indice.buscar("JOAO") == ["João Ana"]
+
+
+def test_buscar_respeita_limite_e_termo_vazio():
+    indice = IndicePrefixo(NOMES)
+    assert len(indice.buscar("a", limite=2)) == 2
+    assert indice.buscar("xyz") == []
+    # Sem termo: os primeiros nomes, na ordem recebida
+    assert indice.buscar("", limite=2) == ["Ana Souza", "Anabela Lima"]
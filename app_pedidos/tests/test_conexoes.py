@@ -0,0 +1,22 @@
+# tests/test_conexoes.py
+import threading
+
+
+def test_thread_curta_fecha_a_propria_conexao(banco):
+    abertas = []
+
+    def executar():
+        try:
+            abertas.append(banco.obter_conexao())
+            banco.executar_comando("SELECT 1", fetchone=True)
+        finally:
+            banco.fechar_conexao_da_thread()
+
+    thread = threading.Thread(target=executar)
+    thread.start()
+    thread.join()
+
+    assert abertas[0] not in banco.gerenciador._conexoes
+    # A conexão da thread principal continua aberta e reaproveitada
+    assert banco.obter_conexao() is banco.obter_conexao()
+    assert banco.obter_conexao() in banco.gerenciador._conexoes
@@ -0,0 +1,36 @@
+# tests/test_executor_db.py
+import threading
+import tkinter
+
+from utils.executor_db import ExecutorDB
+
+
+def _tarefa_bloqueada(liberar, iniciou):
+    iniciou.set()
+    liberar.wait(5)
+    return "ok"
+
+
+def test_desligar_espera_a_tarefa_em_andamento_e_cancela_as_pendentes():
+    executor = ExecutorDB(tkinter.Tcl(), max_workers=1)
+    liberar, iniciou = threading.Event(), threading.Event()
+    rodando = executor.submeter(_tarefa_bloqueada, liberar, iniciou)
+    pendente = executor.submeter(lambda: "nunca")
+    assert iniciou.wait(5)
+
+    threading.Timer(0.2, liberar.set).start()
+    assert executor.desligar() is True
+    assert rodando.result(0) == "ok"
+    assert pendente.cancelled()
+
+
+def test_desligar_desiste_apos_o_tempo_maximo():
+    executor = ExecutorDB(tkinter.Tcl(), max_workers=1)
+    liberar, iniciou = threading.Event(), threading.Event()
+    rodando = executor.submeter(_tarefa_bloqueada, liberar, iniciou)
+    assert iniciou.wait(5)
+
+    assert executor.desligar(tempo_maximo=0.05) is False
+    assert not rodando.done()
+    liberar.set()
+    assert rodando.result(5) == "ok"
@@ -0,0 +1,59 @@
+# tests/test_ingestao_pedidos.py
+import io
+import json
+
+import pytest
+
+from utils.ingestao_pedidos import ingerir_arquivo, ler_pedidos_csv
+
+CSV_PEDIDOS = """Referência,cliente_email,data,sku,quantidade,preco_unit
+MKT-1,ana@x.com,2026-10-18,789,2,
+MKT-1,ana@x.com,2026-10-18,790,1,0.90
+
+MKT-2,ana@x.com,2026-10-18,789,1,
+MKT-1,ana@x.com,2026-10-18,790,1,
+"""
+
+
+def test_ler_pedidos_csv_agrupa_linhas_seguidas_por_referencia():
+    pedidos = list(ler_pedidos_csv(io.StringIO(CSV_PEDIDOS)))
+    assert [(linha, pedido["referencia"], len(pedido["itens"])) for linha, pedido, _ in pedidos] == [
+        (2, "MKT-1", 2), (5, "MKT-2", 1), (6, "MKT-1", 1),
+    ]
+    primeiro = pedidos[0][1]
+    assert primeiro["cliente_email"] == "ana@x.com"
+    assert primeiro["itens"][1] == {"produto_id": None, "sku": "790", "produto": None, "quantidade": "1",
+                                    "preco_unit": "0.90"}
+
+
+def test_ler_pedidos_csv_nao_agrupa_linhas_sem_referencia():
+    csv_pedidos = """referencia,cliente_email,data,sku,quantidade
+,ana@x.com,2026-10-18,789,2
+,bia@x.com,2026-10-19,790,1
+"""
+    pedidos = [(linha, pedido) for linha, pedido, _ in ler_pedidos_csv(io.StringIO(csv_pedidos))]
+    assert [(linha, pedido["cliente_email"], pedido["data"], len(pedido["itens"])) for linha, pedido in pedidos] == [
+        (2, "ana@x.com", "2026-10-18", 1), (3, "bia@x.com", "2026-10-19", 1),
+    ]
+
+
+def test_ler_pedidos_csv_exige_colunas():
+    with pytest.raises(ValueError, match="referencia"):
+        list(ler_pedidos_csv(io.StringIO("sku,quantidade\n789,1\n")))
+
+
+def test_reingerir_o_mesmo_arquivo_nao_duplica(banco, catalogo, tmp_path):
+    arquivo = tmp_path / "feed.csv"
+    arquivo.write_text(CSV_PEDIDOS, encoding="utf-8")
+
+    gravados, rejeitados, caminho_rejeitados = ingerir_arquivo(str(arquivo))
+    # O segundo bloco MKT-1 (linha 6) repete uma referência já gravada
+    assert (gravados, rejeitados) == (2, 1)
+
+    gravados, rejeitados, caminho_rejeitados = ingerir_arquivo(str(arquivo))
+    assert (gravados, rejeitados) == (0, 3)
+    with open(caminho_rejeitados, encoding="utf-8") as f:
+        registros = [json.loads(linha) for linha in f]
+    assert [(r["linha"], r["referencia"]) for r in registros] == [(2, "MKT-1"), (5, "MKT-2"), (6, "MKT-1")]
+    assert all(r["motivo"].startswith("Pedido duplicado") for r in registros)
+    assert banco.executar_comando("SELECT COUNT(*) FROM pedidos", fetchone=True)[0] == 2
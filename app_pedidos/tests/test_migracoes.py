@@ -0,0 +1,51 @@
+# tests/test_migracoes.py
+import db
+
+
+def _banco_na_versao(caminho, versao, monkeypatch):
+    """Arquivo novo migrado só até 'versao' (como um banco de uma versão anterior do app)."""
+    conn = db.criar_conexao(caminho)
+    with monkeypatch.context() as m:
+        m.setattr(db, "MIGRACOES", [mig for mig in db.MIGRACOES if mig[0] <= versao])
+        db.aplicar_migracoes(conn)
+    conn.close()
+
+
+def test_migra_banco_novo_ate_a_versao_atual(tmp_path):
+    conn = db.criar_conexao(str(tmp_path / "pedidos.db"))
+    assert db.aplicar_migracoes(conn) == len(db.MIGRACOES)
+    assert db.versao_esquema(conn) == db.VERSAO_ESQUEMA
+    colunas = {linha[1] for linha in conn.execute("PRAGMA table_info(pedidos)")}
+    assert "referencia" in colunas
+    # Rodar de novo não faz nada
+    assert db.aplicar_migracoes(conn) == 0
+    conn.close()
+
+
+def test_dois_terminais_com_versao_antiga(tmp_path, monkeypatch):
+    """
+    Os dois terminais leem a versão antiga; o primeiro migra antes de o
+    segundo pegar o lock de escrita. O segundo não pode reaplicar as migrações
+    (ex: "duplicate column name: sku").
+    """
+    caminho = str(tmp_path / "pedidos.db")
+    _banco_na_versao(caminho, 4, monkeypatch)
+    terminal_a = db.criar_conexao(caminho)
+    terminal_b = db.criar_conexao(caminho)
+
+    ler_versao = db.versao_esquema
+    aplicadas_a = []
+
+    def versao_lida_antes_do_outro_terminal(conn):
+        versao = ler_versao(conn)
+        if conn is terminal_b and not aplicadas_a:
+            # B já leu a versão antiga; A migra antes do BEGIN IMMEDIATE de B
+            aplicadas_a.append(db.aplicar_migracoes(terminal_a))
+        return versao
+
+    monkeypatch.setattr(db, "versao_esquema", versao_lida_antes_do_outro_terminal)
+    assert db.aplicar_migracoes(terminal_b) == 0
+    assert aplicadas_a == [db.VERSAO_ESQUEMA - 4]
+    assert ler_versao(terminal_b) == db.VERSAO_ESQUEMA
+    terminal_a.close()
+    terminal_b.close()
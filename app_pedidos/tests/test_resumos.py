@@ -0,0 +1,64 @@
+# tests/test_resumos.py
+from utils.relatorios import carregar_painel
+from utils.servico_pedidos import gravar_pedido
+
+
+def _resumos(banco):
+    """Conteúdo das três tabelas de resumo (produtos zerados ficam de fora, ver abaixo)."""
+    return {
+        "dia": banco.executar_comando("SELECT * FROM resumo_vendas_dia ORDER BY data", fetchall=True),
+        "cliente": banco.executar_comando("SELECT * FROM resumo_vendas_cliente ORDER BY cliente_id", fetchall=True),
+        # O trigger de exclusão de itens mantém a linha do produto zerada; a reconstrução não a cria
+        "produto": banco.executar_comando("SELECT * FROM resumo_vendas_produto WHERE quantidade > 0 "
+                                          "ORDER BY produto_nome", fetchall=True),
+    }
+
+
+def _pedidos(catalogo):
+    gravar_pedido(catalogo["cliente"], "2026-10-17", 7.5, [(catalogo["caneta"], "Caneta", 3, 2.5)])
+    gravar_pedido(catalogo["cliente"], "2026-10-18", 6.0, [(catalogo["caneta"], "Caneta", 2, 2.5),
+                                                           (catalogo["lapis"], "Lápis", 1, 1.0)])
+    return gravar_pedido(catalogo["cliente"], "2026-10-18", 2.0, [(catalogo["lapis"], "Lápis", 2, 1.0)])
+
+
+def test_triggers_mantem_os_resumos_ao_inserir(banco, catalogo):
+    _pedidos(catalogo)
+    assert _resumos(banco) == {
+        "dia": [("2026-10-17", 1, 7.5), ("2026-10-18", 2, 8.0)],
+        "cliente": [(catalogo["cliente"], 3, 15.5)],
+        "produto": [("Caneta", 5, 12.5), ("Lápis", 3, 3.0)],
+    }
+    painel = carregar_painel()
+    assert painel["clientes"] == [(catalogo["cliente"], "Ana", 3, 15.5)]
+    assert painel["produtos"][0] == ("Caneta", 5, 12.5)
+
+
+def test_triggers_acompanham_alteracao_e_exclusao(banco, catalogo):
+    ultimo = _pedidos(catalogo)
+    banco.executar_comando("UPDATE pedidos SET data = '2026-10-19', total = 3.0 WHERE id = ?", (ultimo,))
+    banco.executar_comando("UPDATE itens_pedido SET quantidade = 3 WHERE pedido_id = ?", (ultimo,))
+    # Excluir o cliente exclui os pedidos e os itens em cascata
+    outro = banco.executar_comando("INSERT INTO clientes (nome, email) VALUES ('Bia', 'bia@x.com')")
+    gravar_pedido(outro, "2026-10-18", 2.5, [(catalogo["caneta"], "Caneta", 1, 2.5)])
+    banco.executar_comando("DELETE FROM clientes WHERE id = ?", (outro,))
+
+    assert _resumos(banco) == {
+        "dia": [("2026-10-17", 1, 7.5), ("2026-10-18", 1, 6.0), ("2026-10-19", 1, 3.0)],
+        "cliente": [(catalogo["cliente"], 3, 16.5)],
+        "produto": [("Caneta", 5, 12.5), ("Lápis", 4, 4.0)],
+    }
+
+
+def test_reconstruir_resumos_da_o_mesmo_resultado_dos_triggers(banco, catalogo):
+    ultimo = _pedidos(catalogo)
+    banco.executar_comando("DELETE FROM pedidos WHERE id = ?", (ultimo,))
+    # Excluir o produto só desvincula os itens (SET NULL): o nome gravado continua no resumo
+    banco.executar_comando("DELETE FROM produtos WHERE id = ?", (catalogo["lapis"],))
+    pelos_triggers = _resumos(banco)
+
+    banco.executar_comando("DELETE FROM resumo_vendas_dia")
+    banco.executar_comando("UPDATE resumo_vendas_cliente SET faturamento = 0")
+    banco.reconstruir_resumos()
+
+    assert _resumos(banco) == pelos_triggers
+    assert pelos_triggers["produto"] == [("Caneta", 5, 12.5), ("Lápis", 1, 1.0)]
@@ -0,0 +1,114 @@
+# tests/test_servico_pedidos.py
+import pytest
+
+from utils.servico_pedidos import EstoqueInsuficienteError, gravar_lote_pedidos, gravar_pedido, normalizar_pedido
+
+
+def _bruto(**campos):
+    pedido = {"referencia": "MKT-1", "cliente_email": "ana@x.com", "data": "2026-10-18",
+              "itens": [{"sku": "789", "quantidade": 2}]}
+    pedido.update(campos)
+    return pedido
+
+
+def test_normalizar_pedido():
+    bruto = _bruto(referencia=" MKT-1 ", itens=[{"sku": "789", "quantidade": "2"},
+                                                {"produto_id": 7, "quantidade": 1, "preco_unit": "3,50"},
+                                                {"produto": "Lápis", "quantidade": 1, "preco_unit": ""}])
+    assert normalizar_pedido(bruto) == (
+        "MKT-1", ("email", "ana@x.com"), "2026-10-18",
+        [(("sku", "789"), 2, None), (("id", 7), 1, 3.5), (("nome", "Lápis"), 1, None)],
+    )
+
+
+def test_normalizar_pedido_sem_referencia_nem_data():
+    referencia, chave_cliente, data, _ = normalizar_pedido(_bruto(referencia="", cliente_email=None, cliente_id="3",
+                                                                  data=None))
+    assert referencia is None
+    assert chave_cliente == ("id", 3)
+    assert len(data) == 10
+
+
+@pytest.mark.parametrize("campos, motivo", [
+    ({"data": "18/10/2026"}, "Data inválida"),
+    ({"data": "2026-02-30"}, "Data inválida"),
+    ({"cliente_email": None}, "cliente_id ou cliente_email"),
+    ({"itens": []}, "ao menos um item"),
+    ({"itens": [{"sku": "789", "quantidade": 0}]}, "quantidade"),
+    ({"itens": [{"quantidade": 1}]}, "Item sem produto_id"),
+    ({"itens": [{"sku": "789", "quantidade": 1, "preco_unit": float("nan")}]}, "preco_unit inválido"),
+    ({"itens": [{"sku": "789", "quantidade": 1, "preco_unit": "Infinity"}]}, "preco_unit inválido"),
+    ({"itens": [{"sku": "789", "quantidade": 1, "preco_unit": -1}]}, "preco_unit deve ser positivo"),
+])
+def test_normalizar_pedido_rejeita(campos, motivo):
+    with pytest.raises(ValueError, match=motivo):
+        normalizar_pedido(_bruto(**campos))
+
+
+def _estoques(banco):
+    return dict(banco.executar_comando("SELECT nome, estoque FROM produtos", fetchall=True))
+
+
+def test_gravar_pedido_baixa_o_estoque_agregado_por_produto(banco, catalogo):
+    itens = [(catalogo["caneta"], "Caneta", 3, 2.5), (catalogo["caneta"], "Caneta", 2, 2.5),
+             (catalogo["lapis"], "Lápis", 5, 1.0), (None, "Embrulho", 1, 4.0)]
+    pedido_id = gravar_pedido(catalogo["cliente"], "2026-10-18", 21.5, itens)
+
+    assert _estoques(banco) == {"Caneta": 5, "Lápis": 0}
+    linhas = banco.executar_comando("SELECT COUNT(*) FROM itens_pedido WHERE pedido_id = ?", (pedido_id,),
+                                    fetchone=True)
+    assert linhas[0] == 4
+
+
+def test_gravar_pedido_com_falta_lista_todas_e_nao_grava_nada(banco, catalogo):
+    itens = [(catalogo["caneta"], "Caneta", 6, 2.5), (catalogo["caneta"], "Caneta", 5, 2.5),
+             (catalogo["lapis"], "Lápis", 6, 1.0)]
+    with pytest.raises(EstoqueInsuficienteError) as erro:
+        gravar_pedido(catalogo["cliente"], "2026-10-18", 33.5, itens)
+
+    assert sorted(erro.value.faltas) == sorted([(catalogo["caneta"], "Caneta", 11, 10),
+                                                (catalogo["lapis"], "Lápis", 6, 5)])
+    assert _estoques(banco) == {"Caneta": 10, "Lápis": 5}
+    assert banco.executar_comando("SELECT COUNT(*) FROM pedidos", fetchone=True)[0] == 0
+
+
+def test_gravar_pedido_usa_o_estoque_atual_de_outro_terminal(banco, catalogo):
+    outro_terminal = banco.criar_conexao(banco.gerenciador.db_file)
+    outro_terminal.execute("UPDATE produtos SET estoque = 1 WHERE id = ?", (catalogo["lapis"],))
+    outro_terminal.commit()
+    outro_terminal.close()
+
+    with pytest.raises(EstoqueInsuficienteError) as erro:
+        gravar_pedido(catalogo["cliente"], "2026-10-18", 2.0, [(catalogo["lapis"], "Lápis", 2, 1.0)])
+    assert erro.value.faltas == [(catalogo["lapis"], "Lápis", 2, 1)]
+    assert _estoques(banco)["Lápis"] == 1
+
+
+def test_gravar_lote_grava_referencia_e_rejeita_duplicados(banco, catalogo):
+    gravados, rejeitados = gravar_lote_pedidos([_bruto(), _bruto(), _bruto(referencia="MKT-2")])
+    assert [indice for indice, _ in gravados] == [0, 2]
+    assert rejeitados == [(1, "Pedido duplicado: a referência 'MKT-1' já foi gravada.")]
+
+    # Reenvio do mesmo lote: nada é gravado de novo
+    gravados, rejeitados = gravar_lote_pedidos([_bruto(), _bruto(referencia="MKT-2")])
+    assert gravados == []
+    assert [indice for indice, _ in rejeitados] == [0, 1]
+
+    referencias = banco.executar_comando("SELECT referencia FROM pedidos ORDER BY referencia", fetchall=True)
+    assert [referencia for referencia, in referencias] == ["MKT-1", "MKT-2"]
+    assert banco.executar_comando("SELECT estoque FROM produtos WHERE sku = '789'", fetchone=True)[0] == 6
+
+
+def test_gravar_lote_sem_referencia_nao_deduplica(banco, catalogo):
+    gravados, rejeitados = gravar_lote_pedidos([_bruto(referencia=None), _bruto(referencia=None)])
+    assert len(gravados) == 2
+    assert rejeitados == []
+
+
+def test_gravar_lote_rejeita_estoque_insuficiente_sem_afetar_os_demais(banco, catalogo):
+    pedidos = [_bruto(referencia="A", itens=[{"sku": "790", "quantidade": 4}]),
+               _bruto(referencia="B", itens=[{"sku": "790", "quantidade": 4}]),
+               _bruto(referencia="C", itens=[{"sku": "789", "quantidade": 1}])]
+    gravados, rejeitados = gravar_lote_pedidos(pedidos)
+    assert [indice for indice, _ in gravados] == [0, 2]
+    assert rejeitados[0][0] == 1 and rejeitados[0][1].startswith("Estoque insuficiente")
@@ -0,0 +1,39 @@
+# tests/test_validations.py
+import pytest
+
+from utils.validations import validar_data, validar_produto
+
+
+def test_validar_produto_normaliza_campos():
+    assert validar_produto(" Caneta ", "2,50", "3", " 789 ") == (True, ("Caneta", 2.5, 3, "789"))
+    assert validar_produto("Caneta", "2.5", "0") == (True, ("Caneta", 2.5, 0, None))
+
+
+@pytest.mark.parametrize("preco", ["nan", "inf", "-inf", "1e309", "abc", "0", "-1"])
+def test_validar_produto_rejeita_preco_invalido(preco):
+    valido, mensagem = validar_produto("Caneta", preco, "1")
+    assert not valido
+    assert "Preço" in mensagem
+
+
+@pytest.mark.parametrize("estoque", ["-1", "1.5", ""])
+def test_validar_produto_rejeita_estoque_invalido(estoque):
+    assert not validar_produto("Caneta", "1", estoque)[0]
+
+
+def test_validar_produto_exige_nome():
+    assert validar_produto("  ", "1", "1") == (False, "O Nome do produto é obrigatório.")
+
+
+@pytest.mark.parametrize("data, esperado", [
+    ("2025-01-31", True),
+    (" 2024-02-29 ", True),
+    ("2025-02-30", False),
+    ("20250131", False),
+    ("31/01/2025", False),
+    ("2025-1-31", False),
+    ("", False),
+    (None, False),
+])
+def test_validar_data(data, esperado):
+    assert validar_data(data) is esperado
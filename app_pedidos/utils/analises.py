@@ -0,0 +1,201 @@
+# utils/analises.py
+"""
+Análises de estoque e de clientes, vetorizadas com NumPy.
+
+pedidos, itens_pedido e produtos são lidos em lotes (fetchmany) para arrays
+por coluna; todos os cálculos (curva ABC, dias de estoque, sugestão de
+reposição e segmentação RFM) são feitos sobre os arrays inteiros, sem laços
+em Python por item. NumPy é opcional: sem ele, numpy_disponivel() retorna
+False e as colunas de análise ficam desativadas.
+"""
+import importlib.util
+import logging
+import time
+from datetime import date
+from db import obter_conexao
+
+TAMANHO_LOTE_ANALISE = 50000
+
+# Curva ABC: participação acumulada no faturamento até a qual o produto é A / B
+LIMITE_CLASSE_A = 0.80
+LIMITE_CLASSE_B = 0.95
+
+# (R mínimo, R máximo, F mínimo, F máximo, segmento), avaliados nesta ordem
+SEGMENTOS_RFM = (
+    (4, 5, 4, 5, "Campeões"),
+    (3, 5, 3, 5, "Fiéis"),
+    (4, 5, 1, 2, "Novos"),
+    (1, 2, 3, 5, "Em risco"),
+    (1, 2, 1, 2, "Perdidos"),
+)
+SEGMENTO_PADRAO = "Regulares"
+
+
+def numpy_disponivel():
+    return importlib.util.find_spec("numpy") is not None
+
+
+def _carregar_colunas(conn, sql, parametros, campos, tamanho_lote):
+    """Executa 'sql' e devolve {campo: array contíguo}, lendo tamanho_lote linhas por vez."""
+    import numpy as np
+    tipo = np.dtype(campos)
+    cursor = conn.execute(sql, parametros)
+    lotes = []
+    while True:
+        linhas = cursor.fetchmany(tamanho_lote)
+        if not linhas:
+            break
+        lotes.append(np.array(linhas, dtype=tipo))
+    tabela = np.concatenate(lotes) if lotes else np.empty(0, dtype=tipo)
+    return {nome: np.ascontiguousarray(tabela[nome]) for nome, _ in campos}
+
+
+def carregar_dados(hoje=None, tamanho_lote=TAMANHO_LOTE_ANALISE):
+    """
+    Lê as três tabelas para arrays. As datas viram "dias atrás" (em relação a
+    'hoje') já no SQL; itens sem produto (avulsos ou excluídos) têm produto_id 0.
+
+    Pedidos com data que o SQLite não entende (julianday NULL, ex: '18/10/2026'
+    gravado por versões antigas) ficam de fora; os seus itens são lidos, mas,
+    sem pedido correspondente, não entram em nenhum cálculo.
+    Retorna (pedidos, itens, produtos, pedidos ignorados).
+    """
+    hoje = (hoje or date.today()).isoformat()
+    conn = obter_conexao()
+    pedidos = _carregar_colunas(
+        conn,
+        "SELECT id, cliente_id, CAST(julianday(?) - julianday(data) AS INTEGER), total FROM pedidos "
+        "WHERE julianday(data) IS NOT NULL ORDER BY id",
+        (hoje,), [("id", "i8"), ("cliente_id", "i8"), ("dias_atras", "i8"), ("total", "f8")], tamanho_lote)
+    ignorados = conn.execute("SELECT COUNT(*) FROM pedidos WHERE julianday(data) IS NULL").fetchone()[0]
+    itens = _carregar_colunas(
+        conn,
+        "SELECT pedido_id, COALESCE(produto_id, 0), quantidade, quantidade * preco_unit FROM itens_pedido",
+        (), [("pedido_id", "i8"), ("produto_id", "i8"), ("quantidade", "i8"), ("valor", "f8")], tamanho_lote)
+    produtos = _carregar_colunas(
+        conn, "SELECT id, estoque FROM produtos ORDER BY id", (),
+        [("id", "i8"), ("estoque", "i8")], tamanho_lote)
+    return pedidos, itens, produtos, ignorados
+
+
+def _posicoes(ids_ordenados, ids):
+    """Posição de cada id em ids_ordenados e a máscara dos que existem (junção vetorizada)."""
+    import numpy as np
+    posicoes = np.searchsorted(ids_ordenados, ids)
+    posicoes_validas = np.minimum(posicoes, max(len(ids_ordenados) - 1, 0))
+    encontrados = (posicoes < len(ids_ordenados)) & (ids_ordenados[posicoes_validas] == ids)
+    return posicoes_validas, encontrados
+
+
+def curva_abc(faturamento):
+    """Classe ("A", "B", "C") de cada produto pela participação acumulada no faturamento."""
+    import numpy as np
+    classes = np.full(len(faturamento), "C", dtype="<U1")
+    total = faturamento.sum()
+    if total <= 0:
+        return classes
+    ordem = np.argsort(-faturamento, kind="stable")
+    # Participação acumulada *antes* do produto: o que cruza os 80% ainda é A
+    anterior = (np.cumsum(faturamento[ordem]) - faturamento[ordem]) / total
+    vendidos = faturamento[ordem] > 0
+    classes[ordem[vendidos & (anterior < LIMITE_CLASSE_A)]] = "A"
+    classes[ordem[vendidos & (anterior >= LIMITE_CLASSE_A) & (anterior < LIMITE_CLASSE_B)]] = "B"
+    return classes
+
+
+def _quintis(valores):
+    """Nota de 1 a 5 pela posição de cada valor na distribuição (valores iguais, mesma nota)."""
+    import numpy as np
+    if len(valores) == 0:
+        return np.empty(0, dtype="i8")
+    fracao = np.searchsorted(np.sort(valores), valores, side="right") / len(valores)
+    return np.clip(np.ceil(fracao * 5), 1, 5).astype("i8")
+
+
+def analisar_produtos(pedidos, itens, produtos, periodo_abc_dias=365, janela_venda_dias=30,
+                      prazo_reposicao_dias=7, cobertura_dias=14):
+    """
+    {produto_id: (classe ABC, dias de estoque ou None, sugestão de reposição)}.
+
+    - ABC: faturamento dos últimos periodo_abc_dias;
+    - velocidade: unidades vendidas por dia nos últimos janela_venda_dias;
+    - dias de estoque: estoque / velocidade (None se o produto não vendeu na janela);
+    - reposição: o que falta para cobrir prazo_reposicao_dias + cobertura_dias de venda.
+    """
+    import numpy as np
+    n = len(produtos["id"])
+    if n == 0:
+        return {}
+
+    # Junção itens -> pedidos (idade do item) e itens -> produtos (posição no array)
+    pos_pedido, com_pedido = _posicoes(pedidos["id"], itens["pedido_id"])
+    dias_atras = np.where(com_pedido, pedidos["dias_atras"][pos_pedido], np.iinfo("i8").max)
+    pos_produto, com_produto = _posicoes(produtos["id"], itens["produto_id"])
+
+    no_periodo = com_produto & (dias_atras >= 0) & (dias_atras < periodo_abc_dias)
+    faturamento = np.bincount(pos_produto[no_periodo], weights=itens["valor"][no_periodo], minlength=n)
+    classes = curva_abc(faturamento)
+
+    na_janela = com_produto & (dias_atras >= 0) & (dias_atras < janela_venda_dias)
+    vendidos = np.bincount(pos_produto[na_janela], weights=itens["quantidade"][na_janela], minlength=n)
+    velocidade = vendidos / janela_venda_dias
+    estoque = np.maximum(produtos["estoque"], 0)
+    com_venda = velocidade > 0
+    dias_estoque = np.divide(estoque, velocidade, out=np.full(n, np.nan), where=com_venda)
+    sugestao = np.maximum(np.ceil(velocidade * (prazo_reposicao_dias + cobertura_dias)) - estoque, 0).astype("i8")
+
+    return {
+        produto_id: (classe, None if dias != dias else int(dias), repor)  # dias != dias: NaN (sem venda)
+        for produto_id, classe, dias, repor in zip(produtos["id"].tolist(), classes.tolist(),
+                                                   dias_estoque.tolist(), sugestao.tolist())
+    }
+
+
+def segmentar_clientes(pedidos):
+    """
+    {cliente_id: (R, F, M, segmento)} com notas de 1 a 5 por quintis de
+    recência (dias desde o último pedido), frequência (pedidos) e valor (total gasto).
+    Clientes sem pedidos não aparecem.
+    """
+    import numpy as np
+    if len(pedidos["id"]) == 0:
+        return {}
+
+    # Agrupa por cliente ordenando uma vez e reduzindo cada faixa contígua
+    ordem = np.argsort(pedidos["cliente_id"], kind="stable")
+    clientes = pedidos["cliente_id"][ordem]
+    inicios = np.flatnonzero(np.r_[True, clientes[1:] != clientes[:-1]])
+    recencia = np.minimum.reduceat(pedidos["dias_atras"][ordem], inicios)
+    frequencia = np.diff(np.r_[inicios, len(clientes)])
+    valor = np.add.reduceat(pedidos["total"][ordem], inicios)
+
+    nota_r, nota_f, nota_m = _quintis(-recencia), _quintis(frequencia), _quintis(valor)
+    condicoes = [(nota_r >= r_min) & (nota_r <= r_max) & (nota_f >= f_min) & (nota_f <= f_max)
+                 for r_min, r_max, f_min, f_max, _ in SEGMENTOS_RFM]
+    segmentos = np.select(condicoes, [segmento for *_, segmento in SEGMENTOS_RFM], default=SEGMENTO_PADRAO)
+
+    return {
+        cliente_id: (r, f, m, segmento)
+        for cliente_id, r, f, m, segmento in zip(clientes[inicios].tolist(), nota_r.tolist(), nota_f.tolist(),
+                                                 nota_m.tolist(), segmentos.tolist())
+    }
+
+
+def calcular_analises(hoje=None, tamanho_lote=TAMANHO_LOTE_ANALISE):
+    """
+    Todas as análises das abas Produtos e Clientes (roda na thread do ExecutorDB).
+    "pedidos_ignorados" conta os pedidos deixados de fora por data inválida.
+    """
+    inicio = time.perf_counter()
+    pedidos, itens, produtos, ignorados = carregar_dados(hoje, tamanho_lote)
+    carregado = time.perf_counter()
+    resultado = {
+        "produtos": analisar_produtos(pedidos, itens, produtos),
+        "clientes": segmentar_clientes(pedidos),
+        "pedidos_ignorados": ignorados,
+    }
+    if ignorados:
+        logging.warning(f"Análises: {ignorados} pedido(s) com data inválida (use AAAA-MM-DD) ignorado(s).")
+    logging.info(f"Análises: {len(itens['pedido_id'])} itens, {len(pedidos['id'])} pedidos; "
+                 f"leitura {carregado - inicio:.2f}s, cálculo {time.perf_counter() - carregado:.2f}s.")
+    return resultado
@@ -0,0 +1,166 @@
+# utils/autocompletar.py
+import tkinter as tk
+from tkinter import ttk
+from bisect import bisect_left
+from utils.busca_fts import tokens, corresponde
+
+# Máximo de entradas do índice examinadas quando o termo tem várias palavras
+LIMITE_VARREDURA = 5000
+
+
+class IndicePrefixo:
+    """
+    Índice em memória, ordenado, das palavras de uma lista de nomes.
+
+    buscar() localiza o intervalo de palavras com o prefixo digitado por busca
+    binária (O(log n)) e devolve os primeiros nomes do intervalo. A
+    normalização é a mesma da busca FTS: sem acentos e sem diferenciar
+    maiúsculas ("joao" encontra "João").
+    """
+
+    def __init__(self, nomes):
+        self.nomes = list(nomes)
+        pares = sorted({(palavra, nome) for nome in self.nomes for palavra in tokens(nome)})
+        self._palavras = [palavra for palavra, _ in pares]
+        self._nomes_por_palavra = [nome for _, nome in pares]
+
+    def __len__(self):
+        return len(self.nomes)
+
+    def buscar(self, termo, limite=20):
+        """Até 'limite' nomes cujas palavras começam com as palavras do termo."""
+        palavras = tokens(termo)
+        if not palavras:
+            return self.nomes[:limite]
+
+        # A palavra mais longa é a mais seletiva para delimitar o intervalo
+        chave = max(palavras, key=len)
+        inicio = bisect_left(self._palavras, chave)
+        fim = bisect_left(self._palavras, chave + "\uffff")
+        if len(palavras) > 1:
+            fim = min(fim, inicio + LIMITE_VARREDURA)
+
+        resultados = []
+        vistos = set()
+        for i in range(inicio, fim):
+            nome = self._nomes_por_palavra[i]
+            if nome in vistos:
+                continue
+            if len(palavras) > 1 and not corresponde([nome], termo):
+                continue
+            vistos.add(nome)
+            resultados.append(nome)
+            if len(resultados) >= limite:
+                break
+        return resultados
+
+
+class SeletorAutocompletar(ttk.Frame):
+    """
+    Campo de texto com lista de sugestões enquanto o usuário digita.
+
+    buscar(termo, limite, entregar) deve chamar entregar(lista_de_nomes), seja
+    imediatamente (índice em memória) ou depois (consulta em segundo plano).
+    ao_selecionar(nome) é chamado quando uma sugestão é escolhida.
+    """
+
+    def __init__(self, parent, buscar, ao_selecionar=None, textvariable=None, width=30, max_resultados=20,
+                 linhas_visiveis=10):
+        super().__init__(parent)
+        self.buscar = buscar
+        self.ao_selecionar = ao_selecionar
+        self.max_resultados = max_resultados
+        self.linhas_visiveis = linhas_visiveis
+        self.var = textvariable if textvariable is not None else tk.StringVar()
+
+        self.entry = ttk.Entry(self, textvariable=self.var, width=width)
+        self.entry.pack(fill="x", expand=True)
+
+        self._popup = None
+        self._listbox = None
+        self._ignorar_escrita = False
+
+        self.var.trace_add("write", lambda *args: self._ao_digitar())
+        self.entry.bind("<Down>", lambda e: self._mover_selecao(1))
+        self.entry.bind("<Up>", lambda e: self._mover_selecao(-1))
+        self.entry.bind("<Return>", lambda e: self._confirmar())
+        self.entry.bind("<Escape>", lambda e: self._esconder())
+        # Atraso para permitir o clique na lista antes de ela sumir
+        self.entry.bind("<FocusOut>", lambda e: self.after(150, self._esconder))
+
+    def get(self):
+        return self.var.get()
+
+    def set(self, valor):
+        self._ignorar_escrita = True
+        try:
+            self.var.set(valor)
+        finally:
+            self._ignorar_escrita = False
+
+    def focus_set(self):
+        self.entry.focus_set()
+
+    def _ao_digitar(self):
+        if self._ignorar_escrita:
+            return
+        termo = self.var.get()
+        if not termo.strip():
+            self._esconder()
+            return
+        self.buscar(termo, self.max_resultados, self._mostrar)
+
+    def _mostrar(self, nomes):
+        if not nomes or self.focus_get() is not self.entry:
+            self._esconder()
+            return
+
+        if self._popup is None:
+            self._popup = tk.Toplevel(self)
+            self._popup.overrideredirect(True)
+            self._popup.transient(self.winfo_toplevel())
+            self._listbox = tk.Listbox(self._popup, exportselection=False, activestyle="dotbox")
+            self._listbox.pack(fill="both", expand=True)
+            self._listbox.bind("<ButtonRelease-1>", lambda e: self._confirmar())
+
+        self._listbox.delete(0, "end")
+        self._listbox.insert("end", *nomes)
+        self._listbox.configure(height=min(len(nomes), self.linhas_visiveis))
+        self._listbox.selection_set(0)
+
+        x = self.entry.winfo_rootx()
+        y = self.entry.winfo_rooty() + self.entry.winfo_height()
+        self._popup.geometry(f"{max(self.entry.winfo_width(), 200)}x{self._listbox.winfo_reqheight()}+{x}+{y}")
+        self._popup.deiconify()
+        self._popup.lift()
+
+    def _mover_selecao(self, passo):
+        if self._popup is None or not self._listbox.size():
+            return "break"
+        atual = self._listbox.curselection()
+        indice = (atual[0] + passo) if atual else 0
+        indice = max(0, min(indice, self._listbox.size() - 1))
+        self._listbox.selection_clear(0, "end")
+        self._listbox.selection_set(indice)
+        self._listbox.see(indice)
+        return "break"
+
+    def _confirmar(self):
+        if self._popup is None:
+            return None
+        selecionado = self._listbox.curselection()
+        if not selecionado:
+            return None
+        nome = self._listbox.get(selecionado[0])
+        self.set(nome)
+        self.entry.icursor("end")
+        self._esconder()
+        if self.ao_selecionar:
+            self.ao_selecionar(nome)
+        return "break"
+
+    def _esconder(self):
+        if self._popup is not None:
+            self._popup.destroy()
+            self._popup = None
+            self._listbox = None
@@ -0,0 +1,70 @@
+# utils/busca_fts.py
+import re
+import unicodedata
+from db import executar_comando
+
+# As tabelas clientes_fts/produtos_fts (FTS5) são criadas e mantidas por
+# triggers nas migrações do db.py. O tokenizador unicode61 com
+# remove_diacritics=2 ignora acentos ("joao" encontra "João") e os índices de
+# prefixo deixam buscas como "conc*" rápidas.
+
+
+def normalizar(texto):
+    """Minúsculas e sem acentos (mesma normalização do tokenizador do FTS5)."""
+    decomposto = unicodedata.normalize("NFKD", texto or "")
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).lower()
+
+
+def tokens(texto):
+    return re.findall(r"\w+", normalizar(texto))
+
+
+def montar_consulta_fts(termo):
+    """
+    Converte o texto digitado em uma consulta FTS5: cada palavra vira um
+    prefixo entre aspas e todas precisam aparecer (ex: 'joão con' -> '"joao"* "con"*').
+    Retorna None se o termo não tiver nenhuma palavra pesquisável.
+    """
+    palavras = tokens(termo)
+    if not palavras:
+        return None
+    return " ".join(f'"{palavra}"*' for palavra in palavras)
+
+
+def corresponde(valores, termo):
+    """Equivalente em memória da consulta FTS: cada palavra do termo é prefixo de alguma palavra dos valores."""
+    palavras_termo = tokens(termo)
+    palavras_valor = [p for valor in valores if valor for p in tokens(str(valor))]
+    return all(any(p.startswith(t) for p in palavras_valor) for t in palavras_termo)
+
+
+def buscar_clientes(termo, limite):
+    """Busca clientes por nome/e-mail, ordenados por relevância (bm25)."""
+    consulta = montar_consulta_fts(termo)
+    if consulta is None:
+        return []
+    sql = """
+        SELECT c.id, c.nome, c.email, c.telefone
+        FROM clientes_fts f
+        INNER JOIN clientes c ON c.id = f.rowid
+        WHERE clientes_fts MATCH ?
+        ORDER BY f.rank
+        LIMIT ?
+    """
+    return executar_comando(sql, (consulta, limite), fetchall=True)
+
+
+def buscar_produtos(termo, limite, colunas_sql="p.id, p.nome, p.preco, p.estoque, COALESCE(p.sku, '')"):
+    """Busca produtos por nome, ordenados por relevância (bm25)."""
+    consulta = montar_consulta_fts(termo)
+    if consulta is None:
+        return []
+    sql = f"""
+        SELECT {colunas_sql}
+        FROM produtos_fts f
+        INNER JOIN produtos p ON p.id = f.rowid
+        WHERE produtos_fts MATCH ?
+        ORDER BY f.rank
+        LIMIT ?
+    """
+    return executar_comando(sql, (consulta, limite), fetchall=True)
@@ -0,0 +1,150 @@
+# utils/busca_incremental.py
+import logging
+
+
+class BuscaIncremental:
+    """
+    Busca "enquanto digita" com debounce, cancelamento e refinamento em memória.
+
+    - As teclas só disparam a consulta após 'atraso_ms' sem novas alterações.
+    - Uma consulta nova descarta a anterior ainda em andamento (chave do executor).
+    - Se o termo novo apenas estende o anterior e o resultado anterior estava
+      completo (não foi limitado), o filtro é refeito em memória, sem ir ao DB.
+    - O resultado é limitado a 'limite' linhas; mostrar_mais() amplia o limite.
+
+    consultar(termo, limite) roda na thread do ExecutorDB e deve devolver no
+    máximo limite + 1 linhas (a linha extra só indica que há mais resultados).
+    filtrar(linha, termo) deve reproduzir em Python o critério da consulta.
+    exibir(linhas, ha_mais) é chamado na thread do Tk.
+    """
+
+    def __init__(self, root, executor, chave, var_termo, consultar, filtrar, exibir,
+                 atraso_ms=250, limite=500, ao_carregar=None, ao_falhar=None):
+        self.root = root
+        self.executor = executor
+        self.chave = chave
+        self.var_termo = var_termo
+        self.consultar = consultar
+        self.filtrar = filtrar
+        self.exibir = exibir
+        self.atraso_ms = atraso_ms
+        self.limite_inicial = limite
+        self.limite = limite
+        self.ao_carregar = ao_carregar
+        self.ao_falhar = ao_falhar
+
+        self._after_id = None
+        self._termo_atual = None  # Termo cujo resultado está em _linhas
+        self._linhas = []
+        self._completo = False  # _linhas contém todas as linhas do termo atual
+        self._ha_mais = False
+
+        # "write" só dispara quando o texto muda (setas, Shift etc. são ignorados)
+        self.var_termo.trace_add("write", lambda *args: self.agendar())
+
+    def termo(self):
+        return self.var_termo.get().strip()
+
+    def agendar(self):
+        """Reinicia o temporizador de debounce."""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+        self._after_id = self.root.after(self.atraso_ms, self._disparar)
+
+    def _disparar(self):
+        self._after_id = None
+        self.executar(forcar=False)
+
+    def executar(self, forcar=True):
+        """
+        Executa a busca para o termo atual. Com forcar=True sempre consulta o DB
+        (ex: após salvar/excluir um registro); caso contrário tenta refinar em memória.
+        """
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+        termo = self.termo()
+        if not forcar:
+            if termo == self._termo_atual:
+                return
+            if self._pode_refinar(termo):
+                # Descarta consulta ainda em andamento para um termo anterior
+                self.executor.cancelar(self.chave)
+                if self.ao_carregar:
+                    self.ao_carregar(False)
+                termo_lower = termo.lower()
+                self._linhas = [linha for linha in self._linhas if self.filtrar(linha, termo_lower)]
+                self._termo_atual = termo
+                self.exibir(self._linhas, False)
+                return
+            self.limite = self.limite_inicial
+
+        self._consultar_db(termo)
+
+    def mostrar_mais(self):
+        """Amplia o limite de resultados e refaz a consulta."""
+        self.limite += self.limite_inicial
+        self._consultar_db(self.termo())
+
+    def _pode_refinar(self, termo):
+        return (self._completo and self._termo_atual is not None and termo != self._termo_atual
+                and termo.lower().startswith(self._termo_atual.lower()))
+
+    def _consultar_db(self, termo):
+        limite = self.limite
+        if self.ao_carregar:
+            self.ao_carregar(True)
+        self.executor.submeter(self.consultar, termo, limite, chave=self.chave,
+                               ao_concluir=lambda linhas: self._resultado(termo, limite, linhas),
+                               ao_falhar=self._falha)
+
+    def _resultado(self, termo, limite, linhas):
+        if self.ao_carregar:
+            self.ao_carregar(False)
+        linhas = list(linhas or [])
+        ha_mais = len(linhas) > limite
+        self._linhas = linhas[:limite]
+        self._termo_atual = termo
+        self._completo = not ha_mais
+        self._ha_mais = ha_mais
+        self.exibir(self._linhas, ha_mais)
+
+    def aplicar_linha(self, linha):
+        """
+        Aplica uma linha inserida/alterada (identificada por linha[0]) ao
+        resultado atual sem consultar o DB: substitui, acrescenta ou retira a
+        linha conforme ela corresponda ou não ao termo atual.
+        """
+        termo = self._termo_atual or ""
+        corresponde = not termo or self.filtrar(linha, termo.lower())
+        for i, existente in enumerate(self._linhas):
+            if existente[0] == linha[0]:
+                if corresponde:
+                    self._linhas[i] = linha
+                else:
+                    del self._linhas[i]
+                break
+        else:
+            if corresponde:
+                self._linhas.append(linha)
+        self.exibir(self._linhas, self._ha_mais)
+
+    def reexibir(self):
+        """Exibe de novo o resultado atual, sem consultar o DB (ex: colunas calculadas mudaram)."""
+        self.exibir(self._linhas, self._ha_mais)
+
+    def remover_linha(self, id_linha):
+        """Retira do resultado atual a linha com o ID informado (ex: após excluir)."""
+        self._linhas = [linha for linha in self._linhas if linha[0] != id_linha]
+        self.exibir(self._linhas, self._ha_mais)
+
+    def _falha(self, erro):
+        if self.ao_carregar:
+            self.ao_carregar(False)
+        self._termo_atual = None
+        self._completo = False
+        if self.ao_falhar:
+            self.ao_falhar(erro)
+        else:
+            logging.error(f"Erro na busca '{self.chave}': {erro}")
@@ -0,0 +1,116 @@
+# utils/cache_detalhes.py
+import threading
+from collections import OrderedDict
+from db import executar_comando, ler_contadores_alteracao
+
+# Cabeçalho + itens de cada pedido em uma única consulta; o subtotal já vem calculado
+SQL_DETALHES = """
+    SELECT p.id, c.nome, p.data, p.total,
+           i.produto_nome, i.quantidade, i.preco_unit, i.quantidade * i.preco_unit
+    FROM pedidos p
+    INNER JOIN clientes c ON p.cliente_id = c.id
+    LEFT JOIN itens_pedido i ON i.pedido_id = p.id
+    WHERE p.id = ?
+    ORDER BY i.id
+"""
+
+
+class CacheDetalhesPedido:
+    """
+    Cache LRU (limitado a 'max_pedidos') dos detalhes de pedidos já abertos.
+
+    Cada entrada guarda (cabecalho, itens) com os valores já formatados para a
+    Treeview, então reabrir um pedido não vai ao DB nem refaz cálculos. A
+    validade é conferida pelos contadores de alteração (migração 4):
+    - clientes mudou: tudo é descartado (o nome do cliente está no cabeçalho);
+    - pedidos mudou: só as entradas de pedidos que deixaram de existir saem.
+    """
+
+    def __init__(self, max_pedidos=256):
+        self.max_pedidos = max_pedidos
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()  # {pedido_id: (cabecalho, itens)}, do menos para o mais recente
+        self._contadores = None
+        self._versao = 0  # Incrementada a cada invalidação (descarta cargas em andamento)
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def __contains__(self, pedido_id):
+        return pedido_id in self._entradas
+
+    def invalidar(self, pedido_id=None):
+        """Descarta um pedido (ou todos, se pedido_id for None)."""
+        with self._lock:
+            self._versao += 1
+            if pedido_id is None:
+                self._entradas.clear()
+            else:
+                self._entradas.pop(pedido_id, None)
+
+    def _validar(self):
+        """Confere os contadores de alteração e descarta o que ficou desatualizado."""
+        contadores = ler_contadores_alteracao()
+        with self._lock:
+            anteriores = self._contadores
+            self._contadores = contadores
+            if anteriores is None or anteriores == contadores or not self._entradas:
+                return
+            if anteriores.get("clientes") != contadores.get("clientes"):
+                self._versao += 1
+                self._entradas.clear()
+                return
+            if anteriores.get("pedidos") == contadores.get("pedidos"):
+                return
+            ids = list(self._entradas)
+
+        # Pedidos são imutáveis depois de gravados: basta saber quais ainda existem
+        marcadores = ",".join("?" * len(ids))
+        existentes = executar_comando(f"SELECT id FROM pedidos WHERE id IN ({marcadores})", ids,
+                                      fetchall=True) or []
+        existentes = {linha[0] for linha in existentes}
+        with self._lock:
+            for pedido_id in ids:
+                if pedido_id not in existentes:
+                    self._versao += 1
+                    self._entradas.pop(pedido_id, None)
+
+    @staticmethod
+    def _carregar(pedido_id):
+        linhas = executar_comando(SQL_DETALHES, (pedido_id,), fetchall=True)
+        if not linhas:
+            return None
+        cabecalho = linhas[0][:4]
+        itens = [(nome, qtd, f"{preco_unit:.2f}", f"{subtotal:.2f}")
+                 for _, _, _, _, nome, qtd, preco_unit, subtotal in linhas if nome is not None]
+        return cabecalho, itens
+
+    def obter(self, pedido_id):
+        """Retorna (cabecalho, itens) do pedido, ou None se ele não existir."""
+        self._validar()
+        with self._lock:
+            entrada = self._entradas.get(pedido_id)
+            if entrada is not None:
+                self._entradas.move_to_end(pedido_id)
+                return entrada
+            versao = self._versao
+
+        entrada = self._carregar(pedido_id)
+        if entrada is not None:
+            with self._lock:
+                # Não guarda o que foi lido antes de uma invalidação
+                if versao == self._versao:
+                    self._entradas[pedido_id] = entrada
+                    while len(self._entradas) > self.max_pedidos:
+                        self._entradas.popitem(last=False)
+        return entrada
+
+    def pre_carregar(self, pedido_ids):
+        """Carrega os pedidos que ainda não estão no cache (para rodar no ExecutorDB)."""
+        for pedido_id in pedido_ids:
+            if pedido_id not in self._entradas:
+                self.obter(pedido_id)
+
+
+# Instância única usada por toda a aplicação
+cache_detalhes = CacheDetalhesPedido()
@@ -0,0 +1,164 @@
+# utils/cache_referencia.py
+import logging
+import threading
+from db import executar_comando, ler_contadores_alteracao
+from utils.autocompletar import IndicePrefixo
+
+# Acima deste tamanho a tabela não é carregada em memória (nem nomes nem
+# índice): os seletores consultam o índice FTS do banco
+LIMITE_INDICE_MEMORIA = 200000
+
+
+class DadosReferencia:
+    """
+    Cópia imutável (por convenção) de clientes e produtos para lookups rápidos.
+
+    clientes/produtos é None quando a tabela passa de LIMITE_INDICE_MEMORIA:
+    os mapas ficam vazios e clientes_completos/produtos_completos é False.
+    """
+
+    def __init__(self, clientes, produtos):
+        # clientes: [(id, nome)] / produtos: [(id, nome, preco, estoque, sku)], ambos ordenados por nome
+        self.clientes_completos = clientes is not None
+        self.produtos_completos = produtos is not None
+        self.clientes = clientes = clientes or []
+        self.produtos = produtos = produtos or []
+        self.nomes_clientes = [nome for _, nome in clientes]
+        self.nomes_produtos = [nome for _, nome, _, _, _ in produtos]
+        self.clientes_por_nome = {nome: id_c for id_c, nome in clientes}  # {nome: id}
+        self.produtos_por_nome = {nome: (id_p, preco) for id_p, nome, preco, _, _ in produtos}  # {nome: (id, preco)}
+        self.produtos_por_id = {linha[0]: linha for linha in produtos}  # {id: (id, nome, preco, estoque, sku)}
+        # {sku: (id, nome, preco)}: leitura do scanner resolvida com um acesso ao dict
+        self.produtos_por_sku = {sku: (id_p, nome, preco) for id_p, nome, preco, _, sku in produtos if sku}
+        self._indices = {}
+
+    def preparar_indices(self, anterior):
+        """
+        Monta os índices de prefixos (fora da thread do Tk), reaproveitando os
+        do cache anterior se os nomes não mudaram (ex: só o estoque mudou).
+        """
+        for nome_indice, completos, nomes in (("clientes", self.clientes_completos, self.nomes_clientes),
+                                              ("produtos", self.produtos_completos, self.nomes_produtos)):
+            if not completos:
+                continue
+            if anterior is not None and nome_indice in anterior._indices \
+                    and getattr(anterior, "nomes_" + nome_indice) == nomes:
+                self._indices[nome_indice] = anterior._indices[nome_indice]
+            else:
+                self._indices[nome_indice] = IndicePrefixo(nomes)
+
+    @property
+    def indice_clientes(self):
+        """IndicePrefixo dos nomes de clientes (None até ficar pronto ou se o catálogo for grande demais)."""
+        return self._indices.get("clientes")
+
+    @property
+    def indice_produtos(self):
+        """IndicePrefixo dos nomes de produtos (None até ficar pronto ou se o catálogo for grande demais)."""
+        return self._indices.get("produtos")
+
+
+class CacheReferencia:
+    """
+    Cache de clientes/produtos compartilhado por toda a aplicação.
+
+    A carga vai ao banco e por isso roda no ExecutorDB (atualizar()); na
+    thread do Tk os formulários só leem atual(), que devolve os últimos dados
+    carregados: os anteriores continuam valendo até a recarga terminar, e os
+    novos chegam pelo callback de atualizar(). O cache é recarregado quando:
+    - invalidar() é chamado (saves em ClienteForm, ProdutoForm e PedidoForm);
+    - a versão de clientes ou de produtos em contadores_alteracao muda, ou
+      seja, alguém (outro processo, a API, outra thread) alterou essas
+      tabelas. Commits que só mexem em outras tabelas não recarregam nada.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lock_carga = threading.Lock()  # Uma recarga por vez
+        self._dados = None
+        self._versao = 0  # Incrementada a cada invalidar()
+        self._versao_carregada = -1
+        self._contadores = None
+
+    @property
+    def versao(self):
+        return self._versao
+
+    def invalidar(self):
+        """Marca o cache como desatualizado (a próxima leitura recarrega)."""
+        with self._lock:
+            self._versao += 1
+
+    def atual(self):
+        """Últimos dados carregados (ou None), sem ir ao banco: seguro na thread do Tk."""
+        return self._dados
+
+    @staticmethod
+    def _contadores_atuais():
+        contadores = ler_contadores_alteracao()
+        return contadores.get("clientes"), contadores.get("produtos")
+
+    def obter(self):
+        """
+        Retorna os dados de referência, recarregando-os apenas se algo mudou.
+        Vai ao banco: chamar fora da thread do Tk (ver atualizar()).
+        """
+        with self._lock_carga:
+            # Lidos antes da carga: uma alteração no meio do caminho só faz a
+            # próxima chamada recarregar de novo
+            contadores = self._contadores_atuais()
+            with self._lock:
+                atual = (self._dados is not None and self._versao_carregada == self._versao
+                         and contadores == self._contadores)
+                if atual:
+                    return self._dados
+                versao = self._versao
+                anterior = self._dados
+
+            dados = self._carregar()
+            with self._lock:
+                self._dados = dados
+                self._versao_carregada = versao
+                self._contadores = contadores
+            # Publicados antes dos índices: até eles ficarem prontos os
+            # seletores usam o FTS do banco
+            dados.preparar_indices(anterior)
+            return dados
+
+    def buscar_sku(self, codigo):
+        """
+        Retorna (dados, (id, nome, preco) ou None) para o código lido. Vai ao
+        banco: recarrega se preciso e, com o catálogo grande demais para a
+        memória, consulta o índice único do SKU.
+        """
+        dados = self.obter()
+        if dados.produtos_completos:
+            return dados, dados.produtos_por_sku.get(codigo)
+        linha = executar_comando("SELECT id, nome, preco FROM produtos WHERE sku = ?", (codigo,), fetchone=True)
+        return dados, tuple(linha) if linha else None
+
+    def atualizar(self, executor_db, ao_concluir=None, widget=None):
+        """
+        Recarrega (se preciso) no ExecutorDB; ao_concluir(dados) roda na
+        thread do Tk com os dados em vigor.
+        """
+        return executor_db.submeter(self.obter, ao_concluir=ao_concluir, widget=widget)
+
+    @staticmethod
+    def _carregar_tabela(tabela, sql):
+        total = executar_comando(f"SELECT COUNT(*) FROM {tabela}", fetchone=True)
+        if total and total[0] > LIMITE_INDICE_MEMORIA:
+            logging.info(f"Cache de referência: {total[0]} {tabela}, acima do limite; usando o FTS do banco.")
+            return None
+        return executar_comando(sql, fetchall=True) or []
+
+    @classmethod
+    def _carregar(cls):
+        clientes = cls._carregar_tabela("clientes", "SELECT id, nome FROM clientes ORDER BY nome")
+        produtos = cls._carregar_tabela("produtos", "SELECT id, nome, preco, estoque, sku FROM produtos ORDER BY nome")
+        dados = DadosReferencia(clientes, produtos)
+        logging.info(f"Cache de referência carregado: {len(dados.clientes)} clientes, {len(dados.produtos)} produtos.")
+        return dados
+
+# Instância única usada por toda a aplicação
+cache_referencia = CacheReferencia()
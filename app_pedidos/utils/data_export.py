@@ -1,9 +1,18 @@
 # utils/data_export.py
 import csv
+import json
 import logging
+import os
 from tkinter import filedialog, messagebox
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+from db import criar_conexao, gerenciador, executar_comando
+
+# Linhas lidas do cursor por vez na exportação em lote (a memória não cresce com o período)
+TAMANHO_LOTE_EXPORTACAO = 5000
+
+FORMATOS_EXPORTACAO = ("csv", "jsonl")
+
+COLUNAS_EXPORTACAO = ["pedido_id", "data", "cliente_id", "cliente", "total_pedido",
+                      "produto_id", "produto", "quantidade", "preco_unit", "subtotal"]
 
 
 def exportar_pedido_csv(pedido_id, dados_pedido, itens_pedido):
@@ -44,8 +53,14 @@ def exportar_pedido_csv(pedido_id, dados_pedido, itens_pedido):
 
 
 def exportar_pedido_pdf(pedido_id, dados_pedido, itens_pedido):
-    """Exporta um pedido para PDF simples (Requer reportlab)."""
+    """Exporta um pedido para PDF, paginado se for longo (Requer reportlab)."""
     # Instalação: pip install reportlab
+    try:
+        from utils.pdf_lote import RenderizadorPedidos
+        renderizador = RenderizadorPedidos()
+    except ImportError:
+        messagebox.showerror("Erro", "A biblioteca 'reportlab' não está instalada. Execute 'pip install reportlab'.")
+        return
 
     file_path = filedialog.asksaveasfilename(
         defaultextension=".pdf",
@@ -57,59 +72,153 @@ def exportar_pedido_pdf(pedido_id, dados_pedido, itens_pedido):
         return
 
     try:
-        c = canvas.Canvas(file_path, pagesize=letter)
-        width, height = letter  # 612x792
-
-        # Título
-        c.setFont("Helvetica-Bold", 16)
-        c.drawString(50, height - 50, f"Detalhes do Pedido #{pedido_id}")
-
-        # Dados do Pedido
-        c.setFont("Helvetica", 12)
-        y = height - 80
-        c.drawString(50, y, f"Cliente: {dados_pedido['nome_cliente']}")
-        c.drawString(50, y - 20, f"Data: {dados_pedido['data']}")
-
-        # Tabela de Itens (simplificada)
-        c.setFont("Helvetica-Bold", 10)
-        y -= 50
-        c.drawString(50, y, "Produto")
-        c.drawString(250, y, "Qtd")
-        c.drawString(350, y, "Preço Unit.")
-        c.drawString(500, y, "Subtotal")
-
-        c.setFont("Helvetica", 10)
-        y -= 15
-        for produto, qtd, preco in itens_pedido:
-            subtotal = qtd * preco
-            c.drawString(50, y, produto)
-            c.drawString(250, y, str(qtd))
-            c.drawString(350, y, f"R$ {preco:.2f}")
-            c.drawString(500, y, f"R$ {subtotal:.2f}")
-            y -= 15
-
-        # Total
-        y -= 30
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(50, y, f"TOTAL DO PEDIDO: R$ {dados_pedido['total']:.2f}")
-
-        c.save()
+        cabecalho = (pedido_id, dados_pedido['nome_cliente'], dados_pedido['data'], dados_pedido['total'])
+        itens = [(produto, qtd, preco, qtd * preco) for produto, qtd, preco in itens_pedido]
+        renderizador.gravar(file_path, [(cabecalho, itens)])
 
         messagebox.showinfo("Sucesso", f"Pedido exportado para PDF em:\n{file_path}")
 
-    except ImportError:
-        messagebox.showerror("Erro", "A biblioteca 'reportlab' não está instalada. Execute 'pip install reportlab'.")
     except Exception as e:
         logging.error(f"Erro ao exportar PDF: {e}")
         messagebox.showerror("Erro", f"Falha ao exportar para PDF: {e}")
 
-# --- FILTRO POR INTERVALO DE DATAS (Implementação no main.py ou em uma nova view) ---
-# O filtro por intervalo de datas deve ser implementado na view (main.py ou nova)
-# que lista os pedidos (você ainda não criou uma view de lista de pedidos, mas a lógica SQL seria:
-#
-# def buscar_pedidos_por_data(data_inicio, data_fim):
-#     sql = "SELECT * FROM pedidos WHERE data BETWEEN ? AND ?"
-#     return executar_comando(sql, (data_inicio, data_fim), fetchall=True)
-#
-# Isso envolveria adicionar campos de data_inicio e data_fim e um botão de filtro
-# na sua lista de pedidos.
\ No newline at end of file
+
+# --- Exportação em lote (período e/ou clientes) ---
+
+class ExportacaoCancelada(Exception):
+    """A exportação foi interrompida pelo usuário; o arquivo parcial é descartado."""
+
+
+def _filtro_pedidos(data_inicio, data_fim, cliente_ids):
+    condicoes, parametros = [], []
+    if data_inicio:
+        condicoes.append("p.data >= ?")
+        parametros.append(data_inicio)
+    if data_fim:
+        condicoes.append("p.data <= ?")
+        parametros.append(data_fim)
+    if cliente_ids:
+        condicoes.append(f"p.cliente_id IN ({','.join('?' * len(cliente_ids))})")
+        parametros.extend(cliente_ids)
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    return where, parametros
+
+
+def listar_pedidos(data_inicio=None, data_fim=None, cliente_ids=None):
+    """IDs dos pedidos do filtro, na ordem (data, id). Usado pela geração de PDFs em lote."""
+    where, parametros = _filtro_pedidos(data_inicio, data_fim, cliente_ids)
+    linhas = executar_comando(f"SELECT p.id FROM pedidos p {where} ORDER BY p.data, p.id", parametros,
+                              fetchall=True) or []
+    return [linha[0] for linha in linhas]
+
+
+def _escrever_csv(arquivo):
+    writer = csv.writer(arquivo)
+    writer.writerow(COLUNAS_EXPORTACAO)
+
+    def escrever(linhas):
+        writer.writerows(linhas)
+
+    return escrever
+
+
+def _escrever_jsonl(arquivo):
+    # Um objeto por pedido, com seus itens; só o pedido corrente fica em memória
+    atual = {"pedido": None}
+
+    def descarregar():
+        if atual["pedido"] is not None:
+            arquivo.write(json.dumps(atual["pedido"], ensure_ascii=False))
+            arquivo.write("\n")
+            atual["pedido"] = None
+
+    def escrever(linhas):
+        if linhas is None:
+            descarregar()
+            return
+        for pedido_id, data, cliente_id, cliente, total, produto_id, produto, qtd, preco_unit, subtotal in linhas:
+            pedido = atual["pedido"]
+            if pedido is None or pedido["pedido_id"] != pedido_id:
+                descarregar()
+                pedido = atual["pedido"] = {"pedido_id": pedido_id, "data": data, "cliente_id": cliente_id,
+                                            "cliente": cliente, "total": total, "itens": []}
+            if produto is not None:
+                pedido["itens"].append({"produto_id": produto_id, "produto": produto, "quantidade": qtd,
+                                        "preco_unit": preco_unit, "subtotal": subtotal})
+
+    return escrever
+
+
+def exportar_pedidos(caminho, formato="csv", data_inicio=None, data_fim=None, cliente_ids=None,
+                     ao_progresso=None, cancelado=None, tamanho_lote=TAMANHO_LOTE_EXPORTACAO):
+    """
+    Exporta pedidos e itens (uma linha por item) em streaming para CSV ou JSON Lines.
+
+    As linhas são lidas do cursor com fetchmany() e gravadas à medida que
+    chegam, então a memória usada não depende do tamanho do período. Pode
+    rodar em uma thread própria: ao_progresso(pedidos_exportados,
+    total_pedidos) é chamado a cada lote e, se o threading.Event 'cancelado'
+    for sinalizado, a exportação para com ExportacaoCancelada. O arquivo só
+    aparece em 'caminho' se a exportação terminar (é gravado em
+    caminho + ".parcial" e renomeado no fim).
+
+    Retorna (pedidos_exportados, linhas_exportadas).
+    """
+    if formato not in FORMATOS_EXPORTACAO:
+        raise ValueError(f"Formato de exportação inválido: {formato}")
+
+    where, parametros = _filtro_pedidos(data_inicio, data_fim, cliente_ids)
+    # Percorre idx_pedidos_data_id na ordem e busca os itens de cada pedido pelo índice de pedido_id
+    sql = f"""
+        SELECT p.id, p.data, c.id, c.nome, p.total,
+               i.produto_id, i.produto_nome, i.quantidade, i.preco_unit, i.quantidade * i.preco_unit
+        FROM pedidos p
+        INNER JOIN clientes c ON p.cliente_id = c.id
+        LEFT JOIN itens_pedido i ON i.pedido_id = p.id
+        {where}
+        ORDER BY p.data, p.id, i.id
+    """
+
+    # Conexão própria: a leitura longa não ocupa a conexão de nenhuma outra thread
+    conn = criar_conexao(gerenciador.db_file)
+    if conn is None:
+        raise OSError("Não foi possível estabelecer a conexão com o banco de dados.")
+
+    parcial = caminho + ".parcial"
+    pedidos = linhas_exportadas = 0
+    try:
+        total_pedidos = conn.execute(f"SELECT COUNT(*) FROM pedidos p {where}", parametros).fetchone()[0]
+        if ao_progresso:
+            ao_progresso(0, total_pedidos)
+
+        cursor = conn.execute(sql, parametros)
+        with open(parcial, "w", newline="", encoding="utf-8") as arquivo:
+            escrever = _escrever_csv(arquivo) if formato == "csv" else _escrever_jsonl(arquivo)
+            ultimo_pedido = None
+            while True:
+                if cancelado is not None and cancelado.is_set():
+                    raise ExportacaoCancelada()
+                lote = cursor.fetchmany(tamanho_lote)
+                if not lote:
+                    break
+                for linha in lote:
+                    if linha[0] != ultimo_pedido:
+                        ultimo_pedido = linha[0]
+                        pedidos += 1
+                escrever(lote)
+                linhas_exportadas += len(lote)
+                if ao_progresso:
+                    ao_progresso(pedidos, total_pedidos)
+            if formato == "jsonl":
+                escrever(None)
+        cursor.close()
+        os.replace(parcial, caminho)
+    except BaseException:
+        if os.path.exists(parcial):
+            os.remove(parcial)
+        raise
+    finally:
+        conn.close()
+
+    logging.info(f"Exportação concluída: {pedidos} pedidos, {linhas_exportadas} linhas em {caminho}")
+    return pedidos, linhas_exportadas
\ No newline at end of file
@@ -0,0 +1,240 @@
+# utils/data_import.py
+import csv
+import logging
+import os
+import sqlite3
+from contextlib import contextmanager
+from db import transacao, repetir_se_ocupado
+from utils.busca_fts import normalizar
+from utils.validations import validar_cliente, validar_produto
+
+# Linhas validadas e gravadas por transação (a memória não cresce com o arquivo)
+TAMANHO_LOTE_IMPORTACAO = 5000
+
+# Colunas aceitas no cabeçalho do CSV (sem acentos/maiúsculas: "Preço" vale como "preco")
+COLUNAS_IMPORTACAO = {
+    "clientes": ("nome", "email", "telefone"),
+    "produtos": ("nome", "preco", "estoque", "sku"),
+}
+COLUNAS_OBRIGATORIAS = {
+    "clientes": ("nome",),
+    "produtos": ("nome", "preco"),
+}
+# Valor usado quando a coluna opcional não existe no arquivo ou a célula está vazia
+VALORES_PADRAO = {"estoque": "0"}
+
+# Upsert pela chave única de cada tabela. O WHERE evita reescrever (e disparar os
+# triggers de FTS, contadores etc.) linhas que não mudaram ao reimportar um arquivo.
+SQL_IMPORTACAO = {
+    "clientes": """
+        INSERT INTO clientes (nome, email, telefone) VALUES (?, ?, ?)
+        ON CONFLICT(email) DO UPDATE SET nome = excluded.nome, telefone = excluded.telefone
+        WHERE nome IS NOT excluded.nome OR telefone IS NOT excluded.telefone
+    """,
+    "produtos": """
+        INSERT INTO produtos (nome, preco, estoque, sku) VALUES (?, ?, ?, ?)
+        ON CONFLICT(nome) DO UPDATE SET preco = excluded.preco, estoque = excluded.estoque, sku = excluded.sku
+        WHERE preco IS NOT excluded.preco OR estoque IS NOT excluded.estoque OR sku IS NOT excluded.sku
+    """,
+}
+
+# Trigger que indexa cada linha inserida no FTS e o INSERT que indexa de uma vez as
+# linhas novas do lote (id > maior id anterior: as tabelas usam AUTOINCREMENT)
+FTS_IMPORTACAO = {
+    "clientes": ("clientes_fts_ai",
+                 "INSERT INTO clientes_fts (rowid, nome, email) SELECT id, nome, email FROM clientes WHERE id > ?"),
+    "produtos": ("produtos_fts_ai",
+                 "INSERT INTO produtos_fts (rowid, nome) SELECT id, nome FROM produtos WHERE id > ?"),
+}
+
+VALIDADORES = {
+    "clientes": validar_cliente,
+    "produtos": validar_produto,
+}
+
+
+class ImportacaoCancelada(Exception):
+    """Importação interrompida pelo usuário (os lotes já gravados permanecem)."""
+
+
+def caminho_erros_padrao(caminho):
+    """arquivo.csv -> arquivo.erros.csv"""
+    base, _ = os.path.splitext(caminho)
+    return base + ".erros.csv"
+
+
+def _detectar_dialeto(arquivo):
+    """Aceita CSV separado por vírgula, ponto e vírgula (Excel pt-BR) ou tabulação."""
+    amostra = arquivo.read(64 * 1024)
+    arquivo.seek(0)
+    try:
+        return csv.Sniffer().sniff(amostra, delimiters=",;\t")
+    except csv.Error:
+        return csv.excel
+
+
+def _posicoes_colunas(tabela, cabecalho):
+    """{coluna: índice no arquivo (ou None)}; ValueError se faltar coluna obrigatória."""
+    normalizado = [normalizar(nome).strip() for nome in cabecalho]
+    posicoes = {coluna: (normalizado.index(coluna) if coluna in normalizado else None)
+                for coluna in COLUNAS_IMPORTACAO[tabela]}
+    faltando = [coluna for coluna in COLUNAS_OBRIGATORIAS[tabela] if posicoes[coluna] is None]
+    if faltando:
+        raise ValueError(f"Coluna(s) obrigatória(s) ausente(s) no cabeçalho: {', '.join(faltando)}")
+    return posicoes
+
+
+class _ArquivoErros:
+    """Arquivo de linhas rejeitadas, criado só quando a primeira rejeição acontece."""
+
+    def __init__(self, caminho, cabecalho):
+        self.caminho = caminho
+        self.cabecalho = cabecalho
+        self.total = 0
+        self._arquivo = None
+        self._writer = None
+
+    def gravar(self, numero_linha, linha, erro):
+        if self._writer is None:
+            self._arquivo = open(self.caminho, "w", newline="", encoding="utf-8")
+            self._writer = csv.writer(self._arquivo)
+            self._writer.writerow(["linha", "erro"] + self.cabecalho)
+        self._writer.writerow([numero_linha, erro] + linha)
+        self.total += 1
+
+    def fechar(self):
+        if self._arquivo is not None:
+            self._arquivo.close()
+
+
+def _validar_lote(tabela, posicoes, lote, erros):
+    """Valida o lote inteiro de uma vez; devolve [(nº da linha, linha, valores)] das válidas."""
+    validar = VALIDADORES[tabela]
+    indices = [(posicoes[coluna], VALORES_PADRAO.get(coluna, "")) for coluna in COLUNAS_IMPORTACAO[tabela]]
+    validos = []
+    for numero_linha, linha in lote:
+        campos = [(linha[i].strip() if i is not None and i < len(linha) else "") or padrao for i, padrao in indices]
+        ok, resultado = validar(*campos)
+        if ok:
+            validos.append((numero_linha, linha, resultado))
+        else:
+            erros.gravar(numero_linha, linha, resultado)
+    return validos
+
+
+@contextmanager
+def _fts_em_lote(conn, tabela):
+    """
+    Dentro da transação do lote, troca a indexação FTS linha a linha (trigger
+    de INSERT) por um único INSERT ... SELECT no fim, várias vezes mais rápido.
+    O DROP/CREATE do trigger faz parte da mesma transação: outras conexões
+    nunca veem a tabela sem ele, e um rollback o restaura.
+    """
+    trigger, sql_indexar = FTS_IMPORTACAO[tabela]
+    definicao = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+                             (trigger,)).fetchone()
+    if definicao is None:
+        yield
+        return
+    maior_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {tabela}").fetchone()[0]
+    conn.execute(f"DROP TRIGGER {trigger}")
+    yield
+    conn.execute(sql_indexar, (maior_id,))
+    conn.execute(definicao[0])
+
+
+def _gravar_lote(tabela, validos, erros):
+    """
+    Grava o lote com um único executemany em uma transação. Se alguma linha
+    violar uma restrição (ex: SKU de outro produto), o lote é desfeito e refeito
+    linha a linha para gravar as boas e rejeitar só as conflitantes.
+    """
+    sql = SQL_IMPORTACAO[tabela]
+    try:
+        with transacao(imediata=True) as conn, _fts_em_lote(conn, tabela):
+            conn.executemany(sql, [valores for _, _, valores in validos])
+        return len(validos)
+    except sqlite3.IntegrityError:
+        pass
+
+    gravadas = 0
+    rejeitadas = []
+    with transacao(imediata=True) as conn, _fts_em_lote(conn, tabela):
+        for numero_linha, linha, valores in validos:
+            try:
+                conn.execute(sql, valores)
+                gravadas += 1
+            except sqlite3.IntegrityError as e:
+                rejeitadas.append((numero_linha, linha, f"Conflito com registro existente: {e}"))
+    # Só depois do commit: se a transação for repetida (banco ocupado), nada é registrado em dobro
+    for rejeitada in rejeitadas:
+        erros.gravar(*rejeitada)
+    return gravadas
+
+
+def _processar_lote(tabela, posicoes, lote, erros, cancelado):
+    if cancelado is not None and cancelado.is_set():
+        raise ImportacaoCancelada()
+    validos = _validar_lote(tabela, posicoes, lote, erros)
+    if not validos:
+        return 0
+    return repetir_se_ocupado(_gravar_lote, tabela, validos, erros)
+
+
+def importar_csv(tabela, caminho, caminho_erros=None, ao_progresso=None, cancelado=None,
+                 tamanho_lote=TAMANHO_LOTE_IMPORTACAO):
+    """
+    Importa clientes ou produtos de um CSV em streaming (insere ou atualiza).
+
+    O arquivo é lido em lotes de tamanho_lote linhas; cada lote é validado com
+    as mesmas regras dos formulários e gravado em uma transação própria. As
+    linhas rejeitadas vão para caminho_erros (padrão: arquivo.erros.csv), com
+    o número da linha e o motivo. Pode rodar em uma thread própria:
+    ao_progresso(bytes_lidos, bytes_totais) é chamado a cada lote e, se o
+    threading.Event 'cancelado' for sinalizado, a importação para com
+    ImportacaoCancelada.
+
+    Retorna (linhas_gravadas, linhas_rejeitadas, caminho_erros ou None).
+    """
+    if tabela not in COLUNAS_IMPORTACAO:
+        raise ValueError(f"Tabela de importação inválida: {tabela}")
+    caminho_erros = caminho_erros or caminho_erros_padrao(caminho)
+    if os.path.exists(caminho_erros):
+        os.remove(caminho_erros)  # Não mistura rejeições de uma importação anterior
+
+    total_bytes = os.path.getsize(caminho)
+    gravadas = 0
+    # utf-8-sig: ignora o BOM que o Excel grava no início do arquivo
+    with open(caminho, newline="", encoding="utf-8-sig") as arquivo:
+        leitor = csv.reader(arquivo, _detectar_dialeto(arquivo))
+        cabecalho = next(leitor, None)
+        if not cabecalho:
+            raise ValueError("O arquivo está vazio.")
+        posicoes = _posicoes_colunas(tabela, cabecalho)
+        erros = _ArquivoErros(caminho_erros, cabecalho)
+
+        try:
+            if ao_progresso:
+                ao_progresso(0, total_bytes)
+            lote = []
+            for linha in leitor:
+                if not any(campo.strip() for campo in linha):
+                    continue  # Linhas em branco são ignoradas
+                # line_num: linha física do arquivo (conta as quebras dentro de campos entre aspas)
+                lote.append((leitor.line_num, linha))
+                if len(lote) < tamanho_lote:
+                    continue
+                gravadas += _processar_lote(tabela, posicoes, lote, erros, cancelado)
+                lote = []
+                if ao_progresso:
+                    ao_progresso(arquivo.buffer.tell(), total_bytes)
+            if lote:
+                gravadas += _processar_lote(tabela, posicoes, lote, erros, cancelado)
+            if ao_progresso:
+                ao_progresso(total_bytes, total_bytes)
+        finally:
+            erros.fechar()
+
+    logging.info(f"Importação de {tabela} concluída: {gravadas} linhas gravadas, {erros.total} rejeitadas.")
+    return gravadas, erros.total, (caminho_erros if erros.total else None)
+
@@ -0,0 +1,142 @@
+# utils/executor_db.py
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError, wait
+from utils.perfil_ui import chamar_medido
+
+
+class ExecutorDB:
+    """
+    Executa funções de banco de dados fora da thread do Tk.
+
+    As tarefas rodam em um pequeno pool de threads (cada thread usa a sua
+    conexão compartilhada do db.py) e os resultados voltam para a thread do Tk
+    por uma fila consumida periodicamente com after(), nunca diretamente.
+    """
+
+    def __init__(self, root, max_workers=2, intervalo_ms=15):
+        self.root = root
+        self.intervalo_ms = intervalo_ms
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="executor-db")
+        self._resultados = queue.Queue()
+        self._lock = threading.Lock()
+        self._geracoes = {}  # {chave: geração da tarefa mais recente}
+        self._futures = {}  # {chave: Future da tarefa mais recente}
+        self._nao_concluidas = set()  # Futures ainda não terminados (esperados em desligar)
+        self._ativo = True
+        self._after_id = self.root.after(self.intervalo_ms, self._processar_resultados)
+
+    def submeter(self, funcao, *args, ao_concluir=None, ao_falhar=None, chave=None, widget=None, **kwargs):
+        """
+        Agenda funcao(*args, **kwargs) no pool e retorna o Future.
+
+        ao_concluir(resultado) e ao_falhar(exc) são chamados na thread do Tk.
+        Se 'chave' for informada, uma nova tarefa com a mesma chave substitui a
+        anterior: a antiga é cancelada (se ainda não começou) e seu resultado é
+        descartado. Se 'widget' for informado e já tiver sido destruído, os
+        callbacks não são chamados.
+        """
+        geracao = None
+        if chave is not None:
+            with self._lock:
+                geracao = self._geracoes.get(chave, 0) + 1
+                self._geracoes[chave] = geracao
+                anterior = self._futures.get(chave)
+                if anterior is not None:
+                    anterior.cancel()
+
+        future = self._pool.submit(funcao, *args, **kwargs)
+        with self._lock:
+            self._nao_concluidas.add(future)
+            if chave is not None:
+                self._futures[chave] = future
+
+        def _ao_terminar(f):
+            with self._lock:
+                self._nao_concluidas.discard(f)
+            self._resultados.put((f, chave, geracao, ao_concluir, ao_falhar, widget))
+
+        future.add_done_callback(_ao_terminar)
+        return future
+
+    def cancelar(self, chave):
+        """Cancela/descarta a tarefa mais recente da chave, se houver."""
+        with self._lock:
+            self._geracoes[chave] = self._geracoes.get(chave, 0) + 1
+            future = self._futures.pop(chave, None)
+        if future is not None:
+            future.cancel()
+
+    def em_andamento(self, chave):
+        """Indica se a tarefa mais recente da chave ainda não terminou."""
+        with self._lock:
+            future = self._futures.get(chave)
+        return future is not None and not future.done()
+
+    def _obsoleta(self, chave, geracao):
+        if chave is None:
+            return False
+        with self._lock:
+            return self._geracoes.get(chave) != geracao
+
+    def _processar_resultados(self):
+        """Entrega, na thread do Tk, os resultados das tarefas concluídas."""
+        while True:
+            try:
+                future, chave, geracao, ao_concluir, ao_falhar, widget = self._resultados.get_nowait()
+            except queue.Empty:
+                break
+
+            if future.cancelled() or self._obsoleta(chave, geracao):
+                continue
+            if widget is not None and not self._widget_existe(widget):
+                continue
+
+            try:
+                erro = future.exception()
+                if erro is None:
+                    if ao_concluir:
+                        chamar_medido(ao_concluir, future.result())
+                elif ao_falhar:
+                    chamar_medido(ao_falhar, erro)
+                else:
+                    logging.error(f"Erro em tarefa de banco em segundo plano: {erro}")
+            except CancelledError:
+                continue
+            except Exception as e:
+                logging.error(f"Erro no callback de tarefa de banco: {e}")
+
+        if self._ativo:
+            self._after_id = self.root.after(self.intervalo_ms, self._processar_resultados)
+
+    @staticmethod
+    def _widget_existe(widget):
+        try:
+            return bool(widget.winfo_exists())
+        except Exception:
+            return False
+
+    def desligar(self, tempo_maximo=10.0):
+        """
+        Interrompe o processamento, descarta as tarefas que ainda não começaram
+        e espera (até tempo_maximo segundos) as que estão rodando, para que as
+        conexões possam ser fechadas sem nenhuma tarefa no meio de uma consulta.
+
+        Retorna True se todas as tarefas terminaram dentro do prazo.
+        """
+        self._ativo = False
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            em_execucao = set(self._nao_concluidas)
+        _, restantes = wait(em_execucao, timeout=tempo_maximo)
+        if restantes:
+            logging.warning(f"{len(restantes)} tarefa(s) de banco ainda rodando após {tempo_maximo}s.")
+            return False
+        return True
@@ -0,0 +1,101 @@
+# utils/fila_escrita.py
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from utils.servico_pedidos import gravar_lote_pedidos
+
+_PARAR = object()
+
+
+class FilaEscrita:
+    """
+    Serializa todas as gravações em uma única thread (e uma única conexão).
+
+    Com um só escritor, as requisições concorrentes nunca disputam o lock de
+    escrita do SQLite (sem SQLITE_BUSY nem esperas de busy_timeout). Os
+    pedidos que chegam enquanto o escritor está ocupado são gravados juntos,
+    em uma única transação (servico_pedidos.gravar_lote_pedidos): quanto
+    maior a carga, maiores os lotes e menor o custo por pedido.
+
+    submeter() e submeter_pedido() podem ser chamados de qualquer thread e
+    devolvem um concurrent.futures.Future.
+    """
+
+    def __init__(self, max_lote=500):
+        self.max_lote = max_lote
+        self._fila = queue.Queue()
+        self._thread = None
+
+    def iniciar(self):
+        self._thread = threading.Thread(target=self._executar, name="fila-escrita", daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        """Grava o que já estava na fila e encerra a thread."""
+        if self._thread is not None:
+            self._fila.put(_PARAR)
+            self._thread.join()
+            self._thread = None
+
+    def submeter(self, funcao, *args, **kwargs):
+        """Agenda funcao(*args, **kwargs) (uma transação completa) na thread escritora."""
+        futuro = Future()
+        self._fila.put((futuro, funcao, args, kwargs))
+        return futuro
+
+    def submeter_pedido(self, pedido):
+        """
+        Agenda a gravação de um pedido (formato de normalizar_pedido). O Future
+        devolve o ID do pedido, ou levanta ValueError com o motivo da rejeição;
+        se for cancelado antes de a thread escritora chegar a ele, o pedido não
+        é gravado.
+        """
+        futuro = Future()
+        self._fila.put((futuro, None, (pedido,), {}))
+        return futuro
+
+    def _executar(self):
+        parar = False
+        while not parar:
+            tarefas = [self._fila.get()]
+            # Junta o que mais estiver esperando (sem bloquear), até max_lote tarefas
+            while len(tarefas) < self.max_lote:
+                try:
+                    tarefas.append(self._fila.get_nowait())
+                except queue.Empty:
+                    break
+            if _PARAR in tarefas:
+                parar = True
+                tarefas = [tarefa for tarefa in tarefas if tarefa is not _PARAR]
+
+            pedidos = []
+            for futuro, funcao, args, kwargs in tarefas:
+                if funcao is None:
+                    pedidos.append((futuro, args[0]))
+                elif futuro.set_running_or_notify_cancel():
+                    try:
+                        futuro.set_result(funcao(*args, **kwargs))
+                    except Exception as e:
+                        futuro.set_exception(e)
+            if pedidos:
+                self._gravar_pedidos(pedidos)
+
+    @staticmethod
+    def _gravar_pedidos(pedidos):
+        # Pedidos cancelados enquanto esperavam (a API já respondeu 503) não são gravados
+        pedidos = [(futuro, pedido) for futuro, pedido in pedidos if futuro.set_running_or_notify_cancel()]
+        if not pedidos:
+            return
+        futuros = [futuro for futuro, _ in pedidos]
+        try:
+            gravados, rejeitados = gravar_lote_pedidos([pedido for _, pedido in pedidos])
+        except Exception as e:
+            logging.error(f"Falha ao gravar lote de {len(pedidos)} pedidos: {e}")
+            for futuro in futuros:
+                futuro.set_exception(e)
+            return
+        for indice, pedido_id in gravados:
+            futuros[indice].set_result(pedido_id)
+        for indice, motivo in rejeitados:
+            futuros[indice].set_exception(ValueError(motivo))
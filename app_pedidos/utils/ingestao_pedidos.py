@@ -0,0 +1,153 @@
+# utils/ingestao_pedidos.py
+"""
+Ingestão de arquivos de pedidos (ex: feeds de marketplace) em lotes.
+
+Formatos:
+- jsonl: um pedido por linha, no formato de servico_pedidos.normalizar_pedido;
+- csv: um item por linha, com as colunas referencia, cliente_id ou
+  cliente_email, data, produto_id/sku/produto, quantidade e preco_unit
+  (opcional). Linhas seguidas com a mesma referência formam um pedido;
+  cada linha sem referência é um pedido de um item só.
+
+O arquivo é lido em streaming; a cada TAMANHO_LOTE_PEDIDOS pedidos o lote
+é gravado em uma transação (servico_pedidos.gravar_lote_pedidos). Os
+pedidos rejeitados vão para <arquivo>.rejeitados.jsonl com a linha, a
+referência e o motivo; entre eles, os de referência já gravada, então
+reingerir o mesmo arquivo não duplica pedidos.
+"""
+import csv
+import json
+import logging
+import os
+from utils.busca_fts import normalizar
+from utils.data_import import ImportacaoCancelada
+from utils.servico_pedidos import gravar_lote_pedidos, TAMANHO_LOTE_PEDIDOS
+
+FORMATOS_INGESTAO = ("jsonl", "csv")
+
+COLUNAS_ITEM_CSV = ("produto_id", "sku", "produto", "quantidade", "preco_unit")
+COLUNAS_PEDIDO_CSV = ("referencia", "cliente_id", "cliente_email", "data")
+
+
+def caminho_rejeitados_padrao(caminho):
+    """feed.jsonl -> feed.rejeitados.jsonl"""
+    base, _ = os.path.splitext(caminho)
+    return base + ".rejeitados.jsonl"
+
+
+def ler_pedidos_jsonl(arquivo):
+    """Gera (nº da linha, pedido ou None, erro ou None) para cada linha não vazia."""
+    for numero_linha, linha in enumerate(arquivo, start=1):
+        if not linha.strip():
+            continue
+        try:
+            yield numero_linha, json.loads(linha), None
+        except json.JSONDecodeError as e:
+            yield numero_linha, None, f"JSON inválido: {e}"
+
+
+def ler_pedidos_csv(arquivo):
+    """
+    Gera (nº da primeira linha, pedido, None), agrupando as linhas seguidas de
+    mesma referência. Linhas sem referência nunca são agrupadas: sem ela não
+    há como saber se são do mesmo pedido (o cliente e a data seriam perdidos).
+    """
+    leitor = csv.reader(arquivo)
+    cabecalho = [normalizar(nome).strip() for nome in next(leitor, [])]
+    if "referencia" not in cabecalho or "quantidade" not in cabecalho:
+        raise ValueError("O CSV de pedidos precisa das colunas 'referencia' e 'quantidade'.")
+    posicoes = {coluna: cabecalho.index(coluna) for coluna in COLUNAS_PEDIDO_CSV + COLUNAS_ITEM_CSV
+                if coluna in cabecalho}
+
+    pedido, inicio = None, None
+    for linha in leitor:
+        if not any(campo.strip() for campo in linha):
+            continue
+        campos = {coluna: linha[i].strip() for coluna, i in posicoes.items() if i < len(linha)}
+        referencia = campos.get("referencia")
+        if pedido is None or not referencia or referencia != pedido["referencia"]:
+            if pedido is not None:
+                yield inicio, pedido, None
+            pedido = {coluna: campos.get(coluna) for coluna in COLUNAS_PEDIDO_CSV}
+            pedido["itens"] = []
+            inicio = leitor.line_num
+        pedido["itens"].append({coluna: campos.get(coluna) for coluna in COLUNAS_ITEM_CSV})
+    if pedido is not None:
+        yield inicio, pedido, None
+
+
+class _ArquivoRejeitados:
+    """Arquivo JSON Lines dos pedidos rejeitados, criado só na primeira rejeição."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.total = 0
+        self._arquivo = None
+
+    def gravar(self, numero_linha, referencia, motivo):
+        if self._arquivo is None:
+            self._arquivo = open(self.caminho, "w", encoding="utf-8")
+        self._arquivo.write(json.dumps({"linha": numero_linha, "referencia": referencia, "motivo": motivo},
+                                       ensure_ascii=False) + "\n")
+        self.total += 1
+
+    def fechar(self):
+        if self._arquivo is not None:
+            self._arquivo.close()
+
+
+def _gravar_lote(lote, rejeitados):
+    """Grava um lote [(nº da linha, pedido)] e registra as rejeições; retorna os pedidos gravados."""
+    gravados, rejeitados_lote = gravar_lote_pedidos([pedido for _, pedido in lote])
+    for indice, motivo in rejeitados_lote:
+        numero_linha, pedido = lote[indice]
+        rejeitados.gravar(numero_linha, pedido.get("referencia") if isinstance(pedido, dict) else None, motivo)
+    return len(gravados)
+
+
+def ingerir_arquivo(caminho, formato=None, caminho_rejeitados=None, ao_progresso=None, cancelado=None,
+                    tamanho_lote=TAMANHO_LOTE_PEDIDOS):
+    """
+    Ingere um arquivo de pedidos (formato deduzido da extensão se omitido).
+    ao_progresso(bytes_lidos, bytes_totais) é chamado a cada lote e o
+    threading.Event 'cancelado' interrompe com ImportacaoCancelada (os lotes
+    já gravados permanecem).
+
+    Retorna (pedidos_gravados, pedidos_rejeitados, caminho_rejeitados ou None).
+    """
+    formato = formato or os.path.splitext(caminho)[1].lstrip(".").lower()
+    if formato not in FORMATOS_INGESTAO:
+        raise ValueError(f"Formato de pedidos inválido: {formato} (use {' ou '.join(FORMATOS_INGESTAO)})")
+    caminho_rejeitados = caminho_rejeitados or caminho_rejeitados_padrao(caminho)
+    if os.path.exists(caminho_rejeitados):
+        os.remove(caminho_rejeitados)  # Não mistura rejeições de uma ingestão anterior
+
+    total_bytes = os.path.getsize(caminho)
+    rejeitados = _ArquivoRejeitados(caminho_rejeitados)
+    gravados = 0
+    try:
+        with open(caminho, newline="", encoding="utf-8-sig") as arquivo:
+            ler = ler_pedidos_jsonl if formato == "jsonl" else ler_pedidos_csv
+            lote = []
+            for numero_linha, pedido, erro in ler(arquivo):
+                if erro:
+                    rejeitados.gravar(numero_linha, None, erro)
+                    continue
+                lote.append((numero_linha, pedido))
+                if len(lote) < tamanho_lote:
+                    continue
+                if cancelado is not None and cancelado.is_set():
+                    raise ImportacaoCancelada()
+                gravados += _gravar_lote(lote, rejeitados)
+                lote = []
+                if ao_progresso:
+                    ao_progresso(arquivo.buffer.tell(), total_bytes)
+            if lote:
+                gravados += _gravar_lote(lote, rejeitados)
+            if ao_progresso:
+                ao_progresso(total_bytes, total_bytes)
+    finally:
+        rejeitados.fechar()
+
+    logging.info(f"Ingestão de pedidos concluída: {gravados} gravados, {rejeitados.total} rejeitados.")
+    return gravados, rejeitados.total, (caminho_rejeitados if rejeitados.total else None)
@@ -0,0 +1,378 @@
+# utils/instrumentacao_sql.py
+"""
+Instrumentação de todas as consultas SQL do app (opcional).
+
+Desligada por padrão. É ativada com 'python main.py --instrumentar-sql' (a
+API e o manutencao.py aceitam a mesma opção) ou PEDIDOS_SQL_INSTRUMENTAR=1.
+Com o valor 'explain' (ex: --instrumentar-sql=explain), o log de consultas
+lentas também traz o EXPLAIN QUERY PLAN de cada comando.
+
+Com ela ativa, as conexões do db.py são criadas com ConexaoInstrumentada,
+então qualquer comando (executar_comando, conn.execute dentro de
+transacao(), executemany, COMMIT) é cronometrado e agregado por SQL
+normalizado (literais e listas de '?' trocados por marcadores): chamadas,
+erros, tempo total/máximo e um histograma de latência.
+
+O tempo de um SELECT inclui o execute e as chamadas fetchone/fetchmany/
+fetchall feitas em seguida no mesmo cursor (a iteração direta com
+'for linha in cursor' não é cronometrada).
+
+Configuração por variáveis de ambiente:
+- PEDIDOS_SQL_LENTO_MS: limite (ms) acima do qual o comando vai para o log
+  de consultas lentas (padrão: 100);
+- PEDIDOS_SQL_LENTO_LOG: arquivo do log de consultas lentas (padrão:
+  consultas_lentas.log na pasta do banco);
+- PEDIDOS_SQL_ESTATISTICAS: se definido, as estatísticas são exportadas
+  (JSON) para este arquivo ao encerrar o processo.
+"""
+import atexit
+import bisect
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+
+LIMITE_LENTO_MS = float(os.environ.get("PEDIDOS_SQL_LENTO_MS", "100"))
+ARQUIVO_LENTO = os.environ.get("PEDIDOS_SQL_LENTO_LOG")  # None: ao lado do banco
+ARQUIVO_LENTO_PADRAO = "consultas_lentas.log"
+ARQUIVO_ESTATISTICAS = os.environ.get("PEDIDOS_SQL_ESTATISTICAS")
+ARQUIVO_ESTATISTICAS_PADRAO = "estatisticas_sql.json"
+
+# Limites superiores (ms) das faixas do histograma; a última faixa é "acima de 2500 ms"
+FAIXAS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_RE_TEXTO = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMERO = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_ESPACOS = re.compile(r"\s+")
+_RE_LISTA = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_RE_TUPLAS = re.compile(r"\(\?, \.\.\.\)(?:\s*,\s*\(\?, \.\.\.\))+")
+
+
+@lru_cache(maxsize=2048)
+def normalizar_sql(sql):
+    """
+    Chave de agregação: literais viram '?' e listas de marcadores (IN (?, ?, ?),
+    VALUES com várias tuplas) viram '(?, ...)', para que o mesmo comando com
+    lotes de tamanhos diferentes caia na mesma linha.
+    """
+    sql = _RE_TEXTO.sub("?", sql)
+    sql = _RE_NUMERO.sub("?", sql)
+    sql = _RE_ESPACOS.sub(" ", sql).strip().rstrip(";")
+    sql = _RE_LISTA.sub("(?, ...)", sql)
+    return _RE_TUPLAS.sub("(?, ...), ...", sql)
+
+
+class EstatisticasSQL:
+    """Contadores e histogramas por SQL normalizado (seguro entre threads)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._consultas = {}  # {sql normalizado: [chamadas, erros, total_s, maximo_s, faixas]}
+        self.inicio = time.time()
+
+    def registrar(self, sql, duracao, erro=False):
+        chave = normalizar_sql(sql)
+        faixa = bisect.bisect_left(FAIXAS_MS, duracao * 1000)
+        with self._lock:
+            dados = self._consultas.get(chave)
+            if dados is None:
+                dados = self._consultas[chave] = [0, 0, 0.0, 0.0, [0] * (len(FAIXAS_MS) + 1)]
+            dados[0] += 1
+            dados[1] += erro
+            dados[2] += duracao
+            if duracao > dados[3]:
+                dados[3] = duracao
+            dados[4][faixa] += 1
+
+    def zerar(self):
+        with self._lock:
+            self._consultas.clear()
+            self.inicio = time.time()
+
+    @staticmethod
+    def _percentil(faixas, chamadas, fracao, maximo_ms):
+        """Estimativa pelo limite superior da faixa do histograma (nunca acima do máximo observado)."""
+        alvo = fracao * chamadas
+        acumulado = 0
+        for indice, quantidade in enumerate(faixas):
+            acumulado += quantidade
+            if acumulado >= alvo:
+                return min(FAIXAS_MS[indice], maximo_ms) if indice < len(FAIXAS_MS) else maximo_ms
+        return maximo_ms
+
+    def resumo(self):
+        """Lista de dicts por comando, do maior tempo total para o menor."""
+        with self._lock:
+            copia = [(chave, dados[:4], list(dados[4])) for chave, dados in self._consultas.items()]
+
+        consultas = []
+        for chave, (chamadas, erros, total, maximo), faixas in copia:
+            maximo_ms = maximo * 1000
+            rotulos = [f"<={limite}ms" for limite in FAIXAS_MS] + [f">{FAIXAS_MS[-1]}ms"]
+            consultas.append({
+                "sql": chave,
+                "chamadas": chamadas,
+                "erros": erros,
+                "total_ms": round(total * 1000, 3),
+                "media_ms": round(total * 1000 / chamadas, 3),
+                "max_ms": round(maximo_ms, 3),
+                "p50_ms": self._percentil(faixas, chamadas, 0.50, round(maximo_ms, 3)),
+                "p95_ms": self._percentil(faixas, chamadas, 0.95, round(maximo_ms, 3)),
+                "p99_ms": self._percentil(faixas, chamadas, 0.99, round(maximo_ms, 3)),
+                "histograma": {rotulo: n for rotulo, n in zip(rotulos, faixas) if n},
+            })
+        consultas.sort(key=lambda consulta: consulta["total_ms"], reverse=True)
+        return consultas
+
+    def exportar(self, caminho=None):
+        """Grava o resumo em JSON (padrão: PEDIDOS_SQL_ESTATISTICAS ou estatisticas_sql.json)."""
+        caminho = caminho or ARQUIVO_ESTATISTICAS or ARQUIVO_ESTATISTICAS_PADRAO
+        conteudo = {
+            "inicio": datetime.fromtimestamp(self.inicio).isoformat(timespec="seconds"),
+            "gerado_em": datetime.now().isoformat(timespec="seconds"),
+            "limite_lento_ms": LIMITE_LENTO_MS,
+            "consultas": self.resumo(),
+        }
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            json.dump(conteudo, arquivo, ensure_ascii=False, indent=2)
+        logging.info(f"Estatísticas de SQL exportadas para {caminho} ({len(conteudo['consultas'])} comandos).")
+        return caminho
+
+
+estatisticas = EstatisticasSQL()
+
+
+# --- Log de Consultas Lentas ---
+
+_log_lento = logging.getLogger("pedidos.sql_lento")
+_log_lento.propagate = False
+_lock_log_lento = threading.Lock()
+_planos = {}  # {sql normalizado: plano} (o plano é calculado uma vez por comando)
+
+
+def _caminho_log_lento(conexao):
+    """PEDIDOS_SQL_LENTO_LOG ou consultas_lentas.log na pasta do banco (não na pasta de trabalho)."""
+    if ARQUIVO_LENTO:
+        return ARQUIVO_LENTO
+    arquivo_banco = ""
+    try:
+        for _, nome, arquivo in sqlite3.Connection.execute(conexao, "PRAGMA database_list").fetchall():
+            if nome == "main":
+                arquivo_banco = arquivo
+    except sqlite3.Error:
+        pass
+    # Banco em memória/temporário não tem arquivo: usa a pasta de trabalho
+    return os.path.join(os.path.dirname(arquivo_banco), ARQUIVO_LENTO_PADRAO) if arquivo_banco \
+        else ARQUIVO_LENTO_PADRAO
+
+
+def _arquivo_log_lento(conexao):
+    """Abre o arquivo do log só na primeira consulta lenta."""
+    with _lock_log_lento:
+        if not _log_lento.handlers:
+            handler = logging.FileHandler(_caminho_log_lento(conexao), encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s"))
+            _log_lento.addHandler(handler)
+            _log_lento.setLevel(logging.INFO)
+    return _log_lento
+
+
+def _plano_consulta(conexao, sql, parametros):
+    chave = normalizar_sql(sql)
+    plano = _planos.get(chave)
+    if plano is not None:
+        return plano
+    if parametros is None:
+        return "(executemany: plano não calculado)"
+    try:
+        # Connection.execute original: o EXPLAIN não entra nas estatísticas
+        linhas = sqlite3.Connection.execute(conexao, "EXPLAIN QUERY PLAN " + sql, parametros).fetchall()
+    except sqlite3.Error as e:
+        return f"(plano indisponível: {e})"
+    niveis = {0: 0}
+    passos = []
+    for id_passo, pai, _, detalhe in linhas:
+        niveis[id_passo] = niveis.get(pai, 0) + 1
+        passos.append("  " * niveis[id_passo] + detalhe)
+    plano = _planos[chave] = "\n".join(passos) or "  (sem plano)"
+    return plano
+
+
+def _registrar_lenta(conexao, sql, parametros, duracao):
+    # O EXPLAIN é mais uma consulta no caminho do comando lento: só com o modo 'explain'
+    plano = f"\nPlano:\n{_plano_consulta(conexao, sql, parametros)}" if _explicar else ""
+    texto_parametros = f" - Params: {str(parametros)[:200]}" if parametros else ""
+    _arquivo_log_lento(conexao).info(f"{duracao * 1000:.1f} ms - {_RE_ESPACOS.sub(' ', sql).strip()}"
+                                     f"{texto_parametros}{plano}")
+
+
+def _concluir(conexao, sql, parametros, duracao, erro=False):
+    estatisticas.registrar(sql, duracao, erro)
+    if duracao * 1000 >= LIMITE_LENTO_MS and not erro:
+        try:
+            _registrar_lenta(conexao, sql, parametros, duracao)
+        except Exception as e:  # O log nunca pode quebrar a consulta
+            logging.warning(f"Falha ao registrar consulta lenta: {e}")
+
+
+# --- Conexão e Cursor Instrumentados ---
+
+# Métodos originais chamados diretamente (mais barato que super() no caminho quente)
+_executar = sqlite3.Cursor.execute
+_executar_varios = sqlite3.Cursor.executemany
+_ler_uma = sqlite3.Cursor.fetchone
+_ler_varias = sqlite3.Cursor.fetchmany
+_ler_todas = sqlite3.Cursor.fetchall
+_agora = time.perf_counter
+
+
+class CursorInstrumentado(sqlite3.Cursor):
+    """Cursor que cronometra execute/executemany e as leituras que os seguem."""
+
+    _pendente = None  # [sql, parametros, duração acumulada] do SELECT ainda sendo lido
+
+    def _finalizar(self, duracao_extra=0.0):
+        pendente = self._pendente
+        if pendente is not None:
+            self._pendente = None
+            _concluir(self.connection, pendente[0], pendente[1], pendente[2] + duracao_extra)
+
+    def _medir(self, metodo, sql, parametros, registro):
+        if self._pendente is not None:
+            self._finalizar()
+        inicio = _agora()
+        try:
+            metodo(self, sql, parametros)
+        except Exception:
+            _concluir(self.connection, sql, registro, _agora() - inicio, erro=True)
+            raise
+        duracao = _agora() - inicio
+        if self.description is None:
+            _concluir(self.connection, sql, registro, duracao)  # Sem linhas a ler: concluído
+        else:
+            self._pendente = [sql, registro, duracao]
+        return self
+
+    def execute(self, sql, parametros=()):
+        return self._medir(_executar, sql, parametros, parametros)
+
+    def executemany(self, sql, sequencia):
+        return self._medir(_executar_varios, sql, sequencia, None)
+
+    def fetchone(self):
+        inicio = _agora()
+        linha = _ler_uma(self)
+        if self._pendente is not None:
+            self._finalizar(_agora() - inicio)
+        return linha
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        inicio = _agora()
+        linhas = _ler_varias(self, size)
+        if self._pendente is not None:
+            if len(linhas) < size:
+                self._finalizar(_agora() - inicio)
+            else:
+                self._pendente[2] += _agora() - inicio
+        return linhas
+
+    def fetchall(self):
+        inicio = _agora()
+        linhas = _ler_todas(self)
+        if self._pendente is not None:
+            self._finalizar(_agora() - inicio)
+        return linhas
+
+    def close(self):
+        self._finalizar()
+        super().close()
+
+    def __del__(self):
+        if self._pendente is not None:
+            try:
+                self._finalizar()
+            except Exception:
+                pass
+
+
+class ConexaoInstrumentada(sqlite3.Connection):
+    """Connection cujos cursores (inclusive os de conn.execute) são instrumentados."""
+
+    def cursor(self, factory=CursorInstrumentado):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return sqlite3.Connection.cursor(self, CursorInstrumentado).execute(sql, parametros)
+
+    def executemany(self, sql, sequencia):
+        return sqlite3.Connection.cursor(self, CursorInstrumentado).executemany(sql, sequencia)
+
+    def commit(self):
+        if not self.in_transaction:
+            return super().commit()
+        inicio = time.perf_counter()
+        super().commit()
+        _concluir(self, "COMMIT", (), time.perf_counter() - inicio)
+
+    def rollback(self):
+        if not self.in_transaction:
+            return super().rollback()
+        inicio = time.perf_counter()
+        super().rollback()
+        _concluir(self, "ROLLBACK", (), time.perf_counter() - inicio)
+
+
+# --- Ativação ---
+
+_ativa = False
+_explicar = False
+
+
+def modo_instrumentacao(argv):
+    """Lê o modo de --instrumentar-sql[=explain] ou de PEDIDOS_SQL_INSTRUMENTAR; None se desligada."""
+    for argumento in argv:
+        if argumento == "--instrumentar-sql":
+            return "1"
+        if argumento.startswith("--instrumentar-sql="):
+            return argumento.split("=", 1)[1] or "1"
+    modo = os.environ.get("PEDIDOS_SQL_INSTRUMENTAR", "").strip().lower()
+    return None if modo in ("", "0") else modo
+
+
+def ativar_instrumentacao(modo):
+    """
+    Liga a instrumentação (se 'modo' não for None); só as conexões abertas
+    depois disso são instrumentadas, então chamar antes de usar o banco.
+    """
+    global _ativa, _explicar
+    if not modo:
+        return False
+    if modo not in ("1", "explain"):
+        logging.warning(f"Modo de instrumentação de SQL desconhecido: {modo} (use 1 ou explain).")
+    if not _ativa and ARQUIVO_ESTATISTICAS:
+        atexit.register(exportar_estatisticas)
+    _ativa = True
+    _explicar = modo == "explain"
+    logging.info(f"Instrumentação de SQL ativa (consultas lentas: >= {LIMITE_LENTO_MS:.0f} ms, "
+                 f"EXPLAIN: {'sim' if _explicar else 'não'}).")
+    return True
+
+
+def instrumentacao_ativa():
+    return _ativa
+
+
+def fabrica_conexao():
+    """Classe passada a sqlite3.connect(factory=...) pelo db.py."""
+    return ConexaoInstrumentada if _ativa else sqlite3.Connection
+
+
+def exportar_estatisticas(caminho=None):
+    """Atalho para estatisticas.exportar()."""
+    return estatisticas.exportar(caminho)
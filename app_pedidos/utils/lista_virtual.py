@@ -0,0 +1,154 @@
+# utils/lista_virtual.py
+import logging
+from collections import deque
+from utils.tabela_treeview import TabelaTreeview
+
+# Sentidos de paginação
+ABAIXO = "abaixo"  # Linhas posteriores à última exibida
+ACIMA = "acima"  # Linhas anteriores à primeira exibida
+
+
+class ListaVirtual:
+    """
+    Treeview "virtualizada" com paginação por chave (keyset pagination).
+
+    Só uma janela limitada de linhas fica na Treeview: novas páginas são
+    buscadas em segundo plano quando a barra de rolagem se aproxima do fim
+    (ou do início, se linhas do topo já tiverem sido descartadas) e as linhas
+    mais distantes são removidas para manter no máximo 'max_linhas'.
+
+    buscar_pagina(chave_ref, sentido, limite) roda na thread do ExecutorDB e
+    deve retornar as linhas já ordenadas a partir de chave_ref (None = início).
+    chave_da_linha(linha) devolve a chave de ordenação da linha e
+    formatar_linha(linha) devolve (iid, values) para a Treeview.
+    """
+
+    def __init__(self, tree, executor, chave_tarefa, buscar_pagina, chave_da_linha, formatar_linha,
+                 tamanho_pagina=200, max_linhas=1000, limiar=0.9, ao_vazio=None, ao_carregar=None):
+        self.tree = tree
+        self.tabela = TabelaTreeview(tree)
+        self.executor = executor
+        self.chave_tarefa = chave_tarefa
+        self.buscar_pagina = buscar_pagina
+        self.chave_da_linha = chave_da_linha
+        self.formatar_linha = formatar_linha
+        self.tamanho_pagina = tamanho_pagina
+        self.max_linhas = max_linhas
+        self.limiar = limiar
+        self.ao_vazio = ao_vazio  # Chamado quando a primeira página vem vazia
+        self.ao_carregar = ao_carregar  # Chamado com True/False no início/fim de cada busca
+
+        self._chaves = deque()  # Chaves das linhas exibidas, na ordem da Treeview
+        self._iids = deque()
+        self._fim_abaixo = False  # Não há mais linhas depois da última exibida
+        self._cortado_acima = False  # Linhas do topo foram descartadas da janela
+        self._carregando = False
+
+    def ao_rolar(self, primeiro, ultimo):
+        """Deve ser chamado com os valores do yscrollcommand da Treeview."""
+        if self._carregando:
+            return
+        primeiro, ultimo = float(primeiro), float(ultimo)
+        if ultimo >= self.limiar and not self._fim_abaixo and self._chaves:
+            self._carregar(ABAIXO)
+        elif primeiro <= 1 - self.limiar and self._cortado_acima and self._chaves:
+            self._carregar(ACIMA)
+
+    def recarregar(self):
+        """
+        Busca novamente a primeira página. As linhas atuais continuam visíveis
+        até a resposta chegar e então só as diferenças são aplicadas.
+        """
+        self._carregar(ABAIXO, reiniciar=True)
+
+    def _carregar(self, sentido, reiniciar=False):
+        if reiniciar:
+            chave_ref = None
+        else:
+            chave_ref = self._chaves[-1] if sentido == ABAIXO else self._chaves[0]
+
+        self._carregando = True
+        if self.ao_carregar:
+            self.ao_carregar(True)
+        self.executor.submeter(self.buscar_pagina, chave_ref, sentido, self.tamanho_pagina,
+                               chave=self.chave_tarefa, widget=self.tree,
+                               ao_concluir=lambda linhas: self._exibir_pagina(linhas, sentido, reiniciar),
+                               ao_falhar=self._falha)
+
+    def _falha(self, erro):
+        self._carregando = False
+        if self.ao_carregar:
+            self.ao_carregar(False)
+        logging.error(f"Erro ao carregar página da lista: {erro}")
+
+    def _exibir_pagina(self, linhas, sentido, reiniciar):
+        self._carregando = False
+        if self.ao_carregar:
+            self.ao_carregar(False)
+        linhas = linhas or []
+
+        if reiniciar:
+            self._chaves.clear()
+            self._iids.clear()
+            self._cortado_acima = False
+            self._fim_abaixo = len(linhas) < self.tamanho_pagina
+            if not linhas:
+                self.tabela.limpar()
+                if self.ao_vazio:
+                    self.ao_vazio()
+                return
+
+            # Diferença em relação às linhas atuais: preserva seleção e rolagem
+            formatadas = [self.formatar_linha(linha) for linha in linhas]
+            self.tabela.sincronizar(formatadas)
+            self._iids.extend(iid for iid, _ in formatadas)
+            self._chaves.extend(self.chave_da_linha(linha) for linha in linhas)
+            return
+
+        total_antes = len(self._iids)
+        primeiro_visivel = int(round(self.tree.yview()[0] * total_antes)) if total_antes else 0
+
+        if sentido == ABAIXO:
+            for linha in linhas:
+                iid, valores = self.formatar_linha(linha)
+                self.tabela.atualizar_linha(iid, valores, "end")
+                self._iids.append(iid)
+                self._chaves.append(self.chave_da_linha(linha))
+            if len(linhas) < self.tamanho_pagina:
+                self._fim_abaixo = True
+            removidas = self._cortar(ACIMA)
+            primeiro_visivel -= removidas
+        else:
+            # Linhas chegam da mais próxima para a mais distante do topo atual
+            for linha in linhas:
+                iid, valores = self.formatar_linha(linha)
+                self.tabela.atualizar_linha(iid, valores, 0)
+                self._iids.appendleft(iid)
+                self._chaves.appendleft(self.chave_da_linha(linha))
+            if len(linhas) < self.tamanho_pagina:
+                self._cortado_acima = False
+            self._cortar(ABAIXO)
+            primeiro_visivel += len(linhas)
+
+        # Mantém a mesma linha no topo da área visível após inserir/cortar
+        if self._iids:
+            self.tree.yview_moveto(max(primeiro_visivel, 0) / len(self._iids))
+
+    def _cortar(self, lado):
+        """Remove linhas do lado indicado até respeitar max_linhas. Retorna quantas saíram."""
+        excesso = len(self._iids) - self.max_linhas
+        if excesso <= 0:
+            return 0
+
+        if lado == ACIMA:
+            removidos = [self._iids.popleft() for _ in range(excesso)]
+            for _ in range(excesso):
+                self._chaves.popleft()
+            self._cortado_acima = True
+        else:
+            removidos = [self._iids.pop() for _ in range(excesso)]
+            for _ in range(excesso):
+                self._chaves.pop()
+            self._fim_abaixo = False
+        self.tabela.remover_linhas(removidos)
+        return excesso
@@ -0,0 +1,311 @@
+# utils/pdf_lote.py
+"""
+Geração de PDFs de pedidos em lote (requer reportlab).
+
+Os pedidos são divididos em lotes e cada lote é desenhado por um processo
+de um pool: cada processo lê os seus pedidos do banco (uma consulta por
+lote), mantém um único RenderizadorPedidos (reportlab importado, fontes e
+cortes de texto reaproveitados entre documentos) e grava os arquivos.
+Pedidos longos são paginados, repetindo o cabeçalho e as colunas.
+"""
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import db
+from utils.data_export import ExportacaoCancelada
+
+LARGURA_PAGINA, ALTURA_PAGINA = 612, 792  # Carta (letter), em pontos
+MARGEM = 50
+ALTURA_LINHA = 15
+Y_COLUNAS = ALTURA_PAGINA - 100  # Títulos das colunas (repetidos em toda página)
+Y_PRIMEIRA_LINHA = Y_COLUNAS - 20
+Y_ULTIMA_LINHA = 70  # Abaixo disso a linha vai para a próxima página
+ESPACO_TOTAL = 20  # Distância entre a última linha e o total do pedido
+Y_MINIMO_TOTAL = 55  # O total não pode invadir o rodapé
+
+# (x, título, alinhamento) das colunas da tabela de itens
+COLUNAS = ((MARGEM, "Produto", "esquerda"), (370, "Qtd", "direita"),
+           (460, "Preço Unit.", "direita"), (LARGURA_PAGINA - MARGEM, "Subtotal", "direita"))
+LARGURA_PRODUTO = 280  # Nomes maiores são cortados com "..."
+FONTE, FONTE_NEGRITO = "Helvetica", "Helvetica-Bold"
+
+# Pedidos por tarefa enviada ao pool (equilibra distribuição e custo por tarefa)
+PEDIDOS_POR_TAREFA = 50
+# Mesmo limite de parâmetros por consulta usado ao gravar pedidos
+TAMANHO_LOTE_IDS = 900
+
+SQL_PEDIDOS = """
+    SELECT p.id, c.nome, p.data, p.total,
+           i.produto_nome, i.quantidade, i.preco_unit, i.quantidade * i.preco_unit
+    FROM pedidos p
+    INNER JOIN clientes c ON p.cliente_id = c.id
+    LEFT JOIN itens_pedido i ON i.pedido_id = p.id
+    WHERE p.id IN ({marcadores})
+    ORDER BY p.id, i.id
+"""
+
+
+class RenderizadorPedidos:
+    """
+    Desenha pedidos paginados em canvases do reportlab.
+
+    Criado uma vez por processo e reaproveitado em todos os documentos. Em
+    cada documento a moldura fixa da página (colunas, linhas, rodapé) vira um
+    Form XObject desenhado uma vez e apenas referenciado em cada página.
+    """
+
+    def __init__(self):
+        from reportlab.pdfgen import canvas
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+        self._canvas = canvas
+        self._largura_texto = stringWidth
+        self._cortes = {}  # {nome do produto: texto que cabe na coluna}
+        self._paginas_documento = 0
+
+    def _cortar(self, texto):
+        cortado = self._cortes.get(texto)
+        if cortado is None:
+            cortado = texto
+            if self._largura_texto(texto, FONTE, 10) > LARGURA_PRODUTO:
+                while cortado and self._largura_texto(cortado + "...", FONTE, 10) > LARGURA_PRODUTO:
+                    cortado = cortado[:-1]
+                cortado += "..."
+            if len(self._cortes) < 100000:
+                self._cortes[texto] = cortado
+        return cortado
+
+    def novo_documento(self, caminho):
+        c = self._canvas.Canvas(caminho, pagesize=(LARGURA_PAGINA, ALTURA_PAGINA))
+        c.beginForm("moldura")
+        c.setFont(FONTE_NEGRITO, 10)
+        for x, titulo, alinhamento in COLUNAS:
+            if alinhamento == "direita":
+                c.drawRightString(x, Y_COLUNAS, titulo)
+            else:
+                c.drawString(x, Y_COLUNAS, titulo)
+        c.line(MARGEM, Y_COLUNAS - 5, LARGURA_PAGINA - MARGEM, Y_COLUNAS - 5)
+        c.line(MARGEM, 45, LARGURA_PAGINA - MARGEM, 45)
+        c.endForm()
+        self._paginas_documento = 0
+        return c
+
+    def _nova_pagina(self, c, cabecalho, pagina):
+        if self._paginas_documento:
+            c.showPage()
+        self._paginas_documento += 1
+
+        pedido_id, nome_cliente, data, _ = cabecalho
+        c.doForm("moldura")
+        c.setFont(FONTE_NEGRITO, 14)
+        c.drawString(MARGEM, ALTURA_PAGINA - 50, f"Pedido #{pedido_id}" + (" (continuação)" if pagina > 1 else ""))
+        c.setFont(FONTE, 10)
+        c.drawString(MARGEM, ALTURA_PAGINA - 68, f"Cliente: {nome_cliente}")
+        c.drawString(MARGEM, ALTURA_PAGINA - 82, f"Data: {data}")
+        c.drawRightString(LARGURA_PAGINA - MARGEM, 30, f"Pedido #{pedido_id} - Página {pagina}")
+        return Y_PRIMEIRA_LINHA
+
+    def desenhar_pedido(self, c, cabecalho, itens):
+        """Desenha um pedido a partir de uma página nova. Retorna quantas páginas usou."""
+        pagina = 1
+        y = self._nova_pagina(c, cabecalho, pagina)
+        for produto, qtd, preco_unit, subtotal in itens:
+            if y < Y_ULTIMA_LINHA:
+                pagina += 1
+                y = self._nova_pagina(c, cabecalho, pagina)
+            c.drawString(COLUNAS[0][0], y, self._cortar(produto))
+            c.drawRightString(COLUNAS[1][0], y, str(qtd))
+            c.drawRightString(COLUNAS[2][0], y, f"R$ {preco_unit:.2f}")
+            c.drawRightString(COLUNAS[3][0], y, f"R$ {subtotal:.2f}")
+            y -= ALTURA_LINHA
+
+        if y - ESPACO_TOTAL < Y_MINIMO_TOTAL:
+            pagina += 1
+            y = self._nova_pagina(c, cabecalho, pagina)
+        c.setFont(FONTE_NEGRITO, 14)
+        c.drawRightString(LARGURA_PAGINA - MARGEM, y - ESPACO_TOTAL, f"TOTAL DO PEDIDO: R$ {cabecalho[3]:.2f}")
+        return pagina
+
+    def gravar(self, caminho, pedidos):
+        """Grava os pedidos [(cabecalho, itens)] em um único PDF. Retorna o total de páginas."""
+        c = self.novo_documento(caminho)
+        paginas = sum(self.desenhar_pedido(c, cabecalho, itens) for cabecalho, itens in pedidos)
+        c.save()
+        return paginas
+
+
+def ler_pedidos(pedido_ids):
+    """Lê cabeçalho e itens dos pedidos, na ordem dos IDs: [(cabecalho, [(produto, qtd, preco, subtotal)])]."""
+    por_id = {}
+    for inicio in range(0, len(pedido_ids), TAMANHO_LOTE_IDS):
+        lote = list(pedido_ids[inicio:inicio + TAMANHO_LOTE_IDS])
+        sql = SQL_PEDIDOS.format(marcadores=",".join("?" * len(lote)))
+        for pedido_id, nome, data, total, produto, qtd, preco_unit, subtotal in \
+                db.executar_comando(sql, lote, fetchall=True) or []:
+            pedido = por_id.get(pedido_id)
+            if pedido is None:
+                pedido = por_id[pedido_id] = ((pedido_id, nome, data, total), [])
+            if produto is not None:
+                pedido[1].append((produto, qtd, preco_unit, subtotal))
+    return [por_id[pedido_id] for pedido_id in pedido_ids if pedido_id in por_id]
+
+
+# --- Funções executadas nos processos do pool ---
+
+_renderizador = None
+
+
+def _obter_renderizador():
+    global _renderizador
+    if _renderizador is None:
+        _renderizador = RenderizadorPedidos()
+    return _renderizador
+
+
+def _inicializar_processo(db_file):
+    """Roda uma vez em cada processo do pool: aponta para o banco e prepara o renderizador."""
+    logging.getLogger().setLevel(logging.WARNING)
+    db.configurar_banco(db_file)
+    _obter_renderizador()
+
+
+def _renderizar_arquivos(pedido_ids, pasta_destino):
+    """Um arquivo pedido_<id>.pdf por pedido. Retorna (pedidos, páginas)."""
+    renderizador = _obter_renderizador()
+    pedidos = ler_pedidos(pedido_ids)
+    paginas = 0
+    for cabecalho, itens in pedidos:
+        paginas += renderizador.gravar(os.path.join(pasta_destino, f"pedido_{cabecalho[0]}.pdf"),
+                                       [(cabecalho, itens)])
+    return len(pedidos), paginas
+
+
+def _renderizar_parte(pedido_ids, caminho):
+    """Todos os pedidos do lote em um único arquivo (parte de um relatório). Retorna (pedidos, páginas)."""
+    pedidos = ler_pedidos(pedido_ids)
+    return len(pedidos), _obter_renderizador().gravar(caminho, pedidos)
+
+
+# --- API ---
+
+def _executar_tarefas(funcao, tarefas, processos, ao_progresso, cancelado, total_pedidos):
+    """Roda funcao(*args) para cada tarefa, no pool ou no próprio processo. Retorna (pedidos, páginas)."""
+    feitos = paginas = 0
+    if ao_progresso:
+        ao_progresso(0, total_pedidos)
+
+    if processos == 1:
+        _obter_renderizador()
+        for args in tarefas:
+            if cancelado is not None and cancelado.is_set():
+                raise ExportacaoCancelada()
+            pedidos, paginas_tarefa = funcao(*args)
+            feitos += pedidos
+            paginas += paginas_tarefa
+            if ao_progresso:
+                ao_progresso(feitos, total_pedidos)
+        return feitos, paginas
+
+    # spawn: seguro mesmo com a thread do Tk e as threads do ExecutorDB ativas
+    contexto = multiprocessing.get_context("spawn")
+    pool = ProcessPoolExecutor(max_workers=processos, mp_context=contexto, initializer=_inicializar_processo,
+                               initargs=(db.gerenciador.db_file,))
+    try:
+        futures = [pool.submit(funcao, *args) for args in tarefas]
+        for future in as_completed(futures):
+            if cancelado is not None and cancelado.is_set():
+                raise ExportacaoCancelada()
+            pedidos, paginas_tarefa = future.result()
+            feitos += pedidos
+            paginas += paginas_tarefa
+            if ao_progresso:
+                ao_progresso(feitos, total_pedidos)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    return feitos, paginas
+
+
+def _lotes(pedido_ids, tamanho):
+    return [pedido_ids[i:i + tamanho] for i in range(0, len(pedido_ids), tamanho)]
+
+
+def _numero_processos(processos):
+    return max(1, processos or os.cpu_count() or 1)
+
+
+def _gravar_relatorio_sequencial(lotes, caminho, ao_progresso, cancelado, total_pedidos):
+    """Relatório único no próprio processo, lendo um lote de pedidos por vez."""
+    renderizador = _obter_renderizador()
+    parcial = caminho + ".parcial"
+    feitos = paginas = 0
+    try:
+        c = renderizador.novo_documento(parcial)
+        for lote in lotes:
+            if cancelado is not None and cancelado.is_set():
+                raise ExportacaoCancelada()
+            for cabecalho, itens in ler_pedidos(lote):
+                paginas += renderizador.desenhar_pedido(c, cabecalho, itens)
+                feitos += 1
+            if ao_progresso:
+                ao_progresso(feitos, total_pedidos)
+        c.save()
+        os.replace(parcial, caminho)
+    finally:
+        if os.path.exists(parcial):
+            os.remove(parcial)
+    return feitos, paginas
+
+
+def gerar_pdfs_pedidos(pedido_ids, pasta_destino, processos=None, pedidos_por_tarefa=PEDIDOS_POR_TAREFA,
+                       ao_progresso=None, cancelado=None):
+    """
+    Gera um PDF por pedido (pedido_<id>.pdf) em pasta_destino, em paralelo.
+
+    processos=None usa um processo por núcleo; 1 desenha no próprio processo.
+    ao_progresso(pedidos_feitos, total) e 'cancelado' (threading.Event)
+    funcionam como em exportar_pedidos(). Retorna (pedidos, páginas).
+    """
+    pedido_ids = list(pedido_ids)
+    os.makedirs(pasta_destino, exist_ok=True)
+    tarefas = [(lote, pasta_destino) for lote in _lotes(pedido_ids, pedidos_por_tarefa)]
+    return _executar_tarefas(_renderizar_arquivos, tarefas, min(_numero_processos(processos), len(tarefas) or 1),
+                             ao_progresso, cancelado, len(pedido_ids))
+
+
+def gerar_relatorio_pdf(pedido_ids, caminho, processos=None, pedidos_por_tarefa=PEDIDOS_POR_TAREFA,
+                        ao_progresso=None, cancelado=None):
+    """
+    Gera um único PDF com todos os pedidos (cada um começando em página nova).
+
+    As partes são desenhadas em paralelo e unidas com pypdf. Sem pypdf
+    instalado, o relatório é desenhado em um único processo. Retorna
+    (pedidos, páginas).
+    """
+    pedido_ids = list(pedido_ids)
+    try:
+        from pypdf import PdfWriter
+    except ImportError:
+        logging.info("pypdf não instalado: relatório PDF gerado em um único processo.")
+        PdfWriter = None
+        processos = 1
+
+    processos = _numero_processos(processos)
+    lotes = _lotes(pedido_ids, pedidos_por_tarefa)
+    if processos == 1 or len(lotes) <= 1:
+        return _gravar_relatorio_sequencial(lotes, caminho, ao_progresso, cancelado, len(pedido_ids))
+
+    partes = [f"{caminho}.parte{indice:05d}" for indice in range(len(lotes))]
+    try:
+        resultado = _executar_tarefas(_renderizar_parte, list(zip(lotes, partes)), min(processos, len(lotes)),
+                                      ao_progresso, cancelado, len(pedido_ids))
+        writer = PdfWriter()
+        for parte in partes:
+            writer.append(parte)
+        with open(caminho + ".parcial", "wb") as arquivo:
+            writer.write(arquivo)
+        os.replace(caminho + ".parcial", caminho)
+    finally:
+        for arquivo in partes + [caminho + ".parcial"]:
+            if os.path.exists(arquivo):
+                os.remove(arquivo)
+    return resultado
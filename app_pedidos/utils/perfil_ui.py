@@ -0,0 +1,344 @@
+# utils/perfil_ui.py
+"""
+Perfil de responsividade da interface (opcional).
+
+Ativado com PEDIDOS_PERFIL_UI=1 ou 'python main.py --perfil-ui'. Com o
+valor 'cprofile' ou 'tracemalloc' (ex: --perfil-ui=cprofile) também grava
+capturas dos callbacks lentos.
+
+- Todo callback que o Tk chama (command=, bind, after, protocol, trace de
+  variáveis) é cronometrado: tkinter.Misc._register e Misc.after são
+  envolvidos antes de a janela ser criada. Os callbacks entregues pelo
+  ExecutorDB (ao_concluir/ao_falhar) também, cada um com o seu nome.
+- Uma batida de after() a cada INTERVALO_BATIDA_MS mede o atraso do laço de
+  eventos (quanto a batida demorou além do previsto).
+- Um callback acima do orçamento (PEDIDOS_PERFIL_ORCAMENTO_MS, padrão 100)
+  é registrado no log e, no modo cprofile/tracemalloc, a sua próxima
+  execução é capturada em perfil_ui/ (até CAPTURAS_POR_CALLBACK vezes).
+- Callbacks que abriram um laço de eventos aninhado (messagebox, diálogo
+  modal, update()) ficam de fora do tempo máximo: o tempo inclui a espera
+  do usuário. São contados à parte.
+- Uma janela pequena (F10 mostra/oculta) lista os handlers mais lentos. Ao
+  sair, o resumo vai para o log e para perfil_ui/resumo.json.
+"""
+import atexit
+import functools
+import json
+import logging
+import os
+import time
+import tkinter as tk
+
+INTERVALO_BATIDA_MS = 50
+INTERVALO_PAINEL_MS = 1000
+CAPTURAS_POR_CALLBACK = 3
+LINHAS_PAINEL = 8
+MODOS_CAPTURA = ("cprofile", "tracemalloc")
+
+_perfil = None  # PerfilUI ativo (None: perfil desligado, sem custo algum)
+
+
+def modo_perfil_ui(argv):
+    """Lê o modo de --perfil-ui[=modo] ou de PEDIDOS_PERFIL_UI; None se desligado."""
+    for argumento in argv:
+        if argumento == "--perfil-ui":
+            return "tempo"
+        if argumento.startswith("--perfil-ui="):
+            return argumento.split("=", 1)[1] or "tempo"
+    modo = os.environ.get("PEDIDOS_PERFIL_UI", "").strip().lower()
+    return None if modo in ("", "0") else modo
+
+
+def _rotulo(func):
+    """Nome legível do callback: Classe.metodo ou a linha da lambda."""
+    while isinstance(func, functools.partial):
+        func = func.func
+    func = getattr(func, "__func__", func)
+    nome = getattr(func, "__qualname__", None) or type(func).__qualname__
+    codigo = getattr(func, "__code__", None)
+    if "<lambda>" in nome and codigo is not None:
+        nome = f"{nome} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})"
+    return nome
+
+
+class PerfilUI:
+    """Cronometra os callbacks do Tk e mede o atraso do laço de eventos."""
+
+    def __init__(self, modo="tempo", orcamento_ms=100, pasta="perfil_ui"):
+        self.modo_captura = modo if modo in MODOS_CAPTURA else None
+        self.orcamento = orcamento_ms / 1000
+        self.pasta = pasta
+        self._callbacks = {}  # {rótulo: [chamadas, total_s, maximo_s, estouros, aninhados]}
+        self._pilha = []  # Um item por callback em execução: True se houve laço aninhado dentro dele
+        self._armados = set()  # Rótulos cuja próxima execução será capturada
+        self._capturas = {}  # {rótulo: capturas já gravadas}
+        self._capturando = False
+        self._atraso = [0, 0.0, 0.0, 0]  # [batidas, soma_s, maximo_s, acima do orçamento]
+        self._atraso_atual = 0.0
+        self._proxima_batida = None
+        self._ignorados = set()  # Funções do próprio perfil (batida, painel), nunca medidas
+        self.root = None
+        self.painel = None
+
+    # --- Medição ---
+
+    def envolver(self, func, laco_tcl=True):
+        """Devolve func envolvida pela medição (mantém o __name__ usado pelo tkinter)."""
+        if getattr(func, "__func__", func) in self._ignorados:
+            return func
+        rotulo = _rotulo(func)
+
+        @functools.wraps(func)
+        def medido(*args):
+            return self.executar(rotulo, func, args, laco_tcl)
+
+        return medido
+
+    def executar(self, rotulo, func, args, laco_tcl=True):
+        """
+        Executa func(*args) medindo o tempo. laco_tcl=False indica uma medição
+        explícita (ex: ExecutorDB) dentro de outro callback, que não conta como
+        laço de eventos aninhado.
+        """
+        if rotulo in self._armados and not self._capturando and not self._pilha:
+            return self._capturar(rotulo, func, args)
+
+        self._pilha.append(False)
+        inicio = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            duracao = time.perf_counter() - inicio
+            aninhado = self._pilha.pop()
+            if self._pilha and (laco_tcl or aninhado):
+                self._pilha[-1] = True
+            self._registrar(rotulo, duracao, aninhado)
+
+    def _registrar(self, rotulo, duracao, aninhado):
+        dados = self._callbacks.get(rotulo)
+        if dados is None:
+            dados = self._callbacks[rotulo] = [0, 0.0, 0.0, 0, 0]
+        dados[0] += 1
+        if aninhado:
+            dados[4] += 1
+            return
+        dados[1] += duracao
+        if duracao > dados[2]:
+            dados[2] = duracao
+        if duracao > self.orcamento:
+            dados[3] += 1
+            logging.warning(f"UI: {rotulo} levou {duracao * 1000:.0f} ms "
+                            f"(orçamento {self.orcamento * 1000:.0f} ms).")
+            if self.modo_captura and self._capturas.get(rotulo, 0) < CAPTURAS_POR_CALLBACK:
+                self._armados.add(rotulo)
+
+    # --- Capturas (cProfile / tracemalloc) ---
+
+    def _caminho_captura(self, rotulo, extensao):
+        os.makedirs(self.pasta, exist_ok=True)
+        numero = self._capturas.get(rotulo, 0) + 1
+        nome = "".join(c if c.isalnum() or c in "._-" else "_" for c in rotulo)[:80]
+        return os.path.join(self.pasta, f"{nome}-{numero}.{extensao}")
+
+    def _capturar(self, rotulo, func, args):
+        """Executa o callback armado sob cProfile ou tracemalloc e grava o resultado."""
+        self._armados.discard(rotulo)
+        self._capturando = True
+        if self.modo_captura == "cprofile":
+            import cProfile
+            import pstats
+            perfilador = cProfile.Profile()
+        else:
+            import tracemalloc
+            iniciou_trace = not tracemalloc.is_tracing()
+            if iniciou_trace:
+                tracemalloc.start(10)
+            antes = tracemalloc.take_snapshot()
+
+        self._pilha.append(False)
+        inicio = time.perf_counter()
+        try:
+            if self.modo_captura == "cprofile":
+                return perfilador.runcall(func, *args)
+            return func(*args)
+        finally:
+            duracao = time.perf_counter() - inicio
+            aninhado = self._pilha.pop()  # Só captura fora de outros callbacks: a pilha fica vazia
+            self._capturando = False
+            try:
+                if self.modo_captura == "cprofile":
+                    caminho = self._caminho_captura(rotulo, "prof")
+                    perfilador.dump_stats(caminho)
+                    with open(caminho[:-5] + ".txt", "w", encoding="utf-8") as arquivo:
+                        arquivo.write(f"{rotulo}: {duracao * 1000:.1f} ms\n\n")
+                        pstats.Stats(perfilador, stream=arquivo).sort_stats("cumulative").print_stats(30)
+                else:
+                    diferencas = tracemalloc.take_snapshot().compare_to(antes, "lineno")
+                    if iniciou_trace:
+                        tracemalloc.stop()
+                    caminho = self._caminho_captura(rotulo, "txt")
+                    with open(caminho, "w", encoding="utf-8") as arquivo:
+                        arquivo.write(f"{rotulo}: {duracao * 1000:.1f} ms (alocações novas por linha)\n\n")
+                        arquivo.writelines(f"{diferenca}\n" for diferenca in diferencas[:30])
+                self._capturas[rotulo] = self._capturas.get(rotulo, 0) + 1
+                logging.info(f"UI: captura de {rotulo} ({duracao * 1000:.0f} ms) gravada em {caminho}")
+            except OSError as e:
+                logging.warning(f"UI: não foi possível gravar a captura de {rotulo}: {e}")
+            self._registrar(rotulo, duracao, aninhado)
+
+    # --- Atraso do Laço de Eventos ---
+
+    def _batida(self):
+        if self._pilha:
+            # A batida rodou dentro de um callback: há um laço de eventos aninhado
+            # (messagebox, diálogo modal, update()), mesmo sem outro callback Python
+            self._pilha[-1] = True
+        agora = time.perf_counter()
+        atraso = max(0.0, agora - self._proxima_batida)
+        self._atraso_atual = atraso
+        self._atraso[0] += 1
+        self._atraso[1] += atraso
+        if atraso > self._atraso[2]:
+            self._atraso[2] = atraso
+        if atraso > self.orcamento:
+            self._atraso[3] += 1
+        self._agendar_batida()
+
+    def _agendar_batida(self):
+        self._proxima_batida = time.perf_counter() + INTERVALO_BATIDA_MS / 1000
+        self.root.after(INTERVALO_BATIDA_MS, self._batida)
+
+    # --- Instalação ---
+
+    def ativar(self):
+        """Envolve o registro de callbacks do tkinter (antes de criar a janela)."""
+        registrar_original = tk.Misc._register
+        after_original = tk.Misc.after
+        perfil = self
+
+        def _register(widget, func, subst=None, needcleanup=1):
+            # O callit de after() já recebe a função envolvida (ver abaixo)
+            if getattr(func, "__qualname__", "") != "Misc.after.<locals>.callit":
+                func = perfil.envolver(func)
+            return registrar_original(widget, func, subst, needcleanup)
+
+        def after(widget, ms, func=None, *args):
+            if func is not None:
+                func = perfil.envolver(func)
+            return after_original(widget, ms, func, *args)
+
+        tk.Misc._register = _register
+        tk.Misc.after = after
+        self._ignorados.update((PerfilUI._batida, PerfilUI._atualizar_painel))
+        atexit.register(self.encerrar)
+
+    def instalar(self, root):
+        """Inicia a batida e o painel na janela principal (F10 mostra/oculta o painel)."""
+        self.root = root
+        self._agendar_batida()
+        self.painel = PainelPerfil(root, self)
+        root.bind("<F10>", lambda e: self.painel.alternar(), add="+")
+        self._atualizar_painel()
+
+    # --- Relatório ---
+
+    def mais_lentos(self, quantidade=None):
+        """[(rótulo, chamadas, média_ms, máximo_ms, estouros, aninhados)], do maior máximo para o menor."""
+        linhas = []
+        for rotulo, (chamadas, total, maximo, estouros, aninhados) in self._callbacks.items():
+            medidas = chamadas - aninhados
+            media = total * 1000 / medidas if medidas else 0.0
+            linhas.append((rotulo, chamadas, media, maximo * 1000, estouros, aninhados))
+        linhas.sort(key=lambda linha: linha[3], reverse=True)
+        return linhas[:quantidade] if quantidade else linhas
+
+    def resumo_atraso(self):
+        batidas, soma, maximo, acima = self._atraso
+        return {"batidas": batidas, "medio_ms": round(soma * 1000 / batidas, 1) if batidas else 0.0,
+                "max_ms": round(maximo * 1000, 1), "acima_orcamento": acima}
+
+    def _atualizar_painel(self):
+        if self.painel is not None and self.painel.visivel():
+            self.painel.exibir(self._texto_painel())
+        self.root.after(INTERVALO_PAINEL_MS, self._atualizar_painel)
+
+    def _texto_painel(self):
+        atraso = self.resumo_atraso()
+        linhas = [f"Atraso do laço: agora {self._atraso_atual * 1000:.0f} ms | máx {atraso['max_ms']:.0f} ms | "
+                  f"{atraso['acima_orcamento']} batidas > {self.orcamento * 1000:.0f} ms",
+                  f"{'máx ms':>7} {'méd ms':>7} {'>orç':>5} {'vezes':>6} {'aninh':>5}  handler"]
+        for rotulo, chamadas, media, maximo, estouros, aninhados in self.mais_lentos(LINHAS_PAINEL):
+            linhas.append(f"{maximo:7.1f} {media:7.1f} {estouros:5d} {chamadas:6d} {aninhados:5d}  {rotulo[:60]}")
+        return "\n".join(linhas)
+
+    def encerrar(self):
+        """Grava o resumo (log e perfil_ui/resumo.json) ao sair."""
+        callbacks = self.mais_lentos()
+        if not callbacks:
+            return
+        atraso = self.resumo_atraso()
+        logging.info(f"Perfil da UI: atraso do laço máx {atraso['max_ms']} ms, "
+                     f"{atraso['acima_orcamento']} batidas acima do orçamento.")
+        for rotulo, chamadas, media, maximo, estouros, _ in callbacks[:15]:
+            logging.info(f"Perfil da UI: {maximo:8.1f} ms máx {media:7.1f} ms méd {estouros:4d} estouros "
+                         f"{chamadas:6d} chamadas  {rotulo}")
+        try:
+            os.makedirs(self.pasta, exist_ok=True)
+            with open(os.path.join(self.pasta, "resumo.json"), "w", encoding="utf-8") as arquivo:
+                json.dump({
+                    "orcamento_ms": self.orcamento * 1000,
+                    "atraso_laco": atraso,
+                    "callbacks": [{"handler": rotulo, "chamadas": chamadas, "media_ms": round(media, 2),
+                                   "max_ms": round(maximo, 2), "acima_orcamento": estouros,
+                                   "com_laco_aninhado": aninhados}
+                                  for rotulo, chamadas, media, maximo, estouros, aninhados in callbacks],
+                }, arquivo, ensure_ascii=False, indent=2)
+        except OSError as e:
+            logging.warning(f"Não foi possível gravar o resumo do perfil da UI: {e}")
+
+
+class PainelPerfil(tk.Toplevel):
+    """Janela pequena, sempre à frente, com os handlers mais lentos."""
+
+    def __init__(self, root, perfil):
+        super().__init__(root)
+        self.title("Perfil da UI")
+        self.attributes("-topmost", True)
+        self.resizable(False, False)
+        self.protocol("WM_DELETE_WINDOW", self.withdraw)
+        self.var_texto = tk.StringVar(value="Medindo...")
+        tk.Label(self, textvariable=self.var_texto, font="TkFixedFont", justify="left", anchor="w",
+                 padx=8, pady=6).pack(fill="both")
+
+    def visivel(self):
+        return self.winfo_exists() and self.state() != "withdrawn"
+
+    def alternar(self):
+        if self.state() == "withdrawn":
+            self.deiconify()
+        else:
+            self.withdraw()
+
+    def exibir(self, texto):
+        self.var_texto.set(texto)
+
+
+def ativar_perfil_ui(modo):
+    """Liga o perfil (se 'modo' não for None) e o devolve; chamar antes de criar a janela."""
+    global _perfil
+    if not modo:
+        return None
+    if modo not in ("tempo", "1") + MODOS_CAPTURA:
+        logging.warning(f"Modo de perfil da UI desconhecido: {modo} (use 1, cprofile ou tracemalloc).")
+    orcamento = float(os.environ.get("PEDIDOS_PERFIL_ORCAMENTO_MS", "100"))
+    _perfil = PerfilUI(modo, orcamento_ms=orcamento, pasta=os.environ.get("PEDIDOS_PERFIL_PASTA", "perfil_ui"))
+    _perfil.ativar()
+    logging.info(f"Perfil da UI ativo (orçamento {orcamento:.0f} ms, capturas: {_perfil.modo_captura or 'não'}).")
+    return _perfil
+
+
+def chamar_medido(func, *args):
+    """Chama func(*args) medindo-a com o próprio nome se o perfil estiver ativo (ex: callbacks do ExecutorDB)."""
+    if _perfil is None:
+        return func(*args)
+    return _perfil.executar(_rotulo(func), func, args, laco_tcl=False)
@@ -0,0 +1,43 @@
+# utils/relatorios.py
+from db import executar_comando
+
+# As consultas leem só as tabelas de resumo (migração 6), nunca pedidos/itens_pedido:
+# o custo depende do tamanho dos rankings exibidos, não do histórico.
+
+
+def faturamento_por_dia(dias=30):
+    """[(data, pedidos, faturamento)] dos dias mais recentes com vendas, do mais novo ao mais antigo."""
+    sql = "SELECT data, pedidos, faturamento FROM resumo_vendas_dia ORDER BY data DESC LIMIT ?"
+    return executar_comando(sql, (dias,), fetchall=True) or []
+
+
+def top_produtos(limite=10):
+    """[(produto_nome, quantidade, faturamento)] dos produtos com maior faturamento."""
+    sql = """
+        SELECT produto_nome, quantidade, faturamento
+        FROM resumo_vendas_produto
+        ORDER BY faturamento DESC
+        LIMIT ?
+    """
+    return executar_comando(sql, (limite,), fetchall=True) or []
+
+
+def top_clientes(limite=10):
+    """[(cliente_id, nome, pedidos, faturamento)] dos clientes com maior faturamento."""
+    sql = """
+        SELECT r.cliente_id, c.nome, r.pedidos, r.faturamento
+        FROM resumo_vendas_cliente r
+        INNER JOIN clientes c ON c.id = r.cliente_id
+        ORDER BY r.faturamento DESC
+        LIMIT ?
+    """
+    return executar_comando(sql, (limite,), fetchall=True) or []
+
+
+def carregar_painel(dias=30, limite=10):
+    """Todos os dados da aba Relatórios (roda na thread do ExecutorDB)."""
+    return {
+        "dias": faturamento_por_dia(dias),
+        "produtos": top_produtos(limite),
+        "clientes": top_clientes(limite),
+    }
@@ -0,0 +1,346 @@
+# utils/servico_pedidos.py
+"""
+Gravação de pedidos sem interface (usada pelo PedidoForm e pela ingestão em lote).
+
+- gravar_pedido(): um pedido, com verificação e baixa de estoque na mesma transação;
+- gravar_lote_pedidos(): milhares de pedidos por transação, com clientes e
+  produtos resolvidos em poucas consultas, estoque do lote inteiro lido de
+  uma vez e baixado com um único UPDATE. Pedidos que não podem ser atendidos
+  são rejeitados com o motivo, sem impedir os demais.
+"""
+import json
+import logging
+import math
+from datetime import date
+from db import transacao, repetir_se_ocupado
+from utils.validations import validar_data
+
+
+class EstoqueInsuficienteError(ValueError):
+    """Um ou mais produtos do pedido não têm estoque suficiente."""
+
+    def __init__(self, faltas):
+        # faltas: [(produto_id, produto_nome, solicitado, disponivel)]
+        self.faltas = faltas
+        linhas = [f"- {nome}: solicitado {solicitado}, disponível {disponivel}"
+                  for _, nome, solicitado, disponivel in faltas]
+        super().__init__("Estoque insuficiente para:\n" + "\n".join(linhas))
+
+
+# Limite seguro de parâmetros por consulta (SQLITE_MAX_VARIABLE_NUMBER antigo = 999)
+TAMANHO_LOTE_IDS = 900
+
+
+def _agregar_quantidades(itens_pedido):
+    """Soma as quantidades por produto (o mesmo produto pode aparecer em várias linhas)."""
+    quantidades = {}
+    nomes = {}
+    for produto_id, produto_nome, quantidade, _ in itens_pedido:
+        if produto_id is None:
+            continue  # Item customizado: não controla estoque
+        quantidades[produto_id] = quantidades.get(produto_id, 0) + quantidade
+        nomes.setdefault(produto_id, produto_nome)
+    return quantidades, nomes
+
+
+def _verificar_estoque(cursor, quantidades, nomes):
+    """Lê o estoque de todos os produtos em lotes e levanta EstoqueInsuficienteError com TODAS as faltas."""
+    ids = list(quantidades)
+    estoques = {}
+    for inicio in range(0, len(ids), TAMANHO_LOTE_IDS):
+        lote = ids[inicio:inicio + TAMANHO_LOTE_IDS]
+        marcadores = ", ".join("?" * len(lote))
+        cursor.execute(f"SELECT id, estoque FROM produtos WHERE id IN ({marcadores})", lote)
+        estoques.update(cursor.fetchall())
+
+    faltas = [(produto_id, nomes[produto_id], quantidade, estoques.get(produto_id, 0))
+              for produto_id, quantidade in quantidades.items()
+              if estoques.get(produto_id, 0) < quantidade]
+    if faltas:
+        raise EstoqueInsuficienteError(faltas)
+
+
+def _gravar_pedido_transacao(cliente_id, data, total, itens_pedido):
+    quantidades, nomes = _agregar_quantidades(itens_pedido)
+
+    # BEGIN IMMEDIATE: o lock de escrita é obtido antes da verificação de
+    # estoque, então nenhum outro terminal altera o estoque entre ler e baixar.
+    with transacao(imediata=True) as conn:
+        cursor = conn.cursor()
+
+        # 1. Verifica o estoque de todos os produtos de uma vez
+        if quantidades:
+            _verificar_estoque(cursor, quantidades, nomes)
+
+        # 2. Salvar na tabela PEDIDOS (e capturar o ID)
+        sql_pedido = "INSERT INTO pedidos (cliente_id, data, total) VALUES (?, ?, ?)"
+        cursor.execute(sql_pedido, (cliente_id, data, total))
+        pedido_id = cursor.lastrowid  # CRÍTICO: Capturar o ID
+
+        # 3. Salvar na tabela ITENS_PEDIDO
+        sql_item = "INSERT INTO itens_pedido (pedido_id, produto_id, produto_nome, quantidade, preco_unit) VALUES (?, ?, ?, ?, ?)"
+        cursor.executemany(sql_item, [(pedido_id, produto_id, produto_nome, quantidade, preco_unit)
+                                      for produto_id, produto_nome, quantidade, preco_unit in itens_pedido])
+
+        # 4. Baixa condicional do estoque (uma linha por produto, já agregada).
+        # A condição estoque >= ? garante que o estoque nunca fica negativo.
+        if quantidades:
+            sql_estoque = "UPDATE produtos SET estoque = estoque - ? WHERE id = ? AND estoque >= ?"
+            cursor.executemany(sql_estoque, [(quantidade, produto_id, quantidade)
+                                             for produto_id, quantidade in quantidades.items()])
+            if cursor.rowcount != len(quantidades):
+                # Não deveria ocorrer dentro do BEGIN IMMEDIATE; reverifica para informar as faltas
+                _verificar_estoque(cursor, quantidades, nomes)
+                raise EstoqueInsuficienteError([])
+
+    return pedido_id
+
+
+def gravar_pedido(cliente_id, data, total, itens_pedido):
+    """
+    Salva o Pedido e seus Itens em uma única transação e retorna o ID do pedido.
+
+    Não toca em widgets: roda na thread do ExecutorDB. Levanta
+    EstoqueInsuficienteError (um ValueError) listando todas as faltas, e
+    sqlite3.Error para falhas de banco. Se o banco estiver ocupado por outro
+    terminal, a transação inteira é repetida algumas vezes.
+    """
+    return repetir_se_ocupado(_gravar_pedido_transacao, cliente_id, data, total, itens_pedido)
+
+
+# --- Ingestão em lote ---
+
+# Pedidos gravados por transação (um commit por lote: "group commit")
+TAMANHO_LOTE_PEDIDOS = 1000
+
+# Com o lock de escrita (BEGIN IMMEDIATE) os IDs dos pedidos podem ser
+# atribuídos de antemão, e os cabeçalhos inseridos com um único executemany
+SQL_PROXIMO_ID_PEDIDO = """
+    SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'pedidos'), 0),
+               COALESCE((SELECT MAX(id) FROM pedidos), 0)) + 1
+"""
+
+# Baixa de estoque do lote inteiro em um único UPDATE; o parâmetro é {"produto_id": quantidade} em JSON.
+# UPDATE correlacionado (json_extract pelo id) em vez de UPDATE ... FROM, que exige SQLite 3.33+
+SQL_BAIXA_ESTOQUE_LOTE = """
+    UPDATE produtos SET estoque = estoque - json_extract(?1, '$."' || id || '"')
+    WHERE id IN (SELECT CAST(key AS INTEGER) FROM json_each(?1))
+      AND estoque >= json_extract(?1, '$."' || id || '"')
+"""
+
+
+def _inteiro_positivo(valor, campo):
+    try:
+        numero = int(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"{campo} inválido: {valor!r}.")
+    if numero <= 0:
+        raise ValueError(f"{campo} deve ser positivo.")
+    return numero
+
+
+def _chave_cliente(bruto):
+    if bruto.get("cliente_id") not in (None, ""):
+        return "id", _inteiro_positivo(bruto["cliente_id"], "cliente_id")
+    if str(bruto.get("cliente_email") or "").strip():
+        return "email", str(bruto["cliente_email"]).strip()
+    raise ValueError("Informe cliente_id ou cliente_email.")
+
+
+def _chave_produto(item):
+    if item.get("produto_id") not in (None, ""):
+        return "id", _inteiro_positivo(item["produto_id"], "produto_id")
+    for campo, tipo in (("sku", "sku"), ("produto", "nome")):
+        if str(item.get(campo) or "").strip():
+            return tipo, str(item[campo]).strip()
+    raise ValueError("Item sem produto_id, sku ou produto.")
+
+
+def normalizar_pedido(bruto):
+    """
+    Valida um pedido recebido (dict, ex: uma linha JSON) sem consultar o banco.
+
+    Formato: {"referencia": ..., "cliente_id" | "cliente_email": ..., "data": "AAAA-MM-DD"
+    (opcional, padrão hoje), "itens": [{"produto_id" | "sku" | "produto": ...,
+    "quantidade": n, "preco_unit": opcional (padrão: preço do cadastro)}]}.
+    Retorna (referencia, chave_cliente, data, itens) ou levanta ValueError com o motivo;
+    a referência (texto, None se ausente) identifica o pedido na origem e não pode se repetir.
+    """
+    if not isinstance(bruto, dict):
+        raise ValueError("Pedido deve ser um objeto.")
+    referencia = str(bruto.get("referencia") or "").strip() or None
+    chave_cliente = _chave_cliente(bruto)
+
+    data = str(bruto.get("data") or "").strip() or date.today().isoformat()
+    if not validar_data(data):
+        raise ValueError(f"Data inválida: {data!r} (use AAAA-MM-DD).")
+
+    itens_brutos = bruto.get("itens")
+    if not isinstance(itens_brutos, list) or not itens_brutos:
+        raise ValueError("O pedido precisa ter ao menos um item.")
+    itens = []
+    for item in itens_brutos:
+        if not isinstance(item, dict):
+            raise ValueError("Item deve ser um objeto.")
+        quantidade = _inteiro_positivo(item.get("quantidade"), "quantidade")
+        preco_unit = item.get("preco_unit")
+        if preco_unit not in (None, ""):
+            try:
+                preco_unit = float(str(preco_unit).replace(',', '.'))
+            except ValueError:
+                raise ValueError(f"preco_unit inválido: {preco_unit!r}.")
+            if not math.isfinite(preco_unit):
+                raise ValueError(f"preco_unit inválido: {item.get('preco_unit')!r}.")
+            if preco_unit <= 0:
+                raise ValueError("preco_unit deve ser positivo.")
+        else:
+            preco_unit = None
+        itens.append((_chave_produto(item), quantidade, preco_unit))
+
+    return referencia, chave_cliente, data, itens
+
+
+def _consultar_por(conn, sql, valores):
+    """Executa 'sql' com a lista de valores em JSON (um único parâmetro, sem limite de variáveis)."""
+    if not valores:
+        return []
+    return conn.execute(sql, (json.dumps(list(valores)),)).fetchall()
+
+
+def _resolver_clientes(conn, chaves):
+    """{chave_cliente: cliente_id} das chaves que existem (uma consulta por tipo de chave)."""
+    resolvidos = {}
+    for tipo, coluna in (("id", "id"), ("email", "email")):
+        valores = {valor for tipo_chave, valor in chaves if tipo_chave == tipo}
+        sql = f"SELECT {coluna}, id FROM clientes WHERE {coluna} IN (SELECT value FROM json_each(?))"
+        resolvidos.update(((tipo, valor), cliente_id) for valor, cliente_id in _consultar_por(conn, sql, valores))
+    return resolvidos
+
+
+def _resolver_produtos(conn, chaves):
+    """{chave_produto: (id, nome, preco, estoque)}; é a leitura de estoque do lote inteiro."""
+    resolvidos = {}
+    for tipo, coluna in (("id", "id"), ("sku", "sku"), ("nome", "nome")):
+        valores = {valor for tipo_chave, valor in chaves if tipo_chave == tipo}
+        sql = f"""
+            SELECT {coluna}, id, nome, preco, estoque FROM produtos
+            WHERE {coluna} IN (SELECT value FROM json_each(?))
+        """
+        resolvidos.update(((tipo, linha[0]), linha[1:]) for linha in _consultar_por(conn, sql, valores))
+    return resolvidos
+
+
+def _referencias_gravadas(conn, referencias):
+    """Referências do lote que já estão no banco (uma consulta, pelo índice único)."""
+    sql = "SELECT referencia FROM pedidos WHERE referencia IN (SELECT value FROM json_each(?))"
+    return {referencia for referencia, in _consultar_por(conn, sql, referencias)}
+
+
+def _montar_pedido(chave_cliente, itens, clientes, produtos, disponivel):
+    """
+    Resolve um pedido normalizado contra os dados do lote. Retorna
+    (cliente_id, linhas, total, demanda) ou levanta ValueError com o motivo.
+    """
+    cliente_id = clientes.get(chave_cliente)
+    if cliente_id is None:
+        raise ValueError(f"Cliente não encontrado ({chave_cliente[0]} {chave_cliente[1]}).")
+
+    linhas = []
+    demanda = {}  # {produto_id: quantidade}, somando linhas repetidas do mesmo produto
+    nomes = {}
+    for chave_produto, quantidade, preco_unit in itens:
+        produto = produtos.get(chave_produto)
+        if produto is None:
+            raise ValueError(f"Produto não encontrado ({chave_produto[0]} {chave_produto[1]}).")
+        produto_id, nome, preco, _ = produto
+        linhas.append((produto_id, nome, quantidade, preco if preco_unit is None else preco_unit))
+        demanda[produto_id] = demanda.get(produto_id, 0) + quantidade
+        nomes[produto_id] = nome
+
+    faltas = [f"{nomes[produto_id]} (solicitado {quantidade}, disponível {disponivel[produto_id]})"
+              for produto_id, quantidade in demanda.items() if disponivel[produto_id] < quantidade]
+    if faltas:
+        raise ValueError("Estoque insuficiente: " + "; ".join(faltas) + ".")
+
+    total = sum(quantidade * preco_unit for _, _, quantidade, preco_unit in linhas)
+    return cliente_id, linhas, total, demanda
+
+
+def _gravar_lote_transacao(normalizados):
+    gravados, rejeitados = [], []
+
+    # Como em gravar_pedido: o lock de escrita vem antes da leitura do estoque
+    with transacao(imediata=True) as conn:
+        clientes = _resolver_clientes(conn, {pedido[1] for _, pedido in normalizados})
+        produtos = _resolver_produtos(conn, {chave for _, pedido in normalizados for chave, _, _ in pedido[3]})
+        # Estoque ainda livre para os próximos pedidos do lote (atendidos na ordem de chegada)
+        disponivel = {produto_id: estoque for produto_id, _, _, estoque in produtos.values()}
+        # Reenvio do mesmo feed/pedido: a referência já gravada (ou repetida no lote) é rejeitada
+        referencias = _referencias_gravadas(conn, {pedido[0] for _, pedido in normalizados if pedido[0]})
+
+        aceitos = []
+        for indice, (referencia, chave_cliente, data, itens) in normalizados:
+            if referencia is not None and referencia in referencias:
+                rejeitados.append((indice, f"Pedido duplicado: a referência {referencia!r} já foi gravada."))
+                continue
+            try:
+                cliente_id, linhas, total, demanda = _montar_pedido(chave_cliente, itens, clientes, produtos,
+                                                                    disponivel)
+            except ValueError as e:
+                rejeitados.append((indice, str(e)))
+                continue
+            for produto_id, quantidade in demanda.items():
+                disponivel[produto_id] -= quantidade
+            if referencia is not None:
+                referencias.add(referencia)
+            aceitos.append((indice, referencia, cliente_id, data, total, linhas))
+
+        if not aceitos:
+            return gravados, rejeitados
+
+        proximo_id = conn.execute(SQL_PROXIMO_ID_PEDIDO).fetchone()[0]
+        cabecalhos, itens_sql, baixa = [], [], {}
+        for pedido_id, (indice, referencia, cliente_id, data, total, linhas) in enumerate(aceitos, start=proximo_id):
+            cabecalhos.append((pedido_id, referencia, cliente_id, data, total))
+            for produto_id, nome, quantidade, preco_unit in linhas:
+                itens_sql.append((pedido_id, produto_id, nome, quantidade, preco_unit))
+                baixa[produto_id] = baixa.get(produto_id, 0) + quantidade
+            gravados.append((indice, pedido_id))
+
+        conn.executemany("INSERT INTO pedidos (id, referencia, cliente_id, data, total) VALUES (?, ?, ?, ?, ?)",
+                         cabecalhos)
+        conn.executemany("INSERT INTO itens_pedido (pedido_id, produto_id, produto_nome, quantidade, preco_unit) "
+                         "VALUES (?, ?, ?, ?, ?)", itens_sql)
+        cursor = conn.execute(SQL_BAIXA_ESTOQUE_LOTE, (json.dumps(baixa),))
+        if cursor.rowcount != len(baixa):
+            # Não deveria ocorrer dentro do BEGIN IMMEDIATE; desfaz o lote inteiro
+            raise EstoqueInsuficienteError([])
+
+    return gravados, rejeitados
+
+
+def gravar_lote_pedidos(pedidos):
+    """
+    Grava uma lista de pedidos (dicts no formato de normalizar_pedido) em uma
+    única transação. Cada pedido é aceito ou rejeitado por inteiro; os que
+    não podem ser atendidos (cliente/produto inexistente, estoque insuficiente
+    considerando os pedidos anteriores do mesmo lote, referência já gravada)
+    não impedem os demais.
+
+    Retorna (gravados, rejeitados): [(índice em pedidos, pedido_id)] e
+    [(índice em pedidos, motivo)].
+    """
+    normalizados, rejeitados = [], []
+    for indice, bruto in enumerate(pedidos):
+        try:
+            normalizados.append((indice, normalizar_pedido(bruto)))
+        except ValueError as e:
+            rejeitados.append((indice, str(e)))
+
+    gravados = []
+    if normalizados:
+        gravados, rejeitados_lote = repetir_se_ocupado(_gravar_lote_transacao, normalizados)
+        rejeitados = sorted(rejeitados + rejeitados_lote)
+    if gravados:
+        logging.info(f"Lote de pedidos gravado: {len(gravados)} pedidos, {len(rejeitados)} rejeitados.")
+    return gravados, rejeitados
@@ -0,0 +1,81 @@
+# utils/tabela_treeview.py
+
+
+class TabelaTreeview:
+    """
+    Liga uma Treeview a uma lista de linhas (iid, values) aplicando só as diferenças.
+
+    Em vez de apagar e reinserir tudo, sincronizar() remove as linhas que
+    sumiram, atualiza as que mudaram, move as que trocaram de posição e insere
+    as novas. Como as linhas que continuam existindo não são recriadas, a
+    seleção e a posição de rolagem são preservadas.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self._valores = {}  # {iid: values exibidos}
+
+    def __len__(self):
+        return len(self._valores)
+
+    def __contains__(self, iid):
+        return str(iid) in self._valores
+
+    def sincronizar(self, linhas):
+        """Faz a Treeview exibir exatamente 'linhas' (lista de (iid, values)), nesta ordem."""
+        novas = [(str(iid), tuple(valores)) for iid, valores in linhas]
+        ids_novos = {iid for iid, _ in novas}
+
+        # 1. Remoções (inclui linhas inseridas fora da tabela, ex: "Nenhum item encontrado")
+        remover = [iid for iid in self.tree.get_children() if iid not in ids_novos]
+        if remover:
+            self.tree.delete(*remover)
+            for iid in remover:
+                self._valores.pop(iid, None)
+
+        # 2. Atualizações, movimentações e inserções, percorrendo a ordem atual uma única vez
+        ordem_atual = self.tree.get_children()
+        j = 0
+        colocados = set()
+        for posicao, (iid, valores) in enumerate(novas):
+            while j < len(ordem_atual) and ordem_atual[j] in colocados:
+                j += 1
+
+            if iid in self._valores:
+                if self._valores[iid] != valores:
+                    self.tree.item(iid, values=valores)
+                    self._valores[iid] = valores
+                if j < len(ordem_atual) and ordem_atual[j] == iid:
+                    j += 1
+                else:
+                    self.tree.move(iid, "", posicao)
+            else:
+                self.tree.insert("", posicao, iid=iid, values=valores)
+                self._valores[iid] = valores
+            colocados.add(iid)
+
+    def atualizar_linha(self, iid, valores, posicao="end"):
+        """Insere ou atualiza uma única linha (sem tocar nas demais)."""
+        iid, valores = str(iid), tuple(valores)
+        if iid in self._valores:
+            if self._valores[iid] != valores:
+                self.tree.item(iid, values=valores)
+        else:
+            self.tree.insert("", posicao, iid=iid, values=valores)
+        self._valores[iid] = valores
+
+    def remover_linha(self, iid):
+        """Remove uma única linha, se existir."""
+        self.remover_linhas([iid])
+
+    def remover_linhas(self, iids):
+        """Remove várias linhas com uma única chamada à Treeview."""
+        existentes = [str(iid) for iid in iids if str(iid) in self._valores]
+        if existentes:
+            self.tree.delete(*existentes)
+            for iid in existentes:
+                del self._valores[iid]
+
+    def limpar(self):
+        self.tree.delete(*self.tree.get_children())
+        self._valores.clear()
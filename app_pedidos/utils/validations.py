@@ -1,5 +1,7 @@
 # utils/validations.py
+import math
 import re
+from datetime import date
 
 
 def validar_nome(nome):
@@ -25,4 +27,66 @@ def validar_telefone(telefone):
     digitos = re.sub(r'\D', '', telefone)
 
     # Verifica se o número de dígitos está entre 8 e 15
-    return 8 <= len(digitos) <= 15
\ No newline at end of file
+    return 8 <= len(digitos) <= 15
+
+
+def validar_produto(nome, preco_str, estoque_str, sku_str=""):
+    """
+    Regras do cadastro de produto (ProdutoForm, importação em lote e API).
+    Retorna (True, (nome, preco, estoque, sku)) ou (False, mensagem de erro).
+    """
+    if not validar_nome(nome):
+        return False, "O Nome do produto é obrigatório."
+
+    try:
+        preco = float(preco_str.replace(',', '.'))
+        if not math.isfinite(preco):
+            return False, "O Preço deve ser um número decimal válido."
+        if preco <= 0:
+            return False, "O Preço deve ser um valor positivo."
+    except ValueError:
+        return False, "O Preço deve ser um número decimal válido."
+
+    try:
+        estoque = int(estoque_str)
+        if estoque < 0:
+            return False, "O Estoque não pode ser negativo."
+    except ValueError:
+        return False, "O Estoque deve ser um número inteiro válido."
+
+    # SKU vazio vira NULL (o índice único aceita vários produtos sem código)
+    sku = (sku_str or "").strip() or None
+
+    return True, (nome.strip(), preco, estoque, sku)
+
+
+def validar_cliente(nome, email, telefone):
+    """
+    Regras do cadastro de cliente (importação em lote e API; o ClienteForm
+    valida campo a campo com as mesmas funções, para apontar o campo errado).
+    Retorna (True, (nome, email, telefone)) ou (False, mensagem de erro).
+    """
+    if not validar_nome(nome):
+        return False, "Nome é obrigatório."
+    if not validar_email(email):
+        return False, "E-mail inválido (formato simples)."
+    if not validar_telefone(telefone):
+        return False, "Telefone deve ter entre 8 e 15 dígitos."
+    # Vazios viram NULL (o e-mail é UNIQUE, mas aceita vários clientes sem e-mail)
+    return True, (nome.strip(), (email or "").strip() or None, (telefone or "").strip() or None)
+
+
+def validar_data(data):
+    """
+    Data no formato AAAA-MM-DD e existente no calendário. Só esse formato é
+    entendido pelas funções de data do SQLite (julianday, strftime) usadas
+    nos relatórios e nas análises; date.fromisoformat sozinho aceitaria
+    também 20261018.
+    """
+    if not data or not re.fullmatch(r"\d{4}-\d{2}-\d{2}", data.strip()):
+        return False
+    try:
+        date.fromisoformat(data.strip())
+    except ValueError:
+        return False
+    return True
\ No newline at end of file